@@ -0,0 +1,147 @@
+"""
+Séries temporais sobre a consolidação e o PMPV mensal.
+
+Todas as consultas passam pela dimensão ``periodos`` (chave contínua de
+meses indexada), então cada série sai de um único SELECT com funções de
+janela do SQLite — sem laço em Python por período. Grafias diferentes do
+mesmo mês ("Dez/2025", "12/2025") caem na mesma chave e formam um único
+ponto da série.
+
+Valores da consolidação são montantes e somam; o PMPV é um preço unitário
+(R$/m³): vários registros do mesmo mês ou trimestre viram a média, e as
+consultas de soma (``soma_movel``, ``trimestre_ate_data``) o recusam.
+"""
+
+from typing import Dict, List, Optional
+
+from database import DatabasePMPV
+from periodos import normalizar_periodo
+
+# métrica -> (tabela, coluna, agregação de vários valores do mesmo período)
+METRICAS = {
+    'cgr':  ('consolidacao', 'cgr', 'SUM'),
+    'cgf':  ('consolidacao', 'cgf', 'SUM'),
+    'ret':  ('consolidacao', 'ret', 'SUM'),
+    'rp':   ('consolidacao', 'rp', 'SUM'),
+    'rpv':  ('consolidacao', 'rpv', 'SUM'),
+    'scg':  ('consolidacao', 'scg', 'SUM'),
+    'pmpv': ('pmpv_mensal',  'pmpv', 'AVG'),   # preço unitário: não se soma
+}
+
+
+class AnaliseTemporal:
+    """Séries de CGR/CGF/RET/RP/RPV/SCG e PMPV mensal por período normalizado."""
+
+    def __init__(self, db: DatabasePMPV):
+        self.db = db
+
+    # ── helpers ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _chave(periodo: Optional[str]) -> Optional[int]:
+        if periodo is None:
+            return None
+        norm = normalizar_periodo(periodo)
+        if norm is None:
+            raise ValueError(f"Período não reconhecido: {periodo!r}")
+        return norm.chave
+
+    @staticmethod
+    def _exigir_soma(metrica: str):
+        if metrica in METRICAS and METRICAS[metrica][2] != 'SUM':
+            raise ValueError(f"{metrica!r} é um preço unitário; somas no tempo não fazem sentido")
+
+    def _base(self, metrica: str, granularidade: str,
+              inicio: Optional[str], fim: Optional[str]):
+        """CTE ``base`` com uma linha por período: periodo, ano, mes, trimestre, chave, valor.
+
+        Agrupa pela chave normalizada; ``periodo`` é uma das grafias gravadas.
+        """
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica inválida: {metrica!r}. Use uma de {sorted(METRICAS)}")
+        tabela, coluna, agregacao = METRICAS[metrica]
+        cte = f"""
+            WITH base AS (
+                SELECT MIN(p.periodo) AS periodo, p.ano, p.mes, p.trimestre, p.chave,
+                       {agregacao}(COALESCE(t.{coluna}, 0)) AS valor
+                FROM periodos p
+                JOIN {tabela} t ON t.periodo = p.periodo
+                WHERE p.granularidade = ? AND p.chave BETWEEN ? AND ?
+                GROUP BY p.granularidade, p.chave, p.ano, p.mes, p.trimestre
+            )
+        """
+        chave_ini = self._chave(inicio)
+        chave_fim = self._chave(fim)
+        params = (granularidade,
+                  chave_ini if chave_ini is not None else -1,
+                  chave_fim if chave_fim is not None else 1 << 40)
+        return cte, params
+
+    def _consultar(self, sql: str, params) -> List[Dict]:
+        self.db.cursor.execute(sql, params)
+        return [dict(row) for row in self.db.cursor.fetchall()]
+
+    # ── séries ───────────────────────────────────────────────────────────────
+    def serie(self, metrica: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+              granularidade: str = 'M') -> List[Dict]:
+        """Valores da métrica em ordem cronológica, opcionalmente num intervalo."""
+        cte, params = self._base(metrica, granularidade, inicio, fim)
+        return self._consultar(cte + "SELECT * FROM base ORDER BY chave", params)
+
+    def soma_movel(self, metrica: str, janela: int = 3, inicio: Optional[str] = None,
+                   fim: Optional[str] = None) -> List[Dict]:
+        """Soma e média móveis dos últimos ``janela`` meses (meses sem dado contam como ausentes)."""
+        self._exigir_soma(metrica)
+        janela = int(janela)
+        if janela < 1:
+            raise ValueError("A janela deve ter pelo menos 1 mês")
+        cte, params = self._base(metrica, 'M', inicio, fim)
+        frame = f"ORDER BY chave RANGE BETWEEN {janela - 1} PRECEDING AND CURRENT ROW"
+        sql = cte + f"""
+            SELECT *, SUM(valor) OVER ({frame}) AS soma_movel,
+                      AVG(valor) OVER ({frame}) AS media_movel
+            FROM base ORDER BY chave
+        """
+        return self._consultar(sql, params)
+
+    def trimestre_ate_data(self, metrica: str, inicio: Optional[str] = None,
+                           fim: Optional[str] = None) -> List[Dict]:
+        """Acumulado do trimestre até cada mês (quarter-to-date)."""
+        self._exigir_soma(metrica)
+        cte, params = self._base(metrica, 'M', inicio, fim)
+        sql = cte + """
+            SELECT *, SUM(valor) OVER (PARTITION BY ano, trimestre ORDER BY chave)
+                      AS acumulado_trimestre
+            FROM base ORDER BY chave
+        """
+        return self._consultar(sql, params)
+
+    def ano_contra_ano(self, metrica: str, inicio: Optional[str] = None,
+                       fim: Optional[str] = None) -> List[Dict]:
+        """Compara cada mês com o mesmo mês do ano anterior."""
+        cte, params = self._base(metrica, 'M', None, fim)
+        chave_ini = self._chave(inicio)
+        sql = cte + """
+            SELECT atual.*, anterior.valor AS valor_ano_anterior,
+                   atual.valor - anterior.valor AS variacao,
+                   CASE WHEN anterior.valor IS NULL OR anterior.valor = 0 THEN NULL
+                        ELSE (atual.valor - anterior.valor) * 100.0 / ABS(anterior.valor)
+                   END AS variacao_pct
+            FROM base atual
+            LEFT JOIN base anterior ON anterior.chave = atual.chave - 12
+            WHERE atual.chave >= ?
+            ORDER BY atual.chave
+        """
+        return self._consultar(sql, params + (chave_ini if chave_ini is not None else -1,))
+
+    def consolidar_trimestres(self, metrica: str, inicio: Optional[str] = None,
+                              fim: Optional[str] = None) -> List[Dict]:
+        """Consolida os meses por trimestre (ano, trimestre, valor, meses).
+
+        Montantes são somados; o PMPV vira a média dos meses do trimestre.
+        """
+        cte, params = self._base(metrica, 'M', inicio, fim)
+        sql = cte + f"""
+            SELECT ano, trimestre, {METRICAS[metrica][2]}(valor) AS valor, COUNT(*) AS meses
+            FROM base GROUP BY ano, trimestre ORDER BY ano, trimestre
+        """
+        return self._consultar(sql, params)
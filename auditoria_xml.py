@@ -0,0 +1,675 @@
+"""
+Motor da auditoria de XMLs fiscais (NF-e e CT-e), sem interface.
+
+Os parsers extraem de cada documento os totais usados no CGR e a chave de
+acesso de 44 dígitos (``Id`` de ``infNFe``/``infCte``, ou ``chNFe``/``chCTe``
+do protocolo). A chave identifica o documento: a mesma NF-e salva como
+``nfeProc`` e como ``NFe`` avulsa, ou copiada em duas subpastas, tem a mesma
+chave e deve contar uma vez só.
+
+``IndiceChaves`` é um índice hash das chaves: um ``dict`` com as chaves vistas
+na execução (duplicatas em O(1), entre todas as empresas) e uma tabela
+``documentos_fiscais`` em ``pmpv_data.db`` com os totais já extraídos. Numa
+nova execução, ``ler_chave`` lê só o início do arquivo; se a chave já está no
+índice, os totais vêm do banco e o XML não é analisado de novo.
+
+XMLs de evento (``procEventoNFe``/``procEventoCTe``) passam no mesmo fluxo:
+cancelamentos homologados entram no conjunto de chaves canceladas (também
+gravado no banco, em ``eventos_cancelamento``, para valer em execuções
+seguintes). Documentos cancelados — em qualquer ordem, antes ou depois do
+evento — e notas denegadas (``cStat`` do protocolo) ficam fora dos totais por
+consulta ao conjunto, sem conciliação posterior com planilhas.
+
+Downloads da SEFAZ em ``.zip`` (e ``.7z``, com o pacote opcional ``py7zr``)
+são lidos membro a membro, direto do arquivo compactado, sem extrair nada
+para o disco (``MotorAuditoria.processar_arquivos``). Cada arquivo
+compactado é lido num processo separado; o processo principal só junta os
+resultados, deduplica e aplica os cancelamentos. Nos resultados, a origem de
+um membro é ``caminho.zip!pasta/nota.xml``.
+
+Com ``MotorAuditoria(itens=ItensNFe(...))`` (módulo ``itens_nfe``), a mesma
+leitura extrai também os itens (``det``) de cada NF-e — produto, CFOP,
+quantidade, preço — para a tabela de itens por empresa e mês. NF-e já no
+índice mas ainda sem itens gravados são analisadas de novo uma vez.
+"""
+
+import io
+import re
+import sqlite3
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from database import BANCO_CENTRAL
+
+try:
+    import py7zr
+except ImportError:  # .7z indisponível; .zip continua funcionando
+    py7zr = None
+
+# Versão da extração: registros gravados por versões anteriores são reanalisados
+VERSAO_PARSER = 2
+
+# Eventos de cancelamento (110112 = cancelamento por substituição) e cStat do
+# retorno que confirma o registro do evento
+TIPOS_CANCELAMENTO = {'110111', '110112'}
+CSTAT_EVENTO_REGISTRADO = {'135', '136', '155'}
+# cStat do protocolo de uso denegado
+CSTAT_DENEGADA = {'110', '205', '301', '302', '303'}
+
+_RE_ID = re.compile(rb'Id="(?:NFe|CTe)(\d{44})"')
+_BYTES_CABECALHO = 4096
+UNIDADES_M3 = {'M3', 'M³', 'M 3', 'M3.'}
+_CAMPOS_DOCUMENTO = ('tipo', 'numero', 'valor_total', 'icms', 'pis', 'cofins', 'volume_total', 'cstat')
+
+
+def _chave(inf, ch_protocolo) -> str:
+    """Chave de 44 dígitos do atributo ``Id`` (``NFe...``/``CTe...``) ou do protocolo."""
+    if inf is not None:
+        id_ = inf.get('Id') or ''
+        if len(id_) == 47 and id_[3:].isdigit():
+            return id_[3:]
+    if ch_protocolo is not None and ch_protocolo.text:
+        return ch_protocolo.text.strip()
+    return ''
+
+
+def _chave_cabecalho(cabecalho: bytes) -> str:
+    achado = _RE_ID.search(cabecalho)
+    return achado.group(1).decode() if achado else ''
+
+
+def ler_chave(xml_path: Path) -> str:
+    """Chave de acesso lida só do início do arquivo (sem analisar o XML); '' se não achar."""
+    try:
+        with open(xml_path, 'rb') as f:
+            return _chave_cabecalho(f.read(_BYTES_CABECALHO))
+    except OSError:
+        return ''
+
+
+def _texto(elemento, caminho: str, ns: Dict) -> str:
+    achado = elemento.find(caminho, ns) if elemento is not None else None
+    return achado.text.strip() if achado is not None and achado.text else ''
+
+
+def _decimal(texto: str) -> float:
+    try:
+        return float(texto)
+    except ValueError:
+        return 0.0
+
+
+def parse_nfe(xml_path: Path, itens: bool = False) -> Dict:
+    """Extrai dados de uma NF-e.
+
+    Valor : total/ICMSTot/vNF  (padrão SEFAZ, igual em todas as empresas)
+    Volume: soma de qCom nos itens onde uCom = M3 — campo mais confiável para
+            gás natural. vol/qVol representa volumes de embalagem (caixas,
+            paletes) e está incorreto para gás.
+    Fallback 1 → vol/qVol  (caso não haja itens M3)
+    Fallback 2 → vol/pesoL (último recurso)
+
+    Com ``itens=True``, o mesmo laço sobre ``det`` guarda cada item (produto,
+    CFOP, quantidade, preço) em ``'itens'``, com data de emissão e cliente.
+    """
+    try:
+        tree = ET.parse(xml_path)
+        root = tree.getroot()
+        ns = {'nfe': 'http://www.portalfiscal.inf.br/nfe'}
+
+        chave      = _chave(root.find('.//nfe:infNFe', ns), root.find('.//nfe:infProt/nfe:chNFe', ns))
+        numero     = root.find('.//nfe:ide/nfe:nNF', ns)
+        valor_tag  = root.find('.//nfe:total/nfe:ICMSTot/nfe:vNF', ns)
+        # vNFTot inclui IBS/CBS (tributos 2026); se presente, usar como total
+        valor_ext  = root.find('.//nfe:total/nfe:vNFTot', ns)
+        cstat      = root.find('.//nfe:protNFe/nfe:infProt/nfe:cStat', ns)
+        icms       = root.find('.//nfe:total/nfe:ICMSTot/nfe:vICMS', ns)
+        pis        = root.find('.//nfe:total/nfe:ICMSTot/nfe:vPIS', ns)
+        cofins     = root.find('.//nfe:total/nfe:ICMSTot/nfe:vCOFINS', ns)
+
+        # Volume M3: soma qCom dos itens cujo uCom é metro cúbico
+        vol_m3 = 0.0
+        detalhe = []
+        for det in root.findall('.//nfe:det', ns):
+            u_com = det.find('nfe:prod/nfe:uCom', ns)
+            q_com = det.find('nfe:prod/nfe:qCom', ns)
+            m3 = False
+            if u_com is not None and q_com is not None:
+                if u_com.text.strip().upper() in UNIDADES_M3:
+                    m3 = True
+                    try:
+                        vol_m3 += float(q_com.text)
+                    except Exception:
+                        pass
+            if itens:
+                prod = det.find('nfe:prod', ns)
+                quantidade = _decimal(_texto(prod, 'nfe:qCom', ns))
+                detalhe.append({
+                    'n_item': int(det.get('nItem') or len(detalhe) + 1),
+                    'codigo': _texto(prod, 'nfe:cProd', ns),
+                    'descricao': _texto(prod, 'nfe:xProd', ns),
+                    'ncm': _texto(prod, 'nfe:NCM', ns),
+                    'cfop': _texto(prod, 'nfe:CFOP', ns),
+                    'unidade': _texto(prod, 'nfe:uCom', ns),
+                    'quantidade': quantidade,
+                    'valor_unitario': _decimal(_texto(prod, 'nfe:vUnCom', ns)),
+                    'valor_total': _decimal(_texto(prod, 'nfe:vProd', ns)),
+                    'volume_m3': quantidade if m3 else 0.0,
+                })
+
+        # Fallback 1: vol/qVol
+        if vol_m3 == 0.0:
+            for vol in root.findall('.//nfe:vol', ns):
+                q_vol = vol.find('nfe:qVol', ns)
+                if q_vol is not None and q_vol.text:
+                    try:
+                        vol_m3 += float(q_vol.text)
+                    except Exception:
+                        pass
+
+        # Fallback 2: pesoL do <vol>
+        if vol_m3 == 0.0:
+            peso = root.find('.//nfe:vol/nfe:pesoL', ns)
+            if peso is not None and peso.text:
+                try:
+                    vol_m3 = float(peso.text)
+                except Exception:
+                    pass
+
+        valor = (float(valor_ext.text) if valor_ext is not None else
+                 float(valor_tag.text) if valor_tag is not None else 0.0)
+
+        dados = {
+            'tipo': 'NF-e',
+            'chave': chave,
+            'numero': numero.text if numero is not None else 'N/A',
+            'valor_total': valor,
+            'icms':   float(icms.text)   if icms   is not None else 0.0,
+            'pis':    float(pis.text)    if pis    is not None else 0.0,
+            'cofins': float(cofins.text) if cofins is not None else 0.0,
+            'cstat':  cstat.text.strip() if cstat is not None and cstat.text else '',
+            'volume_total': vol_m3,
+            'volume': int(vol_m3),  # retrocompatibilidade
+        }
+        if itens:
+            dados.update(
+                itens=detalhe,
+                data_emissao=_texto(root, './/nfe:ide/nfe:dhEmi', ns) or _texto(root, './/nfe:ide/nfe:dEmi', ns),
+                cliente_cnpj=_texto(root, './/nfe:dest/nfe:CNPJ', ns) or _texto(root, './/nfe:dest/nfe:CPF', ns),
+                cliente_nome=_texto(root, './/nfe:dest/nfe:xNome', ns))
+        return dados
+    except Exception as e:
+        return {'erro': str(e)}
+
+def parse_cte(xml_path: Path) -> Dict:
+    """Extrai dados de um CT-e.
+
+    Valor : vPrest/vTPrest  (padrão SEFAZ para CT-e)
+    Volume: infQ/qCarga onde cUnid='00' (M3) tem prioridade.
+            Tabela cUnid CT-e: 00=M3, 01=KG, 02=TON, 03=Un, 04=L, 05=MMBTU
+            Se não houver M3, usa o primeiro qCarga > 0 disponível.
+    """
+    try:
+        tree = ET.parse(xml_path)
+        root = tree.getroot()
+        ns = {'cte': 'http://www.portalfiscal.inf.br/cte'}
+
+        chave       = _chave(root.find('.//cte:infCte', ns), root.find('.//cte:infProt/cte:chCTe', ns))
+        numero      = root.find('.//cte:ide/cte:nCT', ns)
+        valor_total = root.find('.//cte:vPrest/cte:vTPrest', ns)
+        icms        = root.find('.//cte:ICMS//cte:vICMS', ns)
+        cstat       = root.find('.//cte:protCTe/cte:infProt/cte:cStat', ns)
+        pis         = root.find('.//cte:vPIS', ns)
+        cofins      = root.find('.//cte:vCOFINS', ns)
+
+        # Volume: prioridade para cUnid='00' (M3)
+        vol_m3 = 0.0
+        unid_encontrada = ''
+
+        for infQ in root.findall('.//cte:infQ', ns):
+            c_unid  = infQ.find('cte:cUnid', ns)
+            q_carga = infQ.find('cte:qCarga', ns)
+            if c_unid is not None and q_carga is not None and c_unid.text == '00':
+                try:
+                    v = float(q_carga.text)
+                    if v > 0:
+                        vol_m3 = v
+                        unid_encontrada = 'M3'
+                        break
+                except Exception:
+                    pass
+
+        # Fallback: qualquer infQ com qCarga > 0
+        if vol_m3 == 0.0:
+            for infQ in root.findall('.//cte:infQ', ns):
+                q_carga = infQ.find('cte:qCarga', ns)
+                c_unid  = infQ.find('cte:cUnid', ns)
+                tp_med  = infQ.find('cte:tpMed', ns)
+                if q_carga is not None:
+                    try:
+                        v = float(q_carga.text)
+                        if v > 0:
+                            vol_m3 = v
+                            unid_encontrada = (tp_med.text if tp_med is not None else
+                                               c_unid.text if c_unid is not None else '?')
+                            break
+                    except Exception:
+                        pass
+
+        return {
+            'tipo': 'CT-e',
+            'chave': chave,
+            'numero': numero.text if numero is not None else 'N/A',
+            'valor_total': float(valor_total.text) if valor_total is not None else 0.0,
+            'icms':   float(icms.text)   if icms   is not None else 0.0,
+            'pis':    float(pis.text)    if pis    is not None else 0.0,
+            'cofins': float(cofins.text) if cofins is not None else 0.0,
+            'cstat':  cstat.text.strip() if cstat is not None and cstat.text else '',
+            'volume_total': vol_m3,
+            'unidade_volume': unid_encontrada,
+            'volume': int(vol_m3),  # retrocompatibilidade
+        }
+    except Exception as e:
+        return {'erro': str(e)}
+
+def parse_evento(xml_path: Path) -> Dict:
+    """Extrai chave, tipo e situação de um evento de NF-e ou CT-e.
+
+    ``cancelamento`` só é verdadeiro para eventos de cancelamento com retorno
+    de registro (``cStat`` 135/136/155); eventos sem retorno não cancelam.
+    """
+    try:
+        root = ET.parse(xml_path).getroot()
+        texto = {}
+        for elemento in root.iter():
+            nome = elemento.tag.rsplit('}', 1)[-1]
+            # Primeira ocorrência: tpEvento/chave do evento, cStat do retorno
+            if nome in ('chNFe', 'chCTe', 'tpEvento', 'cStat') and nome not in texto:
+                texto[nome] = (elemento.text or '').strip()
+        chave = texto.get('chNFe') or texto.get('chCTe') or ''
+        tp_evento = texto.get('tpEvento', '')
+        cstat = texto.get('cStat', '')
+        return {
+            'tipo': 'Evento',
+            'chave': chave,
+            'tp_evento': tp_evento,
+            'cstat': cstat,
+            'cancelamento': (bool(chave) and tp_evento in TIPOS_CANCELAMENTO
+                             and cstat in CSTAT_EVENTO_REGISTRADO),
+        }
+    except Exception as e:
+        return {'erro': str(e)}
+
+
+def _tipo_cabecalho(cabecalho: bytes) -> str:
+    conteudo = cabecalho.decode('utf-8', errors='ignore')[:500]  # Só o início
+    # Antes de 'NFe': procEventoNFe também contém 'NFe'
+    if 'procEvento' in conteudo or '<evento' in conteudo or '<envEvento' in conteudo:
+        return 'evento'
+    if 'nfeProc' in conteudo or 'NFe' in conteudo:
+        return 'nfe'
+    elif 'cteProc' in conteudo or 'CTe' in conteudo:
+        return 'cte'
+    return 'desconhecido'
+
+
+def detectar_tipo_xml(xml_path: Path) -> str:
+    """Detecta se é NF-e, CT-e ou evento pelo conteúdo"""
+    try:
+        with open(xml_path, 'rb') as f:
+            return _tipo_cabecalho(f.read(_BYTES_CABECALHO))
+    except OSError:
+        return 'desconhecido'
+
+
+def ler_xml(abrir: Callable, conhecidas=frozenset(), itens: bool = False) -> Tuple[str, Dict]:
+    """Lê um XML de um stream binário (``abrir()``) e classifica a leitura.
+
+    Retorna ``('conhecida', {'chave'})`` sem analisar o XML se a chave do
+    cabeçalho está em ``conhecidas``; senão ``('documento', dados)``,
+    ``('evento', dados)`` ou ``('erro', {'erro', 'chave'})``. Não usa o banco:
+    roda também nos processos que leem arquivos compactados. ``itens`` liga o
+    detalhamento por item das NF-e (ver ``parse_nfe``).
+    """
+    with abrir() as f:
+        cabecalho = f.read(_BYTES_CABECALHO)
+        chave = _chave_cabecalho(cabecalho)
+        if chave and chave in conhecidas:
+            return 'conhecida', {'chave': chave}
+        conteudo = io.BytesIO(cabecalho + f.read())
+
+    tipo = _tipo_cabecalho(cabecalho)
+    dados = (parse_evento(conteudo) if tipo == 'evento' else
+             (parse_nfe(conteudo, itens=True) if itens else parse_nfe(conteudo)) if tipo == 'nfe' else
+             parse_cte(conteudo) if tipo == 'cte' else {'erro': 'tipo desconhecido'})
+    if 'erro' in dados:
+        return 'erro', {'erro': dados['erro'], 'chave': chave}
+    if tipo == 'evento':
+        return 'evento', dados
+    dados['chave'] = dados.get('chave') or chave
+    return 'documento', dados
+
+
+# ==========================================
+# ARQUIVOS COMPACTADOS (.zip / .7z)
+# ==========================================
+
+EXTENSOES_COMPACTADAS = ('.zip', '.7z')
+
+
+def _eh_xml(nome: str) -> bool:
+    return nome.lower().endswith('.xml')
+
+
+def _percorrer_zip(caminho: str, tratar: Callable[[str, Callable], None]):
+    with zipfile.ZipFile(caminho) as z:
+        for info in z.infolist():
+            if not info.is_dir() and _eh_xml(info.filename):
+                tratar(f"{caminho}!{info.filename}", lambda info=info: z.open(info))
+
+
+def _percorrer_7z(caminho: str, tratar: Callable[[str, Callable], None]):
+    """Descompacta os membros em memória; cada um é tratado e descartado ao terminar."""
+    if py7zr is None:
+        raise RuntimeError("Arquivos .7z requerem o pacote py7zr (pip install py7zr)")
+
+    class Membro(py7zr.io.Py7zIO):
+        def __init__(self, nome):
+            self.nome, self.buffer, self.tratado = nome, io.BytesIO(), False
+
+        def write(self, s):
+            return self.buffer.write(s)
+
+        def read(self, size=None):
+            return self.buffer.read(size)
+
+        def seek(self, offset, whence=0):
+            return self.buffer.seek(offset, whence)
+
+        def flush(self):
+            pass
+
+        def size(self):
+            return self.buffer.getbuffer().nbytes
+
+        def close(self):
+            if not self.tratado:
+                self.tratado = True
+                dados, self.buffer = self.buffer.getvalue(), io.BytesIO()
+                tratar(f"{caminho}!{self.nome}", lambda: io.BytesIO(dados))
+
+    class Fabrica(py7zr.io.WriterFactory):
+        def __init__(self):
+            self.membros = []
+
+        def create(self, nome):
+            membro = Membro(nome)
+            self.membros.append(membro)
+            return membro
+
+    fabrica = Fabrica()
+    with py7zr.SevenZipFile(caminho, 'r') as z:
+        alvos = [nome for nome in z.getnames() if _eh_xml(nome)]
+        z.extract(targets=alvos, factory=fabrica)
+    for membro in fabrica.membros:  # versões do py7zr que não chamam close()
+        membro.close()
+
+
+# Chaves conhecidas e modo de itens no processo filho (enviados uma vez, no
+# inicializador do pool)
+_CONHECIDAS_PROCESSO = frozenset()
+_ITENS_PROCESSO = False
+
+
+def _iniciar_processo(conhecidas, itens):
+    global _CONHECIDAS_PROCESSO, _ITENS_PROCESSO
+    _CONHECIDAS_PROCESSO, _ITENS_PROCESSO = conhecidas, itens
+
+
+def ler_compactado(caminho, conhecidas=None, itens=None) -> List[Tuple[str, str, Dict]]:
+    """``(origem, leitura, dados)`` de cada XML do arquivo compactado (ver ``ler_xml``)."""
+    conhecidas = _CONHECIDAS_PROCESSO if conhecidas is None else conhecidas
+    itens = _ITENS_PROCESSO if itens is None else itens
+    caminho = str(caminho)
+    leituras = []
+
+    def tratar(origem, abrir):
+        try:
+            leituras.append((origem,) + ler_xml(abrir, conhecidas, itens))
+        except Exception as e:  # membro corrompido não derruba o arquivo
+            leituras.append((origem, 'erro', {'erro': str(e), 'chave': ''}))
+
+    if caminho.lower().endswith('.7z'):
+        _percorrer_7z(caminho, tratar)
+    else:
+        _percorrer_zip(caminho, tratar)
+    return leituras
+
+# ==========================================
+# ÍNDICE DE CHAVES E MOTOR DA AUDITORIA
+# ==========================================
+
+STATUS_OK = 'OK'
+STATUS_DUPLICADA = 'DUPLICADA'
+STATUS_CANCELADA = 'CANCELADA'
+STATUS_DENEGADA = 'DENEGADA'
+STATUS_ERRO = 'ERRO_PARSE'
+
+
+class IndiceChaves:
+    """Chaves de acesso vistas nesta execução (``dict``) e nas anteriores (banco).
+
+    ``db_path=None`` usa um banco em memória (nada persiste entre execuções).
+    """
+
+    def __init__(self, db_path: Optional[str] = BANCO_CENTRAL):
+        self.conn = sqlite3.connect(db_path or ':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documentos_fiscais (
+                chave TEXT PRIMARY KEY,
+                tipo TEXT,
+                numero TEXT,
+                empresa TEXT,
+                arquivo TEXT,
+                valor_total REAL,
+                icms REAL,
+                pis REAL,
+                cofins REAL,
+                volume_total REAL,
+                cstat TEXT,
+                versao INTEGER,
+                data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        colunas = {c[1] for c in self.conn.execute("PRAGMA table_info(documentos_fiscais)")}
+        if 'cstat' not in colunas:
+            self.conn.execute("ALTER TABLE documentos_fiscais ADD COLUMN cstat TEXT")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS eventos_cancelamento (
+                chave TEXT PRIMARY KEY,
+                tp_evento TEXT,
+                arquivo TEXT,
+                data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.canceladas = {r[0] for r in self.conn.execute("SELECT chave FROM eventos_cancelamento")}
+        self._conhecidas = {r[0] for r in self.conn.execute(
+            "SELECT chave FROM documentos_fiscais WHERE versao = ?", (VERSAO_PARSER,))}
+        self._vistas: Dict[str, Dict] = {}   # chave -> 1ª ocorrência nesta execução
+        self._novos: List[tuple] = []
+        self._novos_cancelamentos: List[tuple] = []
+        self.duplicadas: List[Dict] = []
+
+    @property
+    def conhecidas(self):
+        """Chaves com totais gravados (consulta O(1))."""
+        return self._conhecidas
+
+    def conhecido(self, chave: str) -> Optional[Dict]:
+        """Totais gravados de uma chave analisada numa execução anterior (ou ``None``)."""
+        if chave not in self._conhecidas:
+            return None
+        linha = self.conn.execute("SELECT * FROM documentos_fiscais WHERE chave = ?", (chave,)).fetchone()
+        return dict(linha) if linha else None
+
+    def registrar(self, chave: str, empresa: str, arquivo, dados: Optional[Dict] = None) -> bool:
+        """Marca a chave como vista; ``False`` se ela já apareceu nesta execução."""
+        primeira = self._vistas.get(chave)
+        if primeira is not None:
+            self.duplicadas.append({'chave': chave, 'empresa': empresa, 'arquivo': str(arquivo),
+                                    'empresa_original': primeira['empresa'],
+                                    'arquivo_original': primeira['arquivo']})
+            return False
+        self._vistas[chave] = {'empresa': empresa, 'arquivo': str(arquivo)}
+        if dados is not None and chave not in self._conhecidas:
+            self._novos.append((chave, empresa, str(arquivo))
+                               + tuple(dados.get(c) for c in _CAMPOS_DOCUMENTO) + (VERSAO_PARSER,))
+        return True
+
+    def registrar_cancelamento(self, chave: str, tp_evento: str, arquivo):
+        if chave not in self.canceladas:
+            self.canceladas.add(chave)
+            self._novos_cancelamentos.append((chave, tp_evento, str(arquivo)))
+
+    def salvar(self):
+        """Grava chaves e cancelamentos novos (uma transação, ``executemany``)."""
+        colunas = ('chave', 'empresa', 'arquivo') + _CAMPOS_DOCUMENTO + ('versao',)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO documentos_fiscais ({', '.join(colunas)}) "
+                f"VALUES ({', '.join('?' * len(colunas))}) "
+                f"ON CONFLICT (chave) DO UPDATE SET "
+                + ', '.join(f"{c} = excluded.{c}" for c in colunas[1:]),
+                self._novos)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO eventos_cancelamento (chave, tp_evento, arquivo) VALUES (?, ?, ?)",
+                self._novos_cancelamentos)
+        self._conhecidas.update(n[0] for n in self._novos)
+        self._novos = []
+        self._novos_cancelamentos = []
+
+    def fechar(self):
+        self.conn.close()
+
+
+class MotorAuditoria:
+    """Audita XMLs um a um, contando cada chave de acesso uma única vez."""
+
+    def __init__(self, indice: Optional[IndiceChaves] = None, itens=None):
+        self.indice = indice if indice is not None else IndiceChaves(None)
+        self.itens = itens    # ItensNFe: liga a extração por item
+        if itens is None:
+            self._prontas = self.indice.conhecidas
+        else:
+            # No modo de itens, NF-e sem itens gravados precisam ser lidas por inteiro
+            self._prontas = {c for c in self.indice.conhecidas if c in itens.chaves or c[20:22] != '55'}
+        self.documentos: List[Dict] = []
+        self.eventos: List[Dict] = []
+        self.reaproveitados = 0   # documentos cujos totais vieram do índice
+
+    @property
+    def canceladas(self):
+        return self.indice.canceladas
+
+    def processar(self, xml_path: Path, empresa: str = '') -> Dict:
+        try:
+            leitura, dados = ler_xml(lambda: open(xml_path, 'rb'), self._prontas, self.itens is not None)
+        except OSError as e:
+            leitura, dados = 'erro', {'erro': str(e), 'chave': ''}
+        return self.incorporar(xml_path, empresa, leitura, dados)
+
+    def processar_arquivos(self, arquivos: Sequence[Path], empresa: str = '',
+                           max_processos: Optional[int] = None,
+                           ao_concluir_arquivo: Optional[Callable[[int, str], None]] = None) -> int:
+        """Audita os XMLs de arquivos .zip/.7z sem extraí-los; um processo por arquivo.
+
+        ``ao_concluir_arquivo(i, caminho)`` é chamado (no processo atual) a cada
+        arquivo incorporado. Retorna o número de XMLs lidos.
+        """
+        conhecidas, itens = frozenset(self._prontas), self.itens is not None
+        if len(arquivos) <= 1:
+            leituras = (ler_compactado(a, conhecidas, itens) for a in arquivos)
+            return self._incorporar_arquivos(arquivos, empresa, leituras, ao_concluir_arquivo)
+        with ProcessPoolExecutor(max_workers=max_processos, initializer=_iniciar_processo,
+                                 initargs=(conhecidas, itens)) as pool:
+            leituras = pool.map(ler_compactado, [str(a) for a in arquivos])
+            return self._incorporar_arquivos(arquivos, empresa, leituras, ao_concluir_arquivo)
+
+    def _incorporar_arquivos(self, arquivos, empresa, leituras, ao_concluir_arquivo) -> int:
+        total = 0
+        for i, (caminho, resultado) in enumerate(zip(arquivos, leituras), 1):
+            for origem, leitura, dados in resultado:
+                self.incorporar(origem, empresa, leitura, dados)
+            total += len(resultado)
+            if ao_concluir_arquivo:
+                ao_concluir_arquivo(i, str(caminho))
+        return total
+
+    def incorporar(self, origem, empresa: str, leitura: str, dados: Dict) -> Dict:
+        """Registra uma leitura de ``ler_xml``: deduplicação, índice e cancelamentos."""
+        if leitura == 'evento':
+            return self._incorporar_evento(origem, empresa, dados)
+        if leitura == 'conhecida':
+            dados = self.indice.conhecido(dados['chave'])
+            self.reaproveitados += 1
+        elif leitura == 'erro':
+            documento = {'empresa': empresa, 'arquivo': str(origem), 'chave': dados.get('chave', ''),
+                         'tipo': 'ERRO', 'numero': Path(str(origem)).name, 'valor_total': 0.0,
+                         'icms': 0.0, 'pis': 0.0, 'cofins': 0.0, 'volume_total': 0.0,
+                         'cstat': '', 'status': STATUS_ERRO}
+            self.documentos.append(documento)
+            return documento
+
+        chave = dados.get('chave') or ''
+        documento = {c: dados.get(c) for c in _CAMPOS_DOCUMENTO}
+        documento.update(empresa=empresa, arquivo=str(origem), chave=chave, status=STATUS_OK)
+        # Sem chave não há como deduplicar: o documento conta
+        if chave and not self.indice.registrar(chave, empresa, origem, dados):
+            documento['status'] = STATUS_DUPLICADA
+        elif documento['cstat'] in CSTAT_DENEGADA:
+            documento['status'] = STATUS_DENEGADA
+        elif self.itens is not None and 'itens' in dados:
+            self.itens.adicionar(empresa, dados)
+        self.documentos.append(documento)
+        return documento
+
+    def _incorporar_evento(self, origem, empresa: str, evento: Dict) -> Dict:
+        evento.update(empresa=empresa, arquivo=str(origem))
+        if evento.get('cancelamento'):
+            self.indice.registrar_cancelamento(evento['chave'], evento['tp_evento'], origem)
+        self.eventos.append(evento)
+        return evento
+
+    def situacao(self, documento: Dict) -> str:
+        """Status final: cancelamento vale mesmo se o evento veio depois do documento."""
+        if documento['status'] == STATUS_OK and documento['chave'] in self.indice.canceladas:
+            return STATUS_CANCELADA
+        return documento['status']
+
+    def totais(self) -> Dict[str, Dict[str, float]]:
+        """Valor, volume e quantidade por tipo, só com documentos válidos e não duplicados."""
+        totais = {tipo: {'valor_total': 0.0, 'volume_total': 0.0, 'documentos': 0}
+                  for tipo in ('NF-e', 'CT-e')}
+        for d in self.documentos:
+            if self.situacao(d) == STATUS_OK and d['tipo'] in totais:
+                t = totais[d['tipo']]
+                t['valor_total'] += float(d['valor_total'] or 0)
+                t['volume_total'] += float(d['volume_total'] or 0)
+                t['documentos'] += 1
+        return totais
+
+    @property
+    def duplicadas(self) -> List[Dict]:
+        return self.indice.duplicadas
+
+    def concluir(self):
+        """Aplica os cancelamentos aos status e persiste as chaves (e itens) novas."""
+        for d in self.documentos:
+            d['status'] = self.situacao(d)
+        self.indice.salvar()
+        if self.itens is not None:
+            self.itens.salvar()
@@ -0,0 +1,178 @@
+"""
+Cenários e sensibilidade para PMPV e SCG.
+
+Em vez de editar as entradas e recalcular um cenário por vez, um modelo base
+(uma sessão salva em ``dados_mes`` ou um período da ``consolidacao``) é
+avaliado para milhares de perturbações de uma vez, com numpy:
+
+    base = CenariosPMPV.da_sessao(db, sessao_id)
+    variacoes = grade(molecula=[-0.05, 0, 0.05], volume=np.linspace(-0.02, 0.02, 41))
+    res = base.avaliar(**variacoes)          # {'pmpv': array, 'preco_final': array}
+    distribuicao(res['pmpv'])                # mínimo, percentis, máximo...
+    tabela = tornado(base, {'molecula': (-0.05, 0.05), 'volume': (-0.02, 0.02)}, 'pmpv')
+    exportar_tornado(tabela, "tornado.xlsx")
+
+Variações são frações (0.05 = +5%), exceto ``conta_grafica``, que é um
+acréscimo em R$ ao valor da sessão.
+"""
+
+import itertools
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from excel_handler import ExcelHandlerPMPV, PlanilhaFluxo
+from motor_pmpv import CAMPOS, DIAS_PADRAO, arrays_trimestre
+from saida_arquivos import gravar_arquivo
+
+# Cenários avaliados por bloco (limita a memória das matrizes cenário × linha)
+TAMANHO_BLOCO = 2048
+
+
+def grade(**niveis: Sequence[float]) -> Dict[str, np.ndarray]:
+    """Produto cartesiano dos níveis de cada parâmetro (um array por parâmetro)."""
+    nomes = list(niveis)
+    combinacoes = np.array(list(itertools.product(*(niveis[n] for n in nomes))), dtype=float)
+    return {nome: combinacoes[:, i] for i, nome in enumerate(nomes)}
+
+
+def _tamanho(variacoes: Mapping[str, np.ndarray]) -> int:
+    """Número de cenários; escalares (e arrays de um valor) valem para todos."""
+    tamanhos = {np.size(v) for v in variacoes.values()} - {1}
+    if len(tamanhos) > 1:
+        raise ValueError("As variações precisam ter o mesmo número de cenários")
+    return tamanhos.pop() if tamanhos else 1
+
+
+def _validar(variacoes: Mapping, parametros: Sequence[str]):
+    desconhecidos = set(variacoes) - set(parametros)
+    if desconhecidos:
+        raise ValueError(f"Parâmetro desconhecido: {', '.join(sorted(desconhecidos))}")
+
+
+class CenariosPMPV:
+    """PMPV e preço final de um trimestre sob variações de preço e volume."""
+
+    PARAMETROS = CAMPOS + ('conta_grafica',)
+    METRICAS = ('pmpv', 'preco_final')
+
+    def __init__(self, molecula, transporte, logistica, volume, dias, conta_grafica: float = 0.0):
+        self.molecula = np.asarray(molecula, dtype=float)
+        self.transporte = np.asarray(transporte, dtype=float)
+        self.logistica = np.asarray(logistica, dtype=float)
+        self.volume = np.asarray(volume, dtype=float)
+        self.dias = np.broadcast_to(np.asarray(dias, dtype=float), self.volume.shape)
+        self.conta_grafica = conta_grafica
+
+    @classmethod
+    def da_sessao(cls, db, sessao_id: int, dias: Sequence[int] = DIAS_PADRAO) -> "CenariosPMPV":
+        """Modelo base a partir de uma sessão salva (``dias[i]`` = dias do mês ``i + 1``)."""
+        sessoes = db.carregar_sessoes([sessao_id])
+        if not sessoes:
+            raise ValueError(f"Sessão {sessao_id} não encontrada")
+        sessao = sessoes[0]
+        por_mes = sessao['dados_por_mes']  # ordenado por mês
+        dias_mes = [dias[linhas[0]['mes'] - 1] if 1 <= linhas[0]['mes'] <= len(dias) else 30
+                    for linhas in por_mes.values()]
+        a = arrays_trimestre(por_mes, dias_mes)
+        cg = (sessao['resultado'] or {}).get('conta_grafica') or 0.0
+        return cls(a['molecula'], a['transporte'], a['logistica'], a['volume'], a['dias'], cg)
+
+    def avaliar(self, **variacoes) -> Dict[str, np.ndarray]:
+        """Avalia os cenários; cada variação é um escalar ou um array (um valor por cenário)."""
+        _validar(variacoes, self.PARAMETROS)
+        total = _tamanho(variacoes)
+        var = {p: np.broadcast_to(np.asarray(variacoes.get(p, 0.0), dtype=float), (total,))
+               for p in self.PARAMETROS}
+        pmpv = np.empty(total)
+        for inicio in range(0, total, TAMANHO_BLOCO):
+            fatia = slice(inicio, inicio + TAMANHO_BLOCO)
+            fator = {p: 1.0 + var[p][fatia, None] for p in CAMPOS}
+            preco = (self.molecula * fator['molecula'] + self.transporte * fator['transporte']
+                     + self.logistica * fator['logistica'])
+            volume = self.volume * fator['volume']
+            volume_mes = np.where(volume > 0, volume * self.dias, 0.0)
+            v_tot = volume_mes.sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pmpv[fatia] = np.where(v_tot > 0, (preco * volume_mes).sum(axis=1) / v_tot, np.nan)
+        return {'pmpv': pmpv, 'preco_final': pmpv + self.conta_grafica + var['conta_grafica']}
+
+
+class CenariosSCG:
+    """RPV e SCG de um período da consolidação sob variações de CGR, CGF, RET e RP."""
+
+    PARAMETROS = ('cgr', 'cgf', 'ret', 'rp')
+    METRICAS = ('rpv', 'scg')
+
+    def __init__(self, cgr: float = 0.0, cgf: float = 0.0, ret: float = 0.0, rp: float = 0.0):
+        self.base = {'cgr': cgr or 0.0, 'cgf': cgf or 0.0, 'ret': ret or 0.0, 'rp': rp or 0.0}
+
+    @classmethod
+    def da_consolidacao(cls, db, periodo: str) -> "CenariosSCG":
+        linha = db.buscar_consolidacao(periodo)
+        if not linha:
+            raise ValueError(f"Período {periodo} não encontrado na consolidação")
+        return cls(*(linha.get(p) for p in cls.PARAMETROS))
+
+    def avaliar(self, **variacoes) -> Dict[str, np.ndarray]:
+        """Mesma fórmula das colunas geradas da ``consolidacao``."""
+        _validar(variacoes, self.PARAMETROS)
+        total = _tamanho(variacoes)
+        v = {p: self.base[p] * (1.0 + np.broadcast_to(np.asarray(variacoes.get(p, 0.0), dtype=float),
+                                                      (total,)))
+             for p in self.PARAMETROS}
+        rpv = v['cgr'] - v['cgf']
+        return {'rpv': rpv, 'scg': rpv * (v['cgr'] + v['cgf']) + v['ret'] + v['rp']}
+
+
+def distribuicao(valores: np.ndarray) -> Dict[str, float]:
+    """Estatísticas da métrica nos cenários (cenários sem volume são ignorados)."""
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    if not valores.size:
+        return {'cenarios': 0}
+    p5, p25, p50, p75, p95 = np.percentile(valores, [5, 25, 50, 75, 95])
+    return {'cenarios': int(valores.size), 'minimo': float(valores.min()), 'p5': float(p5),
+            'p25': float(p25), 'mediana': float(p50), 'p75': float(p75), 'p95': float(p95),
+            'maximo': float(valores.max()), 'media': float(valores.mean()),
+            'desvio': float(valores.std())}
+
+
+def tornado(modelo, faixas: Mapping[str, Tuple[float, float]], metrica: str) -> List[Dict]:
+    """Sensibilidade um-parâmetro-por-vez, da maior para a menor amplitude.
+
+    Avalia base, ``baixo`` e ``alto`` de cada parâmetro num único lote.
+    """
+    if metrica not in modelo.METRICAS:
+        raise ValueError(f"Métrica inválida: {metrica}")
+    _validar(faixas, modelo.PARAMETROS)
+    nomes = list(faixas)
+    variacoes = {p: np.zeros(1 + 2 * len(nomes)) for p in nomes}
+    for i, p in enumerate(nomes):
+        variacoes[p][1 + 2 * i], variacoes[p][2 + 2 * i] = faixas[p]
+    valores = modelo.avaliar(**variacoes)[metrica]
+
+    base = float(valores[0])
+    linhas = []
+    for i, p in enumerate(nomes):
+        baixo, alto = float(valores[1 + 2 * i]), float(valores[2 + 2 * i])
+        linhas.append({'parametro': p, 'variacao_baixa': faixas[p][0], 'variacao_alta': faixas[p][1],
+                       'base': base, 'valor_baixo': baixo, 'valor_alto': alto,
+                       'amplitude': abs(alto - baixo)})
+    linhas.sort(key=lambda l: l['amplitude'], reverse=True)
+    return linhas
+
+
+def exportar_tornado(linhas: Sequence[Dict], caminho: str) -> str:
+    """Grava a tabela tornado em Excel (nome livre mais próximo de ``caminho``)."""
+    wb = ExcelHandlerPMPV.novo_workbook()
+    ws = PlanilhaFluxo(wb, "Tornado", {"A": 18, "B": 14, "C": 14, "D": 16, "E": 16, "F": 16, "G": 16})
+    titulos = ["Parâmetro", "Variação -", "Variação +", "Base", "Valor -", "Valor +", "Amplitude"]
+    ws.linha(titulos, ["pmpv_cabecalho"] * len(titulos))
+    for l in linhas:
+        ws.linha([l['parametro'], l['variacao_baixa'], l['variacao_alta'], l['base'],
+                  l['valor_baixo'], l['valor_alto'], l['amplitude']],
+                 ["pmpv_texto"] + ["pmpv_preco"] * 6)
+    final = gravar_arquivo(caminho, wb.save)
+    wb.close()
+    return final
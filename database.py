@@ -1,12 +1,133 @@
+import os
 import sqlite3
-from typing import Dict, List
+import threading
+from typing import Dict, List, Optional
+
+from periodos import normalizar_periodo
+from sessoes_pmpv import SessaoPMPV
+
+# Banco central do aplicativo: sessões e consolidação, e também o histórico
+# RET, a auditoria de XML e os itens de NF-e gravados pelos outros módulos
+BANCO_CENTRAL = "pmpv_data.db"
+
+# Fórmulas da consolidação (NULL conta como zero). RPV e SCG são colunas
+# geradas a partir delas e por isso nunca ficam desatualizados.
+_SQL_RPV = "(COALESCE(cgr, 0) - COALESCE(cgf, 0))"
+_SQL_SCG = f"({_SQL_RPV} * (COALESCE(cgr, 0) + COALESCE(cgf, 0)) + COALESCE(ret, 0) + COALESCE(rp, 0))"
+
+_SQL_CONSOLIDACAO = f"""
+    CREATE TABLE IF NOT EXISTS {{tabela}} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        periodo TEXT NOT NULL,
+
+        --TOTAIS DE CADA MODULO
+        cgr REAL DEFAULT 0,
+        ret REAL DEFAULT 0,
+        rp REAL DEFAULT 0,
+
+        --VALORES PARA FORMULA FINAL
+        rpv REAL GENERATED ALWAYS AS {_SQL_RPV} STORED,
+        cgf REAL DEFAULT 0,
+
+        --RESULTADO FINAL
+        scg REAL GENERATED ALWAYS AS {_SQL_SCG} STORED,
+
+        data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        observacoes TEXT
+    )
+"""
+
+# Exclusões registradas para a exportação incremental (BI):
+# tabela apagada -> (tabela exportada, coluna gravada como chave)
+# Sessão apagada = grupo de dados_mes removido (``sessao_id``)
+_EXCLUSOES = {
+    'consolidacao': ('consolidacao', 'id'),
+    'pmpv_mensal': ('pmpv_mensal', 'periodo'),
+    'resultados': ('resultados', 'id'),
+    'sessoes': ('dados_mes', 'id'),
+}
+
+_SQL_INSERIR_DADOS_MES = """
+    INSERT INTO dados_mes (sessao_id, mes, empresa, molecula, transporte, logistica, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class CacheConsolidacao:
+    """Cache read-through das linhas da tabela ``consolidacao``.
+
+    Há uma instância por arquivo de banco, compartilhada por todas as janelas
+    (SCG, RPV, CGF...) que abrem ``DatabasePMPV`` no mesmo caminho. A primeira
+    leitura carrega a tabela inteira numa única consulta; os métodos de escrita
+    de ``DatabasePMPV`` chamam ``invalidar()``. Alterações feitas por outro
+    processo são detectadas pela data de modificação do arquivo.
+    """
+
+    _instancias: Dict[str, "CacheConsolidacao"] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._linhas: Optional[List[Dict]] = None
+        self._por_periodo: Dict[str, Dict] = {}
+        self._assinatura = None
+
+    @classmethod
+    def para(cls, db_path: str) -> "CacheConsolidacao":
+        """Retorna o cache compartilhado do arquivo ``db_path``."""
+        if db_path == ":memory:" or db_path.startswith("file:"):
+            return cls(db_path)  # banco privado da conexão: nada a compartilhar
+        chave = os.path.normcase(os.path.abspath(db_path))
+        with cls._lock_instancias:
+            if chave not in cls._instancias:
+                cls._instancias[chave] = cls(db_path)
+            return cls._instancias[chave]
+
+    def _assinatura_arquivo(self):
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def invalidar(self):
+        with self._lock:
+            self._linhas = None
+            self._por_periodo = {}
+            self._assinatura = None
+
+    def _carregar(self, cursor) -> List[Dict]:
+        assinatura = self._assinatura_arquivo()
+        if self._linhas is None or assinatura != self._assinatura:
+            cursor.execute("SELECT * FROM consolidacao ORDER BY data_criacao DESC")
+            self._linhas = [dict(row) for row in cursor.fetchall()]
+            # Períodos repetidos: vale o mais antigo, como no SELECT ... fetchone()
+            self._por_periodo = {}
+            for linha in sorted(self._linhas, key=lambda l: l['id']):
+                self._por_periodo.setdefault(linha['periodo'], linha)
+            self._assinatura = assinatura
+        return self._linhas
+
+    def linhas(self, cursor) -> List[Dict]:
+        """Todas as linhas de consolidação, do período mais recente ao mais antigo."""
+        with self._lock:
+            return [dict(l) for l in self._carregar(cursor)]
+
+    def buscar(self, cursor, periodo: str) -> Optional[Dict]:
+        with self._lock:
+            self._carregar(cursor)
+            linha = self._por_periodo.get(periodo)
+            return dict(linha) if linha else None
 
 
 class DatabasePMPV:
-    def __init__(self, db_path: str = "pmpv_data.db"):
+    def __init__(self, db_path: str = BANCO_CENTRAL):
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.cache = CacheConsolidacao.para(db_path)
         self._conectar()
         self._criar_tabelas()
     
@@ -42,6 +163,10 @@ class DatabasePMPV:
             )
         """)
         
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_dados_mes_sessao ON dados_mes (sessao_id, mes)"
+        )
+        
         # Tabela de RESULTADOS (Outputs) - ATUALIZADA
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS resultados (
@@ -66,35 +191,109 @@ class DatabasePMPV:
             )
         """)
 
+        self.cursor.execute(_SQL_CONSOLIDACAO.format(tabela="consolidacao"))
+        self._migrar_consolidacao()
+
+        # Dimensão de PERÍODOS — chaves normalizadas do texto livre do período
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS periodos (
+                periodo        TEXT PRIMARY KEY,
+                ano            INTEGER,
+                mes            INTEGER,    -- NULL em períodos trimestrais
+                trimestre      INTEGER,
+                granularidade  TEXT,       -- 'M' mensal, 'T' trimestral, NULL = não reconhecido
+                chave          INTEGER     -- ano*12 + mês-1 (contínua, permite range scan)
+            )
+        """)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_periodos_chave ON periodos (granularidade, chave)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_periodos_trimestre ON periodos (ano, trimestre)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_consolidacao_periodo ON consolidacao (periodo)"
+        )
+
+        # EXCLUSÕES (tombstones) — linhas apagadas, para a exportação de BI.
+        # Criados depois da migração: DROP TABLE levaria os gatilhos junto.
         self.cursor.execute("""
-                            
-                            CREATE TABLE IF NOT EXISTS  consolidacao(
-                                id INTEGER PRIMARY KEY  AUTOINCREMENT,
-                                periodo TEXT NOT NULL,
-                                
-                                
-                                --TOATIS DE  CADA MODULO
-                                
-                                cgr REAL DEFAULT 0,
-                                ret REAL DEFAULT 0,
-                                rp REAL DEFAULT 0,
-                                
-                                
-                                --VALORES PARA FORMULA FINAL
-                                rpv REAL DEFAULT 0,
-                                cgf REAL DEFAULT 0,
-                                
-                                --RESULTADO FINAL
-                                scg REAL DEFAULT 0,
-                                
-                                
-                                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                observacoes TEXT
-                            )
-                        """)
+            CREATE TABLE IF NOT EXISTS exclusoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabela TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                data_exclusao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_exclusoes_data ON exclusoes (data_exclusao, id)"
+        )
+        for origem, (tabela, coluna) in _EXCLUSOES.items():
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_exclusao_{origem} AFTER DELETE ON {origem}
+                BEGIN
+                    INSERT INTO exclusoes (tabela, chave) VALUES ('{tabela}', OLD.{coluna});
+                END
+            """)
+        self._sincronizar_periodos()
         self.conn.commit()
     
+    def _migrar_consolidacao(self):
+        """Converte bancos antigos, em que RPV e SCG eram colunas REAL comuns.
+
+        SQLite não transforma uma coluna existente em gerada, então a tabela é
+        recriada preservando ids, entradas (CGR, CGF, RET, RP) e datas. Os
+        valores antigos de RPV/SCG são descartados e recalculados pela fórmula.
+        """
+        self.cursor.execute("PRAGMA table_xinfo(consolidacao)")
+        colunas = {row['name']: row['hidden'] for row in self.cursor.fetchall()}
+        if colunas.get('rpv', 0) != 0:
+            return  # já usa colunas geradas (hidden = 2 ou 3)
+
+        copiar = "id, periodo, cgr, ret, rp, cgf, data_criacao, data_atualizacao, observacoes"
+        self.conn.commit()
+        try:
+            self.cursor.execute("BEGIN")
+            self.cursor.execute(_SQL_CONSOLIDACAO.format(tabela="consolidacao_nova"))
+            self.cursor.execute(
+                f"INSERT INTO consolidacao_nova ({copiar}) SELECT {copiar} FROM consolidacao"
+            )
+            self.cursor.execute("DROP TABLE consolidacao")
+            self.cursor.execute("ALTER TABLE consolidacao_nova RENAME TO consolidacao")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.cache.invalidar()
+
+    # ==========================================
+    # DIMENSÃO DE PERÍODOS
+    # ==========================================
+
+    def _registrar_periodos(self, periodos):
+        linhas = []
+        for periodo in periodos:
+            norm = normalizar_periodo(periodo)
+            if norm:
+                linhas.append((periodo, norm.ano, norm.mes, norm.trimestre,
+                               norm.granularidade, norm.chave))
+            else:
+                linhas.append((periodo, None, None, None, None, None))
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO periodos VALUES (?, ?, ?, ?, ?, ?)", linhas
+        )
+
+    def _sincronizar_periodos(self):
+        """Registra na dimensão os períodos que ainda não foram normalizados."""
+        self.cursor.execute("""
+            SELECT periodo FROM consolidacao
+            UNION SELECT periodo FROM pmpv_mensal
+            EXCEPT SELECT periodo FROM periodos
+        """)
+        novos = [row['periodo'] for row in self.cursor.fetchall()]
+        if novos:
+            self._registrar_periodos(novos)
+
     def criar_sessao(self, nome: str, observacoes: str = "") -> int:
         self.cursor.execute("INSERT INTO sessoes (nome, observacoes) VALUES (?, ?)", (nome, observacoes))
         self.conn.commit()
@@ -104,15 +303,12 @@ class DatabasePMPV:
         try:
             self.cursor.execute("DELETE FROM dados_mes WHERE sessao_id = ? AND mes = ?", (sessao_id, mes))
             
-            for linha in dados:
-                self.cursor.execute("""
-                    INSERT INTO dados_mes (sessao_id, mes, empresa, molecula, transporte, logistica, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    sessao_id, mes, linha.get('empresa'), 
-                    linha.get('molecula', 0), linha.get('transporte', 0), 
-                    linha.get('logistica', 0), linha.get('volume', 0)
-                ))
+            self.cursor.executemany(_SQL_INSERIR_DADOS_MES, [
+                (sessao_id, mes, linha.get('empresa'),
+                 linha.get('molecula', 0), linha.get('transporte', 0),
+                 linha.get('logistica', 0), linha.get('volume', 0))
+                for linha in dados
+            ])
             
             self.cursor.execute("UPDATE sessoes SET data_modificacao = CURRENT_TIMESTAMP WHERE id = ?", (sessao_id,))
             self.conn.commit()
@@ -121,6 +317,18 @@ class DatabasePMPV:
             print(f"Erro DB: {e}")
             return False
 
+    def importar_sessao(self, nome: str, linhas: List[Dict], observacoes: str = "") -> int:
+        """Cria a sessão com todas as linhas (cada uma com ``mes``) numa única transação."""
+        with self.conn:
+            self.cursor.execute("INSERT INTO sessoes (nome, observacoes) VALUES (?, ?)", (nome, observacoes))
+            sessao_id = self.cursor.lastrowid
+            self.cursor.executemany(_SQL_INSERIR_DADOS_MES, [
+                (sessao_id, linha['mes'], linha['empresa'], linha.get('molecula', 0),
+                 linha.get('transporte', 0), linha.get('logistica', 0), linha.get('volume', 0))
+                for linha in linhas
+            ])
+        return sessao_id
+
     def salvar_resultado(self, sessao_id: int, vol_tot: float, custo_tot: float, 
                         pmpv: float, cg: float, final: float) -> bool:
         try:
@@ -137,7 +345,86 @@ class DatabasePMPV:
     def carregar_dados_mes(self, sessao_id: int, mes: int) -> List[Dict]:
         self.cursor.execute("SELECT * FROM dados_mes WHERE sessao_id = ? AND mes = ?", (sessao_id, mes))
         return [dict(row) for row in self.cursor.fetchall()]
-    
+
+    def listar_sessoes(self) -> List[Dict]:
+        """Sessões salvas, da mais recente para a mais antiga."""
+        self.cursor.execute(
+            "SELECT id, nome, data_criacao, data_modificacao FROM sessoes ORDER BY id DESC"
+        )
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def carregar_sessao(self, sessao_id: int) -> Optional[SessaoPMPV]:
+        """Sessão inteira (todos os meses + último resultado) numa única consulta."""
+        self.cursor.execute("""
+            SELECT s.id, s.nome, d.mes, d.empresa, d.molecula, d.transporte, d.logistica, d.volume,
+                   r.id AS resultado_id, r.volume_total, r.custo_total, r.pmpv_trimestral,
+                   r.conta_grafica, r.preco_final
+            FROM sessoes s
+            LEFT JOIN dados_mes d ON d.sessao_id = s.id
+            LEFT JOIN resultados r ON r.id = (SELECT MAX(id) FROM resultados WHERE sessao_id = s.id)
+            WHERE s.id = ?
+            ORDER BY d.mes, d.id
+        """, (sessao_id,))
+        linhas = self.cursor.fetchall()
+        if not linhas:
+            return None
+        primeira = linhas[0]
+        resultado = None
+        if primeira['resultado_id'] is not None:
+            resultado = {
+                'volume_total': primeira['volume_total'], 'custo_total': primeira['custo_total'],
+                'pmpv': primeira['pmpv_trimestral'], 'conta_grafica': primeira['conta_grafica'],
+                'preco_final': primeira['preco_final'],
+            }
+        return SessaoPMPV.de_linhas(primeira['id'], primeira['nome'],
+                                    [l for l in linhas if l['mes'] is not None], resultado)
+
+    def carregar_sessoes(self, sessao_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Sessões com os dados dos meses e o último resultado, em três consultas.
+
+        Formato pronto para ``ExcelHandlerPMPV.exportar_lote``: ``dados_por_mes``
+        tem as chaves "Mês 1".."Mês N" e ``resultado`` usa as chaves do cálculo
+        (``pmpv`` em vez de ``pmpv_trimestral``), ou é ``None`` se não há resultado.
+        """
+        params = [] if sessao_ids is None else list(sessao_ids)
+        if sessao_ids is not None and not params:
+            return []
+
+        def filtro(coluna: str) -> str:
+            if sessao_ids is None:
+                return ""
+            return f"WHERE {coluna} IN ({', '.join('?' * len(params))})"
+
+        self.cursor.execute(f"SELECT id, nome FROM sessoes {filtro('id')} ORDER BY id", params)
+        sessoes = {row['id']: {'id': row['id'], 'nome': row['nome'], 'dados_por_mes': {},
+                               'resultado': None}
+                   for row in self.cursor.fetchall()}
+
+        self.cursor.execute(
+            f"SELECT * FROM dados_mes {filtro('sessao_id')} ORDER BY sessao_id, mes, id", params
+        )
+        for row in self.cursor.fetchall():
+            sessao = sessoes.get(row['sessao_id'])
+            if sessao is not None:
+                sessao['dados_por_mes'].setdefault(f"Mês {row['mes']}", []).append(dict(row))
+
+        self.cursor.execute(f"""
+            SELECT sessao_id, volume_total, custo_total, pmpv_trimestral, conta_grafica, preco_final
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY sessao_id ORDER BY id DESC) AS n
+                FROM resultados {filtro('sessao_id')}
+            ) WHERE n = 1
+        """, params)
+        for row in self.cursor.fetchall():
+            sessao = sessoes.get(row['sessao_id'])
+            if sessao is not None:
+                sessao['resultado'] = {
+                    'volume_total': row['volume_total'], 'custo_total': row['custo_total'],
+                    'pmpv': row['pmpv_trimestral'], 'conta_grafica': row['conta_grafica'],
+                    'preco_final': row['preco_final'],
+                }
+        return list(sessoes.values())
+
     # ==========================================
     # FUNÇÕES DE CONSOLIDAÇÃO
     # ==========================================
@@ -154,8 +441,11 @@ class DatabasePMPV:
             "INSERT INTO consolidacao (periodo, observacoes) VALUES (?, ?)", 
             (periodo, obs)
         )
+        id_periodo = self.cursor.lastrowid
+        self._registrar_periodos([periodo])
         self.conn.commit()
-        return self.cursor.lastrowid
+        self.cache.invalidar()
+        return id_periodo
     
     def atualizar_cgr(self, periodo: str, valor: float):
         self._garantir_periodo(periodo)
@@ -166,6 +456,7 @@ class DatabasePMPV:
             WHERE periodo = ?
         """, (valor, periodo))
         self.conn.commit()
+        self.cache.invalidar()
     
     def atualizar_ret(self, periodo: str, valor: float):
         self._garantir_periodo(periodo)
@@ -176,6 +467,7 @@ class DatabasePMPV:
             WHERE periodo = ?
         """, (valor, periodo))
         self.conn.commit()
+        self.cache.invalidar()
     
     def atualizar_rp(self, periodo: str, valor: float):
         self._garantir_periodo(periodo)
@@ -186,6 +478,7 @@ class DatabasePMPV:
             WHERE periodo = ?
         """, (valor, periodo))
         self.conn.commit()
+        self.cache.invalidar()
             
     def atualizar_cgf(self, periodo: str, valor: float):
         """Atualiza somente o CGF (Volume Faturado)."""
@@ -196,69 +489,86 @@ class DatabasePMPV:
             WHERE periodo = ?
         """, (valor, periodo))
         self.conn.commit()
+        self.cache.invalidar()
 
     def calcular_e_salvar_rpv(self, periodo: str) -> float:
-        """Calcula RPV = CGR − CGF, salva no banco e retorna o valor."""
+        """Retorna RPV = CGR − CGF do período.
+
+        RPV é coluna gerada: já está correto após qualquer ``atualizar_*``.
+        O método só garante que o período exista (compatibilidade).
+        """
         self._garantir_periodo(periodo)
-        self.cursor.execute("SELECT cgr, cgf FROM consolidacao WHERE periodo = ?", (periodo,))
-        row = self.cursor.fetchone()
-        if not row:
-            return 0.0
-        dados = dict(row)
-        rpv = (dados.get('cgr') or 0.0) - (dados.get('cgf') or 0.0)
-        self.cursor.execute("""
-            UPDATE consolidacao
-            SET rpv = ?, data_atualizacao = CURRENT_TIMESTAMP
-            WHERE periodo = ?
-        """, (rpv, periodo))
-        self.conn.commit()
-        return rpv
+        dados = self.buscar_consolidacao(periodo)
+        return (dados.get('rpv') or 0.0) if dados else 0.0
 
-    def atualizar_rpv_cgf(self, periodo: str, rpv: float, cgf: float):
-        """Atualiza RPV e CGF (valores manuais)"""
-        self.cursor.execute("""
-            UPDATE consolidacao
-            SET rpv = ?, cgf = ?, data_atualizacao = CURRENT_TIMESTAMP
-            WHERE periodo = ?
-        """, (rpv, cgf, periodo))
-        self.conn.commit()
-        
     def calcular_scg(self, periodo: str) -> float:
-        """Calcula o SCG e salva"""
-        self.cursor.execute("SELECT * FROM consolidacao WHERE periodo = ?", (periodo,))
-        row = self.cursor.fetchone()
-        
-        if not row:
-            return 0.0
-        
-        dados = dict(row)
-        cgr = dados.get('cgr', 0)
-        cgf = dados.get('cgf', 0)
-        rpv = dados.get('rpv', 0)
-        ret = dados.get('ret', 0)
-        rp = dados.get('rp', 0)
-        
-        # Fórmula: SCG = RPV(CGR + CGF) + RET + RP
-        scg = rpv * (cgr + cgf) + ret + rp
-        
-        self.cursor.execute("""
-            UPDATE consolidacao
-            SET scg = ?, data_atualizacao = CURRENT_TIMESTAMP
-            WHERE periodo = ?
-        """, (scg, periodo))
+        """Retorna o SCG = RPV(CGR + CGF) + RET + RP (coluna gerada)."""
+        dados = self.buscar_consolidacao(periodo)
+        return (dados.get('scg') or 0.0) if dados else 0.0
+
+    # ==========================================
+    # CORREÇÃO EM LOTE
+    # ==========================================
+
+    def corrigir_consolidacao_lote(self, correcoes: Dict[str, Dict[str, float]]) -> List[Dict]:
+        """Grava CGR/CGF/RET/RP de vários períodos num único ``UPDATE``.
+
+        ``correcoes`` é ``{periodo: {campo: valor}}``; campos ausentes ficam
+        como estão e períodos inexistentes são criados. RPV e SCG são colunas
+        geradas e saem recalculados da própria gravação. Retorna as linhas que
+        de fato mudaram (periodo, cgr, cgf, rpv, ret, rp, scg).
+        """
+        campos = ('cgr', 'cgf', 'ret', 'rp')
+        invalidos = {c for valores in correcoes.values() for c in valores} - set(campos)
+        if invalidos:
+            raise ValueError(f"Campo inválido: {', '.join(sorted(invalidos))}")
+        if not correcoes:
+            return []
+
+        for periodo in correcoes:
+            self._garantir_periodo(periodo)
+        linhas = [(periodo,) + tuple(valores.get(c) for c in campos)
+                  for periodo, valores in correcoes.items()]
+        # column1 = periodo, column2.. = campos, na ordem de ``campos``
+        novos = {c: f"COALESCE(v.column{i}, consolidacao.{c})" for i, c in enumerate(campos, 2)}
+        try:
+            self.cursor.execute(f"""
+                UPDATE consolidacao
+                SET {', '.join(f"{c} = {novos[c]}" for c in campos)},
+                    data_atualizacao = CURRENT_TIMESTAMP
+                FROM (VALUES {', '.join(['(' + ', '.join('?' * (len(campos) + 1)) + ')'] * len(linhas))}) AS v
+                WHERE consolidacao.periodo = v.column1
+                  AND ({' OR '.join(f"consolidacao.{c} IS NOT {novos[c]}" for c in campos)})
+                RETURNING periodo, cgr, cgf, rpv, ret, rp, scg
+            """, [valor for linha in linhas for valor in linha])
+            alteradas = [dict(row) for row in self.cursor.fetchall()]
+            self.conn.commit()
+        finally:
+            self.cache.invalidar()
+        # RETURNING não garante ordem: devolve na ordem de ``correcoes``
+        ordem = {periodo: i for i, periodo in enumerate(correcoes)}
+        return sorted(alteradas, key=lambda l: ordem[l['periodo']])
+
+    def excluir_periodo_consolidacao(self, periodo: str):
+        """Remove o período da consolidação."""
+        self.cursor.execute("DELETE FROM consolidacao WHERE periodo = ?", (periodo,))
         self.conn.commit()
-        return scg
-    
+        self.cache.invalidar()
+
     def buscar_consolidacao(self, periodo: str) -> dict:
-        """Busca dados de consolidação de um período"""
-        self.cursor.execute("SELECT * FROM consolidacao WHERE periodo = ?", (periodo,))
-        row = self.cursor.fetchone()
-        return dict(row) if row else None
+        """Busca dados de consolidação de um período (servido pelo cache)"""
+        return self.cache.buscar(self.cursor, periodo)
     
     def listar_periodos(self) -> List:
         """Lista todos os períodos de consolidação"""
-        self.cursor.execute("SELECT periodo, scg, data_atualizacao FROM consolidacao ORDER BY data_criacao DESC")
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [
+            {'periodo': l['periodo'], 'scg': l['scg'], 'data_atualizacao': l['data_atualizacao']}
+            for l in self.cache.linhas(self.cursor)
+        ]
+
+    def historico_consolidacao(self) -> List[Dict]:
+        """Linhas completas de todos os períodos, numa única consulta (com cache)."""
+        return self.cache.linhas(self.cursor)
         
         
         
@@ -272,6 +582,7 @@ class DatabasePMPV:
             INSERT OR REPLACE INTO pmpv_mensal (periodo, pmpv, data_atualizacao)
             VALUES (?, ?, CURRENT_TIMESTAMP)
         """, (periodo, pmpv))
+        self._registrar_periodos([periodo])
         self.conn.commit()
 
     def buscar_pmpv_mensal(self, periodo: str):
@@ -1,127 +1,196 @@
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, NamedStyle, Side
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 import os
+import re
+
+from saida_arquivos import gravar_arquivo
+
+
+class PlanilhaFluxo:
+    """Aba de um workbook ``write_only``: linhas gravadas em fluxo com estilos nomeados.
+
+    Os estilos são ``NamedStyle`` registrados no workbook (``novo_workbook``);
+    cada célula recebe só o nome, sem criar objetos de fonte/borda/formato.
+    """
+
+    def __init__(self, wb, titulo: str, larguras: Dict[str, float] = None, indice: int = None):
+        self.ws = wb.create_sheet(titulo, indice)
+        for coluna, largura in (larguras or {}).items():
+            self.ws.column_dimensions[coluna].width = largura
+
+    def linha(self, valores: Sequence, estilos: Sequence[Optional[str]] = ()):
+        celulas = []
+        for valor, estilo in zip(valores, list(estilos) + [None] * (len(valores) - len(estilos))):
+            celula = WriteOnlyCell(self.ws, value=valor)
+            if estilo:
+                celula.style = estilo
+            celulas.append(celula)
+        self.ws.append(celulas)
+
+    def mesclar(self, intervalo: str):
+        self.ws.merged_cells.add(intervalo)
+
+
+def _estilos_pmpv() -> List[NamedStyle]:
+    lado = Side(style='thin')
+    borda = Border(left=lado, right=lado, top=lado, bottom=lado)
+
+    cabecalho = NamedStyle(name='pmpv_cabecalho')
+    cabecalho.fill = PatternFill("solid", fgColor="2C3E50")
+    cabecalho.font = Font(bold=True, color="FFFFFF")
+    cabecalho.alignment = Alignment(horizontal="center")
+
+    estilos = [cabecalho,
+               NamedStyle(name='pmpv_texto', border=borda),
+               NamedStyle(name='pmpv_preco', border=borda, number_format='#,##0.0000'),
+               NamedStyle(name='pmpv_volume', border=borda, number_format='#,##0'),
+               NamedStyle(name='pmpv_titulo', font=Font(size=16, bold=True))]
+
+    # Resumo: (rótulo, valor) por formato, normal e em destaque
+    destaque = PatternFill("solid", fgColor="F1C40F")
+    for nome, formato in [('volume', '#,##0'), ('moeda', 'R$ #,##0.00'), ('preco', 'R$ 0.0000')]:
+        estilos.append(NamedStyle(name=f'pmpv_res_{nome}', number_format=formato))
+        estilos.append(NamedStyle(name=f'pmpv_res_{nome}_negrito', number_format=formato,
+                                  font=Font(bold=True, size=12, color="000000")))
+        estilos.append(NamedStyle(name=f'pmpv_res_{nome}_destaque', number_format=formato,
+                                  font=Font(bold=True, size=12, color="000000"), fill=destaque))
+    estilos.append(NamedStyle(name='pmpv_res_rotulo_negrito', font=Font(bold=True, size=12)))
+    estilos.append(NamedStyle(name='pmpv_res_rotulo_destaque', font=Font(bold=True, size=12),
+                              fill=destaque))
+    return estilos
+
+
+def _nome_arquivo_seguro(texto: str) -> str:
+    return re.sub(r'[^\w\-]+', '_', texto).strip('_') or 'sessao'
+
 
 class ExcelHandlerPMPV:
+    @staticmethod
+    def novo_workbook():
+        """Workbook ``write_only`` com os estilos PMPV registrados uma única vez."""
+        wb = openpyxl.Workbook(write_only=True)
+        for estilo in _estilos_pmpv():
+            wb.add_named_style(estilo)
+        return wb
+
     @staticmethod
     def exportar_trimestre(dados_por_mes: Dict, resultado: Dict, nome_arquivo: str = None) -> str:
         if nome_arquivo is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             nome_arquivo = f"Relatorio_PMPV_{timestamp}.xlsx"
-        
-        # Evita sobrescrever arquivo já aberto - adiciona número incremental
-        nome_base = nome_arquivo.replace('.xlsx', '')
-        contador = 1
-        nome_final = nome_arquivo
-        
-        while True:
-            try:
-                # Tenta criar/abrir o arquivo para verificar se está disponível
-                with open(nome_final, 'w') as f:
-                    pass
-                os.remove(nome_final)
-                break
-            except (PermissionError, IOError):
-                # Arquivo em uso, tenta próximo número
-                nome_final = f"{nome_base}_{contador}.xlsx"
-                contador += 1
-                if contador > 100:  # Segurança para evitar loop infinito
-                    nome_final = f"{nome_base}_{datetime.now().strftime('%H%M%S%f')}.xlsx"
-                    break
-        
-        wb = openpyxl.Workbook()
-        if 'Sheet' in wb.sheetnames: wb.remove(wb['Sheet'])
-        
-        # Criar abas mensais
+
+        wb = ExcelHandlerPMPV.novo_workbook()
+
+        # Resumo primeiro (primeira aba), depois as abas mensais
+        ExcelHandlerPMPV._criar_aba_resumo(wb, dados_por_mes, resultado)
         for nome_aba, dados in dados_por_mes.items():
             ExcelHandlerPMPV._criar_aba_mes(wb, nome_aba, dados)
-        
-        # Criar aba de resumo
-        ExcelHandlerPMPV._criar_aba_resumo(wb, dados_por_mes, resultado)
-        
-        wb.save(nome_final)
+
+        # Nunca sobrescreve: se o nome existir (ou estiver aberto), usa _1, _2...
+        nome_final = gravar_arquivo(nome_arquivo, wb.save)
         wb.close()  # Fecha o workbook antes de tentar abrir
-        
+
         # Tenta abrir o arquivo, mas não falha se houver erro
         try:
             os.startfile(nome_final)
         except Exception as e:
             print(f"Aviso: Não foi possível abrir o arquivo automaticamente: {e}")
-        
+
         return nome_final
 
+    @staticmethod
+    def exportar_lote(sessoes: List[Dict], destino: str, por_sessao: bool = False,
+                      max_processos: Optional[int] = None) -> List[str]:
+        """Exporta várias sessões salvas (``DatabasePMPV.carregar_sessoes``), sem interface.
+
+        Num único arquivo (``destino`` = caminho .xlsx), com uma aba-índice
+        "Sessões" e as abas de cada sessão prefixadas pelo id; ou, com
+        ``por_sessao``, um arquivo por sessão na pasta ``destino``, gerados em
+        paralelo num pool de processos. Retorna os caminhos gravados.
+        """
+        if por_sessao:
+            os.makedirs(destino, exist_ok=True)
+            if len(sessoes) <= 1:
+                return [_exportar_sessao(s, destino) for s in sessoes]
+            with ProcessPoolExecutor(max_workers=max_processos) as pool:
+                return list(pool.map(_exportar_sessao, sessoes, [destino] * len(sessoes)))
+
+        wb = ExcelHandlerPMPV.novo_workbook()
+        indice = PlanilhaFluxo(wb, "Sessões", {"A": 8, "B": 30, "C": 18, "D": 18, "E": 18})
+        indice.linha(["ID", "Sessão", "Volume Total", "PMPV", "Preço Final"], ["pmpv_cabecalho"] * 5)
+        for s in sessoes:
+            res = s['resultado'] or {}
+            indice.linha([s['id'], s['nome'], res.get('volume_total'), res.get('pmpv'),
+                          res.get('preco_final')],
+                         ["pmpv_texto", "pmpv_texto", "pmpv_volume", "pmpv_preco", "pmpv_preco"])
+        for s in sessoes:
+            prefixo = f"{s['id']} "
+            ExcelHandlerPMPV._criar_aba_resumo(wb, s['dados_por_mes'], s['resultado'] or {},
+                                               titulo=f"{prefixo}Resumo", indice=None)
+            for nome_aba, dados in s['dados_por_mes'].items():
+                ExcelHandlerPMPV._criar_aba_mes(wb, (prefixo + nome_aba)[:31], dados)
+        nome_final = gravar_arquivo(destino, wb.save)
+        wb.close()
+        return [nome_final]
+
     @staticmethod
     def _criar_aba_mes(wb, nome_aba, dados):
-        ws = wb.create_sheet(nome_aba)
-        
-        # Estilos
-        header_fill = PatternFill("solid", fgColor="2C3E50")
-        header_font = Font(bold=True, color="FFFFFF")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        
+        ws = PlanilhaFluxo(wb, nome_aba, {"A": 30, "G": 20})
+
         # Cabeçalhos
         headers = ["Empresa", "Molécula", "Transporte", "Logística", "Preço Unit.", "Volume (QDC)", "Custo Total"]
-        ws.append(headers)
-        
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center")
-        
+        ws.linha(headers, ["pmpv_cabecalho"] * len(headers))
+
         # Dados
+        estilos = ["pmpv_texto"] + ["pmpv_preco"] * 4 + ["pmpv_volume", "pmpv_preco"]
         for linha in dados:
             if not linha.get("empresa"): continue
-            
+
             mol = float(linha.get('molecula', 0))
             trans = float(linha.get('transporte', 0))
             log = float(linha.get('logistica', 0))
             vol = float(linha.get('volume', 0))
             preco = mol + trans + log
             total = preco * vol
-            
-            ws.append([linha['empresa'], mol, trans, log, preco, vol, total])
-            
-        # Formatação
-        for row in ws.iter_rows(min_row=2):
-            for cell in row: cell.border = border
-            for idx in [1, 2, 3, 4, 6]: row[idx].number_format = '#,##0.0000'
-            row[5].number_format = '#,##0'
-
-        ws.column_dimensions["A"].width = 30
-        ws.column_dimensions["G"].width = 20
+
+            ws.linha([linha['empresa'], mol, trans, log, preco, vol, total], estilos)
 
     @staticmethod
-    def _criar_aba_resumo(wb, dados_por_mes, resultado):
-        ws = wb.create_sheet("Resumo Executivo", 0)
-        
-        ws["A1"] = "FECHAMENTO TRIMESTRAL - PMPV"
-        ws["A1"].font = Font(size=16, bold=True)
-        ws.merge_cells("A1:D1")
-        
-        row = 3
-        def write_res(label, val, fmt, bold=False, color="000000", bg=None):
-            nonlocal row
-            ws[f"A{row}"] = label
-            ws[f"B{row}"] = val
-            ws[f"B{row}"].number_format = fmt
-            if bold: 
-                ws[f"A{row}"].font = Font(bold=True, size=12)
-                ws[f"B{row}"].font = Font(bold=True, size=12, color=color)
+    def _criar_aba_resumo(wb, dados_por_mes, resultado, titulo="Resumo Executivo", indice=0):
+        ws = PlanilhaFluxo(wb, titulo, {"A": 25, "B": 20}, indice)
+
+        ws.mesclar("A1:D1")
+        ws.linha(["FECHAMENTO TRIMESTRAL - PMPV"], ["pmpv_titulo"])
+        ws.linha([])
+
+        def write_res(label, val, formato, bold=False, bg=None):
             if bg:
-                fill = PatternFill("solid", fgColor=bg)
-                ws[f"A{row}"].fill = fill
-                ws[f"B{row}"].fill = fill
-            row += 1
-
-        write_res("Volume Total (Trimestre):", resultado['volume_total'], '#,##0')
-        write_res("Custo Total (Trimestre):", resultado['custo_total'], 'R$ #,##0.00')
-        row += 1
-        write_res("PMPV Calculado:", resultado['pmpv'], 'R$ 0.0000', bold=True)
-        write_res("(+) Conta Gráfica:", resultado.get('conta_grafica', 0), 'R$ 0.0000')
-        row += 1
-        write_res("(=) PREÇO FINAL (PV):", resultado.get('preco_final', 0), 'R$ 0.0000', bold=True, bg="F1C40F")
-
-        ws.column_dimensions["A"].width = 25
-        ws.column_dimensions["B"].width = 20
\ No newline at end of file
+                ws.linha([label, val], ["pmpv_res_rotulo_destaque", f"pmpv_res_{formato}_destaque"])
+            elif bold:
+                ws.linha([label, val], ["pmpv_res_rotulo_negrito", f"pmpv_res_{formato}_negrito"])
+            else:
+                ws.linha([label, val], [None, f"pmpv_res_{formato}"])
+
+        write_res("Volume Total (Trimestre):", resultado.get('volume_total', 0), 'volume')
+        write_res("Custo Total (Trimestre):", resultado.get('custo_total', 0), 'moeda')
+        ws.linha([])
+        write_res("PMPV Calculado:", resultado.get('pmpv', 0), 'preco', bold=True)
+        write_res("(+) Conta Gráfica:", resultado.get('conta_grafica', 0), 'preco')
+        ws.linha([])
+        write_res("(=) PREÇO FINAL (PV):", resultado.get('preco_final', 0), 'preco', bg=True)
+
+
+def _exportar_sessao(sessao: Dict, pasta: str) -> str:
+    """Roda no processo filho: um workbook por sessão."""
+    nome = f"PMPV_{sessao['id']}_{_nome_arquivo_seguro(sessao['nome'])}.xlsx"
+    wb = ExcelHandlerPMPV.novo_workbook()
+    ExcelHandlerPMPV._criar_aba_resumo(wb, sessao['dados_por_mes'], sessao['resultado'] or {})
+    for nome_aba, dados in sessao['dados_por_mes'].items():
+        ExcelHandlerPMPV._criar_aba_mes(wb, nome_aba, dados)
+    caminho = gravar_arquivo(os.path.join(pasta, nome), wb.save)
+    wb.close()
+    return caminho
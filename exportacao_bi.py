@@ -0,0 +1,249 @@
+"""
+Exportação incremental do histórico para ferramentas de BI (Parquet ou CSV).
+
+Exporta ``consolidacao``, ``pmpv_mensal``, ``dados_mes``, ``resultados`` e
+``exclusoes`` de ``pmpv_data.db`` para uma pasta, uma subpasta por tabela:
+
+    destino/
+        marcas.json                      # última marca exportada por tabela
+        consolidacao/parte_20260105_101500.parquet
+        pmpv_mensal/parte_...parquet
+        ...
+
+Cada execução grava só as linhas alteradas desde a marca anterior, numa nova
+"parte" (as partes juntas formam o dataset). A marca de cada tabela é a
+coluna de data de alteração: ``data_atualizacao`` (consolidacao,
+pmpv_mensal), ``data_calculo`` (resultados) e ``data_modificacao`` da sessão
+(dados_mes). Uma linha alterada reaparece numa parte nova; o consumidor fica
+com a versão mais recente de cada chave (``CHAVES``).
+
+``dados_mes`` não tem chave de linha estável: o app regrava os meses de uma
+sessão apagando e reinserindo as linhas (ids novos, linhas removidas somem).
+Ali a unidade de substituição é a sessão inteira (``SUBSTITUICAO``): a parte
+mais recente que traz um ``sessao_id`` substitui todas as linhas anteriores
+dessa sessão.
+
+A varredura pela marca só enxerga inserções e alterações. Exclusões chegam
+pela tabela ``exclusoes`` (tombstones gravados por gatilhos do banco): cada
+linha diz a ``tabela`` exportada e a ``chave`` apagada (o ``sessao_id`` no
+caso de ``dados_mes``). O consumidor descarta as versões daquela chave
+anteriores a ``data_exclusao``. Bancos que ainda não foram abertos por
+``DatabasePMPV`` nesta versão não têm a tabela e exportam zero exclusões.
+
+A leitura usa uma conexão somente-leitura e páginas curtas por keyset
+(``(marca, chave) > última``): nenhum lock de leitura fica aberto enquanto o
+arquivo é escrito, e o app continua gravando normalmente. Linhas do segundo
+corrente (``CURRENT_TIMESTAMP`` tem resolução de segundos) ficam para a
+próxima exportação, para não perder gravações do mesmo segundo.
+
+Parquet usa ``pyarrow`` (opcional); sem ele, use ``formato="csv"``.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from database import BANCO_CENTRAL
+from saida_arquivos import gravar_arquivo
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet indisponível; CSV continua funcionando
+    pa = pq = None
+
+FORMATOS = ('parquet', 'csv')
+ARQUIVO_MARCAS = "marcas.json"
+TAMANHO_PAGINA = 5000
+
+# tabela -> (colunas, origem, expressão da marca, expressão da chave de paginação)
+_CONSULTAS = {
+    'consolidacao': ("*", "consolidacao", "data_atualizacao", "id"),
+    'pmpv_mensal':  ("*", "pmpv_mensal", "data_atualizacao", "periodo"),
+    'dados_mes':    ("d.*, s.data_modificacao", "dados_mes d JOIN sessoes s ON s.id = d.sessao_id",
+                     "s.data_modificacao", "d.id"),
+    'resultados':   ("*", "resultados", "data_calculo", "id"),
+    'exclusoes':    ("*", "exclusoes", "data_exclusao", "id"),
+}
+TABELAS = tuple(_CONSULTAS)
+_ORIGENS = {'dados_mes': ('dados_mes', 'sessoes')}
+
+# Chave de cada linha para o consumidor deduplicar as partes
+CHAVES = {'consolidacao': ('id',), 'pmpv_mensal': ('periodo',), 'resultados': ('id',),
+          'exclusoes': ('id',)}
+# Tabelas reexportadas por grupo: a parte mais recente de um grupo substitui o grupo inteiro
+SUBSTITUICAO = {'dados_mes': ('sessao_id',)}
+
+
+def _conectar_leitura(db_path: str) -> sqlite3.Connection:
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=30)
+
+
+def ler_marcas(destino: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(destino, ARQUIVO_MARCAS), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _gravar_marcas(destino: str, marcas: Dict[str, str]):
+    """Substitui ``marcas.json`` atomicamente (temporário + ``os.replace``)."""
+    fd, temporario = tempfile.mkstemp(dir=destino, prefix=".~marcas", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(marcas, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, os.path.join(destino, ARQUIVO_MARCAS))
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _paginas(conn: sqlite3.Connection, tabela: str, marca: Optional[str], limite: str,
+             tamanho_pagina: int):
+    """Gera (colunas, linhas, marca da última linha) por página; cada página é uma consulta curta."""
+    colunas, origem, col_marca, col_chave = _CONSULTAS[tabela]
+    ultima = None
+    while True:
+        condicoes, params = [f"{col_marca} < ?"], [limite]
+        if ultima is not None:
+            condicoes.append(f"({col_marca}, {col_chave}) > (?, ?)")
+            params += ultima
+        elif marca is not None:
+            condicoes.append(f"{col_marca} > ?")
+            params.append(marca)
+        cursor = conn.execute(
+            f"SELECT {col_marca}, {col_chave}, {colunas} FROM {origem} "
+            f"WHERE {' AND '.join(condicoes)} ORDER BY {col_marca}, {col_chave} LIMIT ?",
+            params + [tamanho_pagina])
+        linhas = cursor.fetchall()
+        if not linhas:
+            return
+        ultima = list(linhas[-1][:2])
+        yield [d[0] for d in cursor.description[2:]], [l[2:] for l in linhas], ultima[0]
+        if len(linhas) < tamanho_pagina:
+            return
+
+
+def _escrever_csv(paginas):
+    def escrever(caminho):
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            saida = csv.writer(f)
+            for i, (colunas, linhas, _) in enumerate(paginas):
+                if i == 0:
+                    saida.writerow(colunas)
+                saida.writerows(linhas)
+    return escrever
+
+
+def _tipos_declarados(conn: sqlite3.Connection, tabela: str) -> Dict[str, str]:
+    tipos = {}
+    for origem in _ORIGENS.get(tabela, (tabela,)):
+        for coluna in conn.execute(f"PRAGMA table_xinfo({origem})"):
+            tipos.setdefault(coluna[1], (coluna[2] or "").upper())
+    return tipos
+
+
+def _esquema_parquet(colunas: Sequence[str], tipos: Dict[str, str]):
+    """Tipos fixos pela declaração da tabela (uma página só de NULL não muda o esquema)."""
+    def tipo(declarado):
+        if "INT" in declarado:
+            return pa.int64()
+        if "REAL" in declarado or "FLOA" in declarado or "DOUB" in declarado:
+            return pa.float64()
+        return pa.string()
+    return pa.schema([(c, tipo(tipos.get(c, ""))) for c in colunas])
+
+
+def _escrever_parquet(paginas, tipos: Dict[str, str]):
+    def escrever(caminho):
+        escritor = None
+        try:
+            for colunas, linhas, _ in paginas:
+                if escritor is None:
+                    esquema = _esquema_parquet(colunas, tipos)
+                    escritor = pq.ParquetWriter(caminho, esquema)
+                lote = pa.Table.from_pylist([dict(zip(colunas, l)) for l in linhas], schema=esquema)
+                escritor.write_table(lote)  # um row group por página
+        finally:
+            if escritor is not None:
+                escritor.close()
+    return escrever
+
+
+def exportar_bi(destino: str, db_path: str = BANCO_CENTRAL, formato: Optional[str] = None,
+                tabelas: Sequence[str] = TABELAS, tamanho_pagina: int = TAMANHO_PAGINA) -> Dict[str, Dict]:
+    """Exporta as linhas novas/alteradas de cada tabela e avança as marcas.
+
+    ``formato`` padrão: parquet se o pyarrow estiver instalado, senão csv.
+    Retorna ``{tabela: {'linhas': n, 'arquivo': caminho ou None, 'marca': ...}}``.
+    """
+    formato = formato or ('parquet' if pq is not None else 'csv')
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}")
+    if formato == 'parquet' and pq is None:
+        raise RuntimeError("Exportação Parquet requer o pacote pyarrow (pip install pyarrow)")
+    desconhecidas = set(tabelas) - set(TABELAS)
+    if desconhecidas:
+        raise ValueError(f"Tabela desconhecida: {', '.join(sorted(desconhecidas))}")
+
+    os.makedirs(destino, exist_ok=True)
+    marcas = ler_marcas(destino)
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resumo = {}
+    conn = _conectar_leitura(db_path)
+    try:
+        # Só segundos já encerrados: gravações do segundo atual vão na próxima
+        limite = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+        existentes = {l[0] for l in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for tabela in tabelas:
+            contagem = {'linhas': 0, 'marca': marcas.get(tabela)}
+            if not set(_ORIGENS.get(tabela, (tabela,))) <= existentes:
+                resumo[tabela] = dict(contagem, arquivo=None)  # banco anterior à tabela
+                continue
+
+            def paginas():
+                for colunas, linhas, marca in _paginas(conn, tabela, marcas.get(tabela), limite,
+                                                       tamanho_pagina):
+                    contagem['linhas'] += len(linhas)
+                    contagem['marca'] = marca
+                    yield colunas, linhas, marca
+
+            # Espia a primeira página para não criar arquivos vazios
+            gerador = paginas()
+            primeira = next(gerador, None)
+            arquivo = None
+            if primeira is not None:
+                def todas():
+                    yield primeira
+                    yield from gerador
+                escrever = (_escrever_parquet(todas(), _tipos_declarados(conn, tabela))
+                            if formato == 'parquet' else _escrever_csv(todas()))
+                pasta = os.path.join(destino, tabela)
+                os.makedirs(pasta, exist_ok=True)
+                arquivo = gravar_arquivo(os.path.join(pasta, f"parte_{carimbo}.{formato}"), escrever)
+                marcas[tabela] = contagem['marca']
+                _gravar_marcas(destino, marcas)
+            resumo[tabela] = dict(contagem, arquivo=arquivo)
+    finally:
+        conn.close()
+    return resumo
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exportação incremental do histórico para BI")
+    parser.add_argument("destino")
+    parser.add_argument("--banco", default=BANCO_CENTRAL)
+    parser.add_argument("--formato", choices=FORMATOS)
+    args = parser.parse_args()
+    for tabela, info in exportar_bi(args.destino, args.banco, args.formato).items():
+        print(f"{tabela:<14} {info['linhas']:>8} linha(s)  {info['arquivo'] or '-'}")
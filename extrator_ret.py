@@ -0,0 +1,146 @@
+"""
+Extração dos dados das notas RET (PDF → registro estruturado).
+
+Funções puras, sem interface: ``extrair_dados_ret`` pode ser enviada a um
+pool de processos (``ExecutorTarefas.mapear``). Erros de leitura não são
+logados no meio do parse; ficam no campo ``erro`` do registro.
+
+Nas notas de débito/crédito da Copergás o número da ND, o vencimento e o
+total estão na primeira página; os anexos só custam análise de layout do
+pdfplumber. O ``LayoutExtracao`` do template limita as páginas lidas,
+recorta regiões da página e para de ler assim que os campos obrigatórios
+aparecem. Classificação e escolha do template ficam em ``templates_ret``.
+"""
+
+import os
+from typing import Dict, Optional
+
+import pdfplumber
+
+from repositorio_ret import hash_arquivo
+from templates_ret import (CLASSIFICADOR, EMPRESAS_CONHECIDAS, LAYOUT_COMPLETO,
+                           LAYOUT_NOTA, REGISTRO, LayoutExtracao, TemplateRET)
+
+
+def identificar_tipo(caminho: str) -> str:
+    """Identifica tipo de encargo pela pasta"""
+    return CLASSIFICADOR.classificar(caminho)['tipo_encargo']
+
+
+def extrair_empresa(caminho: str) -> str:
+    """Extrai nome da empresa do nome do arquivo"""
+    return CLASSIFICADOR.classificar(caminho)['empresa']
+
+
+def extrair_tipo_nota(caminho: str) -> str:
+    """Identifica se é Nota Débito ou Crédito"""
+    return CLASSIFICADOR.classificar(caminho)['nota_tipo']
+
+
+def registro_vazio(caminho_pdf: str) -> Dict:
+    """Registro RET com a classificação pelo caminho e campos de valor zerados."""
+    return {
+        'arquivo': os.path.basename(caminho_pdf),
+        'caminho': caminho_pdf,
+        **CLASSIFICADOR.classificar(caminho_pdf),
+        'numero_nd': '',
+        'data_vencimento': '',
+        'valor_total': 0.0,
+        'quantidade': 0.0,
+        'valor_unitario': 0.0,
+        'valores_encontrados': [],
+        'hash_arquivo': '',
+        'erro': None,
+    }
+
+
+def extrair_campos(texto: str, dados: Dict, template: TemplateRET = REGISTRO.padrao) -> Dict:
+    """Preenche ND, vencimento, valores e quantidade a partir do texto da nota."""
+    nd_match = template.buscar('numero_nd', texto)
+    if nd_match:
+        dados['numero_nd'] = nd_match.group(1)
+
+    data_match = template.buscar('data_vencimento', texto)
+    if data_match:
+        dados['data_vencimento'] = data_match.group(1)
+
+    for padrao in template.valores:
+        for match in padrao.findall(texto):
+            try:
+                valor = float(match.replace('.', '').replace(',', '.'))
+            except ValueError:
+                continue
+            if valor > 0:
+                dados['valores_encontrados'].append(valor)
+
+    total_match = template.regex_total.search(texto) if template.regex_total is not None else None
+    if total_match:
+        dados['valor_total'] = float(total_match.group(1).replace('.', '').replace(',', '.'))
+    elif dados['valores_encontrados']:
+        dados['valor_total'] = max(dados['valores_encontrados'])
+
+    if dados['valor_total']:
+        qt_match = template.buscar('quantidade', texto)
+        if qt_match:
+            dados['quantidade'] = float(qt_match.group(1).replace(',', '.'))
+
+        if dados['quantidade'] > 0:
+            dados['valor_unitario'] = dados['valor_total'] / dados['quantidade']
+
+    return dados
+
+
+def _texto_pagina(pagina, regioes) -> str:
+    if not regioes:
+        return pagina.extract_text() or ''
+    x0, y0, x1, y1 = pagina.bbox
+    largura, altura = x1 - x0, y1 - y0
+    return '\n'.join(
+        pagina.crop((x0 + a * largura, y0 + b * altura, x0 + c * largura, y0 + d * altura))
+              .extract_text() or ''
+        for a, b, c, d in regioes
+    )
+
+
+def ler_texto(pdf, layout: LayoutExtracao, template: TemplateRET = REGISTRO.padrao) -> str:
+    """Texto das páginas do ``pdf`` segundo o ``layout`` (junção única no final)."""
+    paginas = pdf.pages if layout.max_paginas is None else pdf.pages[:layout.max_paginas]
+    faltando = set(layout.campos_obrigatorios)
+    partes = []
+    for pagina in paginas:
+        texto = _texto_pagina(pagina, layout.regioes)
+        partes.append(texto)
+        if layout.parar_quando_completo:
+            faltando = {campo for campo in faltando if not template.presente(campo, texto)}
+            if not faltando:
+                break
+    return '\n'.join(partes)
+
+
+def _ler_pdf(caminho_pdf: str, layout: LayoutExtracao, template: TemplateRET) -> str:
+    # Com limite de páginas, o pdfplumber nem carrega as demais
+    paginas = list(range(1, layout.max_paginas + 1)) if layout.max_paginas else None
+    with pdfplumber.open(caminho_pdf, pages=paginas) as pdf:
+        return ler_texto(pdf, layout, template)
+
+
+def extrair_dados_ret(caminho_pdf: str, layout: Optional[LayoutExtracao] = None) -> Dict:
+    """Extrai informações estruturadas do PDF (erros vão para ``dados['erro']``).
+
+    O template vem do ``REGISTRO`` pela empresa e tipo de encargo; ``layout``
+    substitui o layout do template. Se algum campo obrigatório não aparece nas
+    páginas/regiões do layout do template, o documento inteiro é relido
+    (``LAYOUT_COMPLETO``), como na extração original.
+    """
+    dados = registro_vazio(caminho_pdf)
+    template = REGISTRO.resolver(dados['empresa'], dados['tipo_encargo'])
+    try:
+        dados['hash_arquivo'] = hash_arquivo(caminho_pdf)
+        texto = _ler_pdf(caminho_pdf, layout or template.layout, template)
+        if layout is None and template.layout != LAYOUT_COMPLETO and not all(
+                template.presente(campo, texto) for campo in template.layout.campos_obrigatorios):
+            texto = _ler_pdf(caminho_pdf, LAYOUT_COMPLETO, template)
+        extrair_campos(texto, dados, template)
+    except Exception as e:
+        dados['erro'] = str(e) or e.__class__.__name__
+    return dados
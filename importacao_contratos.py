@@ -0,0 +1,151 @@
+"""
+Importação em lote de contratos para a calculadora PMPV.
+
+Lê uma planilha (xlsx/xls) ou CSV com uma linha por empresa e mês:
+
+    mes | empresa | molecula | transporte | logistica | volume
+
+Os nomes das colunas são comparados sem acento e sem caixa ("Molécula",
+"LOGÍSTICA"...). Sem a coluna ``mes``, todas as linhas vão para o mês
+informado em ``importar_contratos(..., mes=N)``. A validação é feita de uma
+vez sobre as colunas (pandas), sem laço por linha, e devolve as linhas
+válidas no formato da calculadora (``{"Mês N": [...]}``) e a lista de erros
+com o número da linha na planilha.
+
+Números em texto aceitam vírgula decimal com ou sem milhar ("1.234,5") e
+ponto decimal ("1.5"). "1.234" (ponto seguido de exatamente três dígitos, sem
+vírgula) tanto pode ser mil duzentos e trinta e quatro quanto um preço com
+três casas, e é rejeitado como ambíguo; células numéricas do Excel não
+passam por essa regra.
+"""
+
+import csv
+import importlib.util
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from motor_pmpv import CAMPOS
+
+COLUNAS = ('mes', 'empresa') + CAMPOS
+MESES_TRIMESTRE = (1, 2, 3)
+
+# python-calamine (opcional) lê xlsx bem mais rápido que o openpyxl
+_MOTOR_EXCEL = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+# "1.234": milhar ou três casas decimais? / "1.234.567": só pode ser milhar
+_AMBIGUO = r"[+-]?\d{1,3}\.\d{3}"
+_SO_MILHAR = r"[+-]?\d{1,3}(?:\.\d{3}){2,}"
+
+
+def _normalizar_coluna(nome) -> str:
+    texto = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return texto.strip().lower().replace(" ", "_")
+
+
+def _separador(caminho: str) -> str:
+    """Separador do CSV deduzido do cabeçalho (o leitor C mantém as linhas em branco)."""
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        cabecalho = f.readline()
+    try:
+        return csv.Sniffer().sniff(cabecalho, delimiters=";,\t|").delimiter
+    except csv.Error:  # uma coluna só
+        return ","
+
+
+def ler_contratos(caminho: str) -> pd.DataFrame:
+    """Lê o arquivo sem converter os textos (a conversão numérica fica para a validação).
+
+    A coluna ``linha`` guarda o número da linha no arquivo (cabeçalho = 1);
+    linhas em branco são mantidas na leitura para a contagem não se deslocar.
+    """
+    ext = Path(caminho).suffix.lower()
+    if ext in (".xlsx", ".xlsm", ".xls"):
+        # object: células numéricas continuam números (str() de 1.234 seria ambíguo)
+        df = pd.read_excel(caminho, dtype=object, engine=_MOTOR_EXCEL)
+    elif ext == ".csv":
+        df = pd.read_csv(caminho, sep=_separador(caminho), dtype=str, encoding="utf-8-sig",
+                         skip_blank_lines=False)
+    else:
+        raise ValueError(f"Formato não suportado: {ext}")
+    df.columns = [_normalizar_coluna(c) for c in df.columns]
+    df['linha'] = range(2, len(df) + 2)
+    return df
+
+
+def _numero(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Texto → float aceitando vírgula decimal e separador de milhar ("1.234,5").
+
+    Retorna ``(valores, ambiguos)``; valores ambíguos ("1.234") ficam NaN.
+    """
+    e_texto = serie.map(lambda v: isinstance(v, str))
+    texto = serie.where(e_texto, "").astype(str).str.strip()
+    ambiguo = texto.str.fullmatch(_AMBIGUO)
+    milhar = texto.str.contains(",", regex=False) | texto.str.fullmatch(_SO_MILHAR)
+    texto = texto.where(~milhar, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    valores = pd.to_numeric(texto.mask(ambiguo).replace("", "0"), errors="coerce")
+    # Células numéricas (Excel) já vêm convertidas
+    numericas = ~e_texto & serie.notna()
+    valores = valores.where(~numericas, pd.to_numeric(serie.where(numericas), errors="coerce"))
+    return valores, ambiguo
+
+
+def validar_contratos(df: pd.DataFrame, mes: Optional[int] = None) -> Tuple[pd.DataFrame, List[Dict]]:
+    """Valida todas as linhas de uma vez; retorna (válidas, erros).
+
+    Campos numéricos vazios valem 0, como na calculadora. Texto não numérico,
+    valores negativos, empresa vazia e mês fora de 1..3 são erros.
+    """
+    faltando = [c for c in CAMPOS + ('empresa',) if c not in df.columns]
+    if 'mes' not in df.columns and mes is None:
+        faltando.append('mes')
+    if faltando:
+        raise ValueError(f"Colunas ausentes: {', '.join(faltando)}")
+
+    # Sem a coluna ``linha`` (DataFrame montado à mão), a posição vale como linha
+    linhas = df['linha'] if 'linha' in df.columns else pd.Series(range(2, len(df) + 2), index=df.index)
+    df = df.dropna(how="all", subset=[c for c in df.columns if c != 'linha'])
+    saida = pd.DataFrame(index=df.index)
+    saida['empresa'] = df['empresa'].fillna("").astype(str).str.strip()
+    saida['mes'] = _numero(df['mes'])[0] if 'mes' in df.columns else float(mes)
+    problemas = {
+        "empresa vazia": saida['empresa'] == "",
+        "mês inválido (use 1, 2 ou 3)": ~saida['mes'].isin(MESES_TRIMESTRE),
+    }
+    for campo in CAMPOS:
+        saida[campo], ambiguo = _numero(df[campo])
+        problemas[f"{campo} ambíguo (use vírgula decimal: 1,234 ou 1.234,00)"] = ambiguo
+        problemas[f"{campo} não numérico"] = saida[campo].isna() & ~ambiguo
+        problemas[f"{campo} negativo"] = saida[campo] < 0
+
+    erros = []
+    invalida = pd.Series(False, index=saida.index)
+    for descricao, mascara in problemas.items():
+        invalida |= mascara
+        erros.extend({'linha': int(linhas[i]), 'erro': descricao} for i in saida.index[mascara])
+    erros.sort(key=lambda e: e['linha'])
+
+    validas = saida[~invalida].copy()
+    validas['mes'] = validas['mes'].astype(int)
+    return validas[list(COLUNAS)], erros
+
+
+def por_mes(validas: pd.DataFrame) -> Dict[str, List[Dict]]:
+    """Linhas válidas no formato da calculadora: ``{"Mês N": [{...}]}``, na ordem do arquivo."""
+    return {f"Mês {m}": grupo.drop(columns='mes').to_dict('records')
+            for m, grupo in validas.groupby('mes', sort=True)}
+
+
+def importar_contratos(caminho: str, mes: Optional[int] = None) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+    """Lê e valida o arquivo; retorna ``(dados_por_mes, erros)``."""
+    validas, erros = validar_contratos(ler_contratos(caminho), mes)
+    return por_mes(validas), erros
+
+
+def salvar_contratos(db, nome: str, dados_por_mes: Dict[str, List[Dict]]) -> int:
+    """Grava as linhas importadas como uma nova sessão em ``dados_mes``."""
+    linhas = [dict(linha, mes=int(chave.split()[-1]))
+              for chave, registros in dados_por_mes.items() for linha in registros]
+    return db.importar_sessao(nome, linhas, observacoes="Importação de contratos")
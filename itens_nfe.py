@@ -0,0 +1,193 @@
+"""
+Itens das NF-e (linhas ``det``) em tabela colunar, por empresa e mês.
+
+``parse_nfe(..., itens=True)`` extrai os itens no mesmo laço que soma o
+volume; com ``MotorAuditoria(itens=ItensNFe(...))`` eles são gravados na
+tabela ``nfe_itens`` de ``pmpv_data.db``:
+
+    empresa | mes (AAAA-MM) | chave | n_item | cfop | cliente_cnpj | codigo |
+    quantidade | valor_unitario | valor_total | volume_m3 | ...
+
+A chave primária ``(empresa, mes, chave, n_item)`` numa tabela ``WITHOUT
+ROWID`` agrupa fisicamente as linhas de cada empresa/mês, e reprocessar a
+mesma nota substitui os itens em vez de duplicá-los. Análises por item
+(preço por m³ por cliente, por CFOP...) viram uma consulta agregada
+(``preco_m3``), sem reabrir nenhum XML.
+
+``exportar_parquet`` grava o mesmo conteúdo como dataset Parquet particionado
+no estilo Hive (``empresa=X/mes=AAAA-MM/itens.parquet``), para ferramentas de
+BI; requer o pacote opcional ``pyarrow``.
+"""
+
+import os
+import sqlite3
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+from database import BANCO_CENTRAL
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # exportação Parquet indisponível; o SQLite continua funcionando
+    pa = pq = None
+
+# Campos de cada item (além de empresa/mes/chave), na ordem da tabela
+CAMPOS_ITEM = ('n_item', 'data_emissao', 'cliente_cnpj', 'cliente_nome', 'codigo', 'descricao',
+               'ncm', 'cfop', 'unidade', 'quantidade', 'valor_unitario', 'valor_total', 'volume_m3')
+COLUNAS = ('empresa', 'mes', 'chave') + CAMPOS_ITEM
+# Colunas aceitas em ``preco_m3(por=...)`` e como filtro
+DIMENSOES = ('empresa', 'mes', 'cliente_cnpj', 'cliente_nome', 'cfop', 'codigo', 'ncm')
+
+_TIPOS_PARQUET = {'n_item': 'int64', 'quantidade': 'float64', 'valor_unitario': 'float64',
+                  'valor_total': 'float64', 'volume_m3': 'float64'}
+
+
+def _substituir_parquet(caminho: str, tabela):
+    """Grava num temporário da mesma pasta e troca com ``os.replace`` (leitores nunca veem meio arquivo)."""
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix=".~itens", suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(tabela, temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class ItensNFe:
+    """Itens de NF-e por empresa e mês (``db_path=None``: banco em memória)."""
+
+    def __init__(self, db_path: Optional[str] = BANCO_CENTRAL):
+        self.conn = sqlite3.connect(db_path or ':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS nfe_itens (
+                empresa TEXT NOT NULL,
+                mes TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                n_item INTEGER NOT NULL,
+                data_emissao TEXT,
+                cliente_cnpj TEXT,
+                cliente_nome TEXT,
+                codigo TEXT,
+                descricao TEXT,
+                ncm TEXT,
+                cfop TEXT,
+                unidade TEXT,
+                quantidade REAL,
+                valor_unitario REAL,
+                valor_total REAL,
+                volume_m3 REAL,
+                PRIMARY KEY (empresa, mes, chave, n_item)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_nfe_itens_chave ON nfe_itens (chave)")
+        self.chaves = {r[0] for r in self.conn.execute("SELECT DISTINCT chave FROM nfe_itens")}
+        self._novos: List[tuple] = []
+
+    def adicionar(self, empresa: str, dados: Dict) -> int:
+        """Enfileira os itens de uma NF-e lida com ``parse_nfe(..., itens=True)``."""
+        chave = dados.get('chave') or ''
+        if not chave:
+            return 0
+        mes = (dados.get('data_emissao') or '')[:7]
+        cabecalho = {c: dados.get(c) or '' for c in ('data_emissao', 'cliente_cnpj', 'cliente_nome')}
+        for item in dados.get('itens', ()):
+            linha = dict(cabecalho, **item)
+            self._novos.append((empresa, mes, chave) + tuple(linha.get(c) for c in CAMPOS_ITEM))
+        self.chaves.add(chave)
+        return len(dados.get('itens', ()))
+
+    def salvar(self) -> int:
+        """Grava os itens enfileirados (uma transação, ``executemany``)."""
+        novos, self._novos = self._novos, []
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO nfe_itens ({', '.join(COLUNAS)}) "
+                f"VALUES ({', '.join('?' * len(COLUNAS))})", novos)
+        return len(novos)
+
+    def fechar(self):
+        self.conn.close()
+
+    # ==========================================
+    # CONSULTAS
+    # ==========================================
+
+    def _filtro(self, filtros: Dict) -> tuple:
+        desconhecidos = set(filtros) - set(DIMENSOES)
+        if desconhecidos:
+            raise ValueError(f"Filtro inválido: {', '.join(sorted(desconhecidos))}")
+        condicoes, params = [], []
+        for coluna, valor in filtros.items():
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                params.append(valor)
+        # Notas canceladas (eventos lidos na auditoria) não entram nas análises
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                             "AND name = 'eventos_cancelamento'").fetchone():
+            condicoes.append("chave NOT IN (SELECT chave FROM eventos_cancelamento)")
+        return condicoes, params
+
+    def preco_m3(self, por: Sequence[str] = ('cliente_cnpj',), **filtros) -> List[Dict]:
+        """Preço médio por m³ (``Σ valor_total / Σ volume_m3``) agrupado pelas colunas ``por``.
+
+        Só itens com unidade em m³. ``filtros`` por igualdade, ex.:
+        ``preco_m3(por=('cfop',), empresa='ACME', mes='2026-01')``.
+        """
+        por = tuple(por)
+        invalidas = set(por) - set(DIMENSOES)
+        if invalidas:
+            raise ValueError(f"Agrupamento inválido: {', '.join(sorted(invalidas))}")
+        condicoes, params = self._filtro(filtros)
+        condicoes.append("volume_m3 > 0")
+        grupo = ', '.join(por)
+        linhas = self.conn.execute(
+            f"SELECT {grupo + ', ' if por else ''}COUNT(*) AS itens, SUM(volume_m3) AS volume_m3, "
+            f"SUM(valor_total) AS valor_total, SUM(valor_total) / SUM(volume_m3) AS preco_m3 "
+            f"FROM nfe_itens WHERE {' AND '.join(condicoes)}"
+            + (f" GROUP BY {grupo} ORDER BY {grupo}" if por else ""), params).fetchall()
+        return [dict(l) for l in linhas if l['itens']]
+
+    def itens(self, **filtros) -> List[Dict]:
+        condicoes, params = self._filtro(filtros)
+        onde = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return [dict(l) for l in self.conn.execute(
+            f"SELECT * FROM nfe_itens{onde} ORDER BY empresa, mes, chave, n_item", params)]
+
+    # ==========================================
+    # EXPORTAÇÃO PARQUET
+    # ==========================================
+
+    def exportar_parquet(self, destino: str, empresa: Optional[str] = None,
+                         mes: Optional[str] = None) -> List[str]:
+        """Regrava as partições ``empresa=X/mes=AAAA-MM/itens.parquet`` (todas ou as filtradas).
+
+        Cada partição é um arquivo inteiro, substituído atomicamente; empresa e
+        mês ficam só no caminho, como o ``pyarrow.dataset`` (``partitioning="hive"``) espera.
+        """
+        if pq is None:
+            raise RuntimeError("Exportação Parquet requer o pacote pyarrow (pip install pyarrow)")
+        filtros = {'empresa': empresa, 'mes': mes}
+        condicoes = [f"{c} = ?" for c, v in filtros.items() if v is not None]
+        params = [v for v in filtros.values() if v is not None]
+        onde = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        particoes = self.conn.execute(
+            f"SELECT DISTINCT empresa, mes FROM nfe_itens{onde} ORDER BY empresa, mes", params).fetchall()
+
+        esquema = pa.schema([(c, pa.type_for_alias(_TIPOS_PARQUET.get(c, 'string')))
+                             for c in ('chave',) + CAMPOS_ITEM])
+        arquivos = []
+        for emp, m in particoes:
+            linhas = self.conn.execute(
+                f"SELECT {', '.join(esquema.names)} FROM nfe_itens WHERE empresa = ? AND mes = ? "
+                f"ORDER BY chave, n_item", (emp, m)).fetchall()
+            tabela = pa.Table.from_pylist([dict(l) for l in linhas], schema=esquema)
+            pasta = os.path.join(destino, f"empresa={emp.replace(os.sep, '_')}", f"mes={m or 'sem_data'}")
+            os.makedirs(pasta, exist_ok=True)
+            caminho = os.path.join(pasta, "itens.parquet")
+            _substituir_parquet(caminho, tabela)
+            arquivos.append(caminho)
+        return arquivos
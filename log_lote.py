@@ -0,0 +1,144 @@
+"""
+Log em lote para as caixas de texto dos módulos.
+
+Inserir uma linha por arquivo num ``CTkTextbox`` (e rolar até o fim a cada
+vez) vira o gargalo com dezenas de milhares de PDFs, e o widget cresce sem
+limite. ``LogEmLote`` acumula as mensagens e as descarrega de uma vez num
+timer do Tk: um ``insert``, um corte das linhas antigas e um ``see`` por
+lote, qualquer que seja o tamanho do lote. O widget guarda só as últimas
+``max_linhas``; o log completo vai para um arquivo rotativo em ``logs/``,
+na pasta do aplicativo (não no diretório corrente). Janelas do mesmo módulo
+compartilham um único handler por arquivo: dois handlers abertos no mesmo
+arquivo impedem a rotação no Windows, que não renomeia arquivo aberto.
+
+Deve ser usado na thread do Tk (os workers mandam o log pelo
+``Progresso.log`` do ``ExecutorTarefas``).
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+PASTA_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+# Handler compartilhado por arquivo: caminho normalizado -> [handler, referências]
+_handlers: Dict[str, list] = {}
+_lock_handlers = threading.Lock()
+
+
+def _abrir_handler(arquivo: str, max_bytes: int, backups: int) -> RotatingFileHandler:
+    chave = os.path.normcase(os.path.abspath(arquivo))
+    with _lock_handlers:
+        if chave not in _handlers:
+            os.makedirs(os.path.dirname(chave), exist_ok=True)
+            handler = RotatingFileHandler(arquivo, maxBytes=max_bytes,
+                                          backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _handlers[chave] = [handler, 0]
+        _handlers[chave][1] += 1
+        return _handlers[chave][0]
+
+
+def _liberar_handler(handler: RotatingFileHandler):
+    """Fecha o handler quando a última janela que o usa é fechada."""
+    chave = os.path.normcase(handler.baseFilename)
+    with _lock_handlers:
+        entrada = _handlers.get(chave)
+        if entrada is None or entrada[0] is not handler:
+            handler.close()
+            return
+        entrada[1] -= 1
+        if entrada[1] <= 0:
+            del _handlers[chave]
+            handler.close()
+
+
+class LogEmLote:
+    """Buffer de log descarregado em lotes num textbox, com arquivo rotativo."""
+
+    def __init__(self, textbox, max_linhas: int = 2000, intervalo_ms: int = 100,
+                 arquivo: Optional[str] = None, somente_leitura: bool = False,
+                 max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.textbox = textbox
+        self.max_linhas = max_linhas
+        self.intervalo_ms = intervalo_ms
+        self.somente_leitura = somente_leitura
+
+        # Só as últimas max_linhas de cada lote chegam ao widget
+        self._pendentes = deque(maxlen=max_linhas)
+        self._pendentes_arquivo: List[str] = []
+        self._agendado = None
+
+        self._arquivo = None
+        if arquivo:
+            self._arquivo = _abrir_handler(arquivo, max_bytes, backups)
+
+        # Fecha o arquivo junto com a janela (o evento do CTkTextbox vem do Text interno)
+        self._janela = textbox.winfo_toplevel() if hasattr(textbox, "winfo_toplevel") else None
+        if self._janela is not None:
+            self._janela.bind("<Destroy>", self._ao_destruir, add="+")
+
+    @staticmethod
+    def caminho(nome: str) -> str:
+        """Caminho padrão do arquivo de log de um módulo (``logs/<nome>.log``)."""
+        return os.path.join(PASTA_LOGS, f"{nome}.log")
+
+    def escrever(self, linha: str):
+        """Enfileira uma linha (sem ``\\n`` final) para o próximo lote."""
+        self._pendentes.append(linha)
+        if self._arquivo is not None:
+            self._pendentes_arquivo.append(linha)
+        if self._agendado is None:
+            self._agendado = self.textbox.after(self.intervalo_ms, self.descarregar)
+
+    def descarregar(self):
+        """Grava o lote pendente no widget e no arquivo."""
+        self._agendado = None
+        self._gravar_arquivo()
+        if not self._pendentes:
+            return
+
+        texto = "\n".join(self._pendentes) + "\n"
+        self._pendentes.clear()
+
+        if self.somente_leitura:
+            self.textbox.configure(state="normal")
+        self.textbox.insert("end", texto)
+        # Com o texto sempre terminado em \n, "end-1c" fica no início da linha N+1
+        linhas = int(self.textbox.index("end-1c").split(".")[0]) - 1
+        excesso = linhas - self.max_linhas
+        if excesso > 0:
+            self.textbox.delete("1.0", f"{excesso + 1}.0")
+        self.textbox.see("end")
+        if self.somente_leitura:
+            self.textbox.configure(state="disabled")
+
+    def limpar(self):
+        """Descarta o que está pendente e esvazia o widget (o arquivo é mantido)."""
+        self._gravar_arquivo()
+        self._pendentes.clear()
+        if self.somente_leitura:
+            self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        if self.somente_leitura:
+            self.textbox.configure(state="disabled")
+
+    def fechar(self):
+        self._gravar_arquivo()
+        if self._arquivo is not None:
+            _liberar_handler(self._arquivo)
+            self._arquivo = None
+
+    def _gravar_arquivo(self):
+        if self._arquivo is None or not self._pendentes_arquivo:
+            return
+        registro = logging.makeLogRecord({"msg": "\n".join(self._pendentes_arquivo)})
+        self._pendentes_arquivo = []
+        self._arquivo.emit(registro)
+
+    def _ao_destruir(self, event):
+        if event.widget is self._janela:
+            self.fechar()
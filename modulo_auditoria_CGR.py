@@ -2,7 +2,6 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 import os
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Tuple
@@ -10,6 +9,14 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 
+# parse_nfe/parse_cte/detectar_tipo_xml continuam importáveis deste módulo
+from auditoria_xml import (EXTENSOES_COMPACTADAS, STATUS_CANCELADA, STATUS_DENEGADA,
+                           STATUS_DUPLICADA, STATUS_ERRO, STATUS_OK, IndiceChaves, MotorAuditoria,
+                           detectar_tipo_xml, parse_cte, parse_nfe)
+from database import BANCO_CENTRAL
+from itens_nfe import ItensNFe
+from tarefas import ExecutorTarefas
+
 # Configuração Visual
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -21,7 +28,8 @@ ctk.set_default_color_theme("blue")
 class XMLItem:
     """Representa um item auditado de XML fiscal"""
     def __init__(self, empresa: str, tipo: str, numero: str, valor_total: float, 
-                 icms: float, pis: float, cofins: float, volume: int, status: str,volume_total:float):
+                 icms: float, pis: float, cofins: float, volume: int, status: str,volume_total:float,
+                 chave: str = ''):
         self.empresa = empresa
         self.tipo = tipo  # NF-e ou CT-e
         self.numero = numero
@@ -32,161 +40,7 @@ class XMLItem:
         self.volume = volume
         self.status = status
         self.volume_total = volume_total
-
-# ==========================================
-# FUNÇÕES DE PARSE XML
-# ==========================================
-
-def parse_nfe(xml_path: Path) -> Dict:
-    """Extrai dados de uma NF-e.
-
-    Valor : total/ICMSTot/vNF  (padrão SEFAZ, igual em todas as empresas)
-    Volume: soma de qCom nos itens onde uCom = M3 — campo mais confiável para
-            gás natural. vol/qVol representa volumes de embalagem (caixas,
-            paletes) e está incorreto para gás.
-    Fallback 1 → vol/qVol  (caso não haja itens M3)
-    Fallback 2 → vol/pesoL (último recurso)
-    """
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        ns = {'nfe': 'http://www.portalfiscal.inf.br/nfe'}
-
-        numero     = root.find('.//nfe:ide/nfe:nNF', ns)
-        valor_tag  = root.find('.//nfe:total/nfe:ICMSTot/nfe:vNF', ns)
-        # vNFTot inclui IBS/CBS (tributos 2026); se presente, usar como total
-        valor_ext  = root.find('.//nfe:total/nfe:vNFTot', ns)
-        icms       = root.find('.//nfe:total/nfe:ICMSTot/nfe:vICMS', ns)
-        pis        = root.find('.//nfe:total/nfe:ICMSTot/nfe:vPIS', ns)
-        cofins     = root.find('.//nfe:total/nfe:ICMSTot/nfe:vCOFINS', ns)
-
-        # Volume M3: soma qCom dos itens cujo uCom é metro cúbico
-        UNIDADES_M3 = {'M3', 'M³', 'M 3', 'M3.'}
-        vol_m3 = 0.0
-        for det in root.findall('.//nfe:det', ns):
-            u_com = det.find('nfe:prod/nfe:uCom', ns)
-            q_com = det.find('nfe:prod/nfe:qCom', ns)
-            if u_com is not None and q_com is not None:
-                if u_com.text.strip().upper() in UNIDADES_M3:
-                    try:
-                        vol_m3 += float(q_com.text)
-                    except Exception:
-                        pass
-
-        # Fallback 1: vol/qVol
-        if vol_m3 == 0.0:
-            for vol in root.findall('.//nfe:vol', ns):
-                q_vol = vol.find('nfe:qVol', ns)
-                if q_vol is not None and q_vol.text:
-                    try:
-                        vol_m3 += float(q_vol.text)
-                    except Exception:
-                        pass
-
-        # Fallback 2: pesoL do <vol>
-        if vol_m3 == 0.0:
-            peso = root.find('.//nfe:vol/nfe:pesoL', ns)
-            if peso is not None and peso.text:
-                try:
-                    vol_m3 = float(peso.text)
-                except Exception:
-                    pass
-
-        valor = (float(valor_ext.text) if valor_ext is not None else
-                 float(valor_tag.text) if valor_tag is not None else 0.0)
-
-        return {
-            'tipo': 'NF-e',
-            'numero': numero.text if numero is not None else 'N/A',
-            'valor_total': valor,
-            'icms':   float(icms.text)   if icms   is not None else 0.0,
-            'pis':    float(pis.text)    if pis    is not None else 0.0,
-            'cofins': float(cofins.text) if cofins is not None else 0.0,
-            'volume_total': vol_m3,
-            'volume': int(vol_m3),  # retrocompatibilidade
-        }
-    except Exception as e:
-        return {'erro': str(e)}
-
-def parse_cte(xml_path: Path) -> Dict:
-    """Extrai dados de um CT-e.
-
-    Valor : vPrest/vTPrest  (padrão SEFAZ para CT-e)
-    Volume: infQ/qCarga onde cUnid='00' (M3) tem prioridade.
-            Tabela cUnid CT-e: 00=M3, 01=KG, 02=TON, 03=Un, 04=L, 05=MMBTU
-            Se não houver M3, usa o primeiro qCarga > 0 disponível.
-    """
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        ns = {'cte': 'http://www.portalfiscal.inf.br/cte'}
-
-        numero      = root.find('.//cte:ide/cte:nCT', ns)
-        valor_total = root.find('.//cte:vPrest/cte:vTPrest', ns)
-        icms        = root.find('.//cte:ICMS//cte:vICMS', ns)
-        pis         = root.find('.//cte:vPIS', ns)
-        cofins      = root.find('.//cte:vCOFINS', ns)
-
-        # Volume: prioridade para cUnid='00' (M3)
-        vol_m3 = 0.0
-        unid_encontrada = ''
-
-        for infQ in root.findall('.//cte:infQ', ns):
-            c_unid  = infQ.find('cte:cUnid', ns)
-            q_carga = infQ.find('cte:qCarga', ns)
-            if c_unid is not None and q_carga is not None and c_unid.text == '00':
-                try:
-                    v = float(q_carga.text)
-                    if v > 0:
-                        vol_m3 = v
-                        unid_encontrada = 'M3'
-                        break
-                except Exception:
-                    pass
-
-        # Fallback: qualquer infQ com qCarga > 0
-        if vol_m3 == 0.0:
-            for infQ in root.findall('.//cte:infQ', ns):
-                q_carga = infQ.find('cte:qCarga', ns)
-                c_unid  = infQ.find('cte:cUnid', ns)
-                tp_med  = infQ.find('cte:tpMed', ns)
-                if q_carga is not None:
-                    try:
-                        v = float(q_carga.text)
-                        if v > 0:
-                            vol_m3 = v
-                            unid_encontrada = (tp_med.text if tp_med is not None else
-                                               c_unid.text if c_unid is not None else '?')
-                            break
-                    except Exception:
-                        pass
-
-        return {
-            'tipo': 'CT-e',
-            'numero': numero.text if numero is not None else 'N/A',
-            'valor_total': float(valor_total.text) if valor_total is not None else 0.0,
-            'icms':   float(icms.text)   if icms   is not None else 0.0,
-            'pis':    float(pis.text)    if pis    is not None else 0.0,
-            'cofins': float(cofins.text) if cofins is not None else 0.0,
-            'volume_total': vol_m3,
-            'unidade_volume': unid_encontrada,
-            'volume': int(vol_m3),  # retrocompatibilidade
-        }
-    except Exception as e:
-        return {'erro': str(e)}
-
-def detectar_tipo_xml(xml_path: Path) -> str:
-    """Detecta se é NF-e ou CT-e pelo conteúdo"""
-    try:
-        with open(xml_path, 'r', encoding='utf-8') as f:
-            conteudo = f.read(500)  # Lê só o início
-            if 'nfeProc' in conteudo or 'NFe' in conteudo:
-                return 'nfe'
-            elif 'cteProc' in conteudo or 'CTe' in conteudo:
-                return 'cte'
-    except:
-        pass
-    return 'desconhecido'
+        self.chave = chave
 
 # ==========================================
 # INTERFACE GRÁFICA
@@ -214,6 +68,8 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         self.volume_total_nfe   = 0.0   # soma volume somente das NF-e
         self.valor_total_cte    = 0.0   # soma valor somente dos CT-e
         self.volume_total_cte   = 0.0   # soma volume somente dos CT-e
+
+        self.tarefas = ExecutorTarefas(self)
         
         self._setup_ui()
     
@@ -284,6 +140,11 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         self.lbl_status = ctk.CTkLabel(frame_status, text="Aguardando seleções...",
                                        font=("Roboto", 14), text_color="#f39c12")
         self.lbl_status.pack(pady=15)
+
+        # Itens das NF-e (produto, CFOP, preço) para análises por item
+        self.var_itens = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(container, text="Extrair itens das NF-e (análise por produto, cliente e CFOP)",
+                        variable=self.var_itens).pack(anchor="w", padx=10)
         
         # ========== BOTÕES DE AÇÃO (lado a lado) ==========
         frame_btns = ctk.CTkFrame(container, fg_color="transparent")
@@ -406,7 +267,10 @@ class AppAuditoriaXML(ctk.CTkToplevel):
     # ==========================================
     
     def iniciar_auditoria(self):
+        if self.tarefas.ocupado:
+            return
         self.btn_auditar.configure(state="disabled")
+        self.btn_somatorio.configure(state="disabled")
         self.text_resultados.delete("1.0", "end")
         self.text_resultados.insert("1.0", "🔄 Iniciando auditoria...\n")
         self.resultados.clear()
@@ -414,23 +278,83 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         # Empresas selecionadas
         empresas = [emp for emp, var, _ in self.checkboxes_empresas if var.get()]
         
+        self.tarefas.executar(
+            self._auditar_empresas, self.pasta_selecionada, empresas, self.var_itens.get(),
+            ao_log=self._log_resultados,
+            ao_progresso=self._ao_progresso,
+            ao_concluir=self._ao_concluir_auditoria,
+            ao_erro=self._ao_erro_tarefa,
+        )
+    
+    def _log_resultados(self, texto: str):
+        self.text_resultados.insert("end", texto)
+        self.text_resultados.see("end")
+    
+    def _ao_progresso(self, percentual: float, mensagem: str):
+        self.lbl_status.configure(text=f"{mensagem or 'Processando'} — {percentual:.0f}%",
+                                  text_color="#f39c12")
+    
+    def _ao_erro_tarefa(self, erro: Exception):
+        self._verificar_habilitacao()
+        self.lbl_status.configure(text="Erro no processamento", text_color="#e74c3c")
+        messagebox.showerror("Erro", str(erro))
+    
+    @staticmethod
+    def _listar_fontes(pasta: Path) -> Tuple[List[Path], List[Path]]:
+        """(XMLs soltos, arquivos .zip/.7z) da pasta — os compactados são lidos sem extrair"""
+        # Um único rglob: "*.xml" + "*.XML" lista cada arquivo duas vezes no Windows
+        xmls, compactados = [], []
+        for p in pasta.rglob("*"):
+            extensao = p.suffix.lower()
+            if extensao == ".xml" and p.is_file():
+                xmls.append(p)
+            elif extensao in EXTENSOES_COMPACTADAS and p.is_file():
+                compactados.append(p)
+        return xmls, compactados
+
+    def _auditar_empresas(self, progresso, pasta: Path, empresas: List[str], extrair_itens: bool = False):
+        """Worker: audita os XMLs de cada empresa (não acessa widgets)"""
+        resultados = []
         total_xmls = 0
-        
-        for empresa in empresas:
-            self.text_resultados.insert("end", f"\n📂 Auditando: {empresa}\n")
-            self.text_resultados.see("end")
-            self.update()
-            
-            pasta_empresa = self.pasta_selecionada / empresa
-            xmls = list(pasta_empresa.rglob("*.xml")) + list(pasta_empresa.rglob("*.XML"))
-            
-            self.text_resultados.insert("end", f"   Encontrados: {len(xmls)} XMLs\n")
-            
-            for xml_file in xmls:
-                total_xmls += 1
-                resultado = self._auditar_xml(xml_file, empresa)
-                if resultado:
-                    self.resultados.append(resultado)
+        itens = ItensNFe(BANCO_CENTRAL) if extrair_itens else None
+        motor = MotorAuditoria(IndiceChaves(BANCO_CENTRAL), itens)
+        
+        try:
+            for i, empresa in enumerate(empresas):
+                progresso.log(f"\n📂 Auditando: {empresa}\n")
+                
+                xmls, compactados = self._listar_fontes(pasta / empresa)
+                
+                progresso.log(f"   Encontrados: {len(xmls)} XMLs"
+                              + (f" + {len(compactados)} arquivo(s) compactado(s)" if compactados else "")
+                              + "\n")
+                
+                unidades = len(xmls) + len(compactados)
+                for j, xml_file in enumerate(xmls):
+                    total_xmls += 1
+                    motor.processar(xml_file, empresa)
+                    progresso((i + (j + 1) / unidades) * 100 / len(empresas), empresa)
+                if compactados:
+                    total_xmls += motor.processar_arquivos(
+                        compactados, empresa,
+                        ao_concluir_arquivo=lambda k, _c: progresso(
+                            (i + (len(xmls) + k) / unidades) * 100 / len(empresas), empresa))
+            # Status finais só depois de todos os eventos de cancelamento
+            motor.concluir()
+            if itens is not None:
+                progresso.log(f"\n🧾 NF-e com itens gravados: {len(itens.chaves)}\n")
+        finally:
+            motor.indice.fechar()
+            if itens is not None:
+                itens.fechar()
+        
+        resultados = [self._item(d) for d in motor.documentos]
+        return resultados, total_xmls, motor.duplicadas, motor.reaproveitados, len(motor.eventos)
+    
+    def _ao_concluir_auditoria(self, retorno):
+        self.resultados, total_xmls, duplicadas, reaproveitados, eventos = retorno
+        self.btn_somatorio.configure(state="normal")
+        self.lbl_status.configure(text="Auditoria concluída!", text_color="#27ae60")
         
         # Resumo
         self.text_resultados.insert("end", f"\n{'='*50}\n")
@@ -438,13 +362,26 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         self.text_resultados.insert("end", f"   Total de XMLs: {total_xmls}\n")
         self.text_resultados.insert("end", f"   Processados: {len(self.resultados)}\n")
         
-        erros = sum(1 for r in self.resultados if r.status != "OK")
+        erros = sum(1 for r in self.resultados if r.status == STATUS_ERRO)
         self.text_resultados.insert("end", f"   Erros/Divergências: {erros}\n")
+        self.text_resultados.insert("end", f"   Lidos do índice de chaves: {reaproveitados}\n")
+        self.text_resultados.insert("end", f"   Eventos lidos: {eventos}\n")
+        for status, rotulo in ((STATUS_CANCELADA, "Cancelados"), (STATUS_DENEGADA, "Denegados")):
+            qtd = sum(1 for r in self.resultados if r.status == status)
+            self.text_resultados.insert("end", f"   {rotulo} (não somados): {qtd}\n")
+        self.text_resultados.insert("end", f"   Duplicados (não somados): {len(duplicadas)}\n")
+        for d in duplicadas[:20]:
+            self.text_resultados.insert(
+                "end", f"     ⚠️ {d['chave']}  {d['empresa']}: {Path(d['arquivo']).name}"
+                       f"  (já lido em {d['empresa_original']}: {Path(d['arquivo_original']).name})\n")
+        if len(duplicadas) > 20:
+            self.text_resultados.insert("end", f"     ... e mais {len(duplicadas) - 20}\n")
 
         
         # ===== SOMATÓRIOS — prontos para cálculos posteriores =====
-        nfes = [r for r in self.resultados if r.tipo == 'NF-e']
-        ctes = [r for r in self.resultados if r.tipo == 'CT-e']
+        # Cada chave de acesso conta uma vez: duplicados ficam fora dos totais
+        nfes = [r for r in self.resultados if r.tipo == 'NF-e' and r.status == STATUS_OK]
+        ctes = [r for r in self.resultados if r.tipo == 'CT-e' and r.status == STATUS_OK]
 
         self.valor_total_nfe    = sum(r.valor_total           for r in nfes)
         self.volume_total_nfe   = sum(getattr(r, 'volume', 0) for r in nfes)
@@ -476,31 +413,55 @@ class AppAuditoriaXML(ctk.CTkToplevel):
             return
 
         pasta = Path(self.pasta_selecionada)
-        xmls = list(pasta.rglob("*.xml"))
-        if not xmls:
+        xmls, compactados = self._listar_fontes(pasta)
+        if not xmls and not compactados:
             messagebox.showinfo("Sem arquivos", "Nenhum arquivo XML encontrado na pasta selecionada.")
             return
 
-        self.lbl_status.configure(text=f"Calculando somatório de {len(xmls)} XML(s)…", text_color="#f39c12")
-        self.update()
+        descricao = f"{len(xmls)} XML(s)" + (f" e {len(compactados)} arquivo(s) compactado(s)" if compactados else "")
+        self.lbl_status.configure(text=f"Calculando somatório de {descricao}…", text_color="#f39c12")
+        self.btn_somatorio.configure(state="disabled")
+        self.tarefas.executar(
+            self._somar_xmls, xmls, compactados,
+            ao_progresso=self._ao_progresso,
+            ao_concluir=self._ao_concluir_somatorio,
+            ao_erro=self._ao_erro_tarefa,
+        )
 
-        val_nfe = vol_nfe = 0.0
-        val_cte = vol_cte = 0.0
+    @staticmethod
+    def _somar_xmls(progresso, xmls: List[Path], compactados: List[Path] = ()):
+        """Worker: soma valor e volume das NF-e e CT-e (cada chave de acesso uma vez)"""
+        motor = MotorAuditoria(IndiceChaves(BANCO_CENTRAL))
         erros = 0
+        unidades = len(xmls) + len(compactados)
+        total = len(xmls)
 
-        for xml_path in xmls:
-            try:
-                tipo = detectar_tipo_xml(xml_path)
-                if tipo == 'nfe':
-                    dados = parse_nfe(xml_path)
-                    val_nfe += float(dados.get('valor_total', 0) or 0)
-                    vol_nfe += float(dados.get('volume_total', 0) or 0)
-                elif tipo == 'cte':
-                    dados = parse_cte(xml_path)
-                    val_cte += float(dados.get('valor_total', 0) or 0)
-                    vol_cte += float(dados.get('volume_total', 0) or 0)
-            except Exception:
-                erros += 1
+        try:
+            for i, xml_path in enumerate(xmls, 1):
+                try:
+                    motor.processar(xml_path)
+                except Exception:
+                    erros += 1
+                if i % 50 == 0 or i == len(xmls):
+                    progresso(i * 100 / unidades, f"{i}/{len(xmls)} XML(s)")
+            if compactados:
+                total += motor.processar_arquivos(
+                    compactados, ao_concluir_arquivo=lambda k, c: progresso(
+                        (len(xmls) + k) * 100 / unidades, Path(c).name))
+            motor.concluir()
+        finally:
+            motor.indice.fechar()
+
+        erros += sum(1 for d in motor.documentos if d['status'] == STATUS_ERRO)
+        totais = motor.totais()
+        fora = sum(1 for d in motor.documentos if d['status'] in (STATUS_CANCELADA, STATUS_DENEGADA))
+        return (total, totais['NF-e']['valor_total'], totais['NF-e']['volume_total'],
+                totais['CT-e']['valor_total'], totais['CT-e']['volume_total'], erros,
+                len(motor.duplicadas), fora)
+
+    def _ao_concluir_somatorio(self, retorno):
+        total, val_nfe, vol_nfe, val_cte, vol_cte, erros, duplicados, cancelados = retorno
+        self.btn_somatorio.configure(state="normal")
 
         # Salva nos atributos para reutilização futura
         self.valor_total_nfe    = val_nfe
@@ -514,9 +475,13 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         self.btn_salvar_scg.configure(state="normal")
 
         aviso_erros = f"\n\n⚠️ {erros} arquivo(s) não puderam ser lidos." if erros else ""
+        if duplicados:
+            aviso_erros += f"\n⚠️ {duplicados} XML(s) duplicado(s) (mesma chave) fora da soma."
+        if cancelados:
+            aviso_erros += f"\n⚠️ {cancelados} documento(s) cancelado(s)/denegado(s) fora da soma."
 
         msg = (
-            f"📊  SOMATÓRIO — {len(xmls)} XML(s) processados{aviso_erros}\n"
+            f"📊  SOMATÓRIO — {total} XML(s) processados{aviso_erros}\n"
             f"{'─' * 45}\n\n"
             f"  📄  NF-e\n"
             f"       Valor Total : R$ {val_nfe:>18,.2f}\n"
@@ -531,39 +496,22 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         )
         messagebox.showinfo("Somatório Final", msg)
 
-    def _auditar_xml(self, xml_path: Path, empresa: str) -> XMLItem:
-        """Audita um XML individual"""
-        tipo = detectar_tipo_xml(xml_path)
-        
-        if tipo == 'nfe':
-            dados = parse_nfe(xml_path)
-        elif tipo == 'cte':
-            dados = parse_cte(xml_path)
-        else:
-            return XMLItem(empresa, "ERRO", xml_path.name, 0.0, 0.0, 0.0, 0.0, 0, "ERRO_PARSE", 0.0)
-        
-        if 'erro' in dados:
-            return XMLItem(empresa, "ERRO", xml_path.name, 0.0, 0.0, 0.0, 0.0, 0, "ERRO_PARSE", 0.0)
-        
-        # Comparar com Excel (simplificado - assumindo coluna 'Numero' no Excel)
-        # Na prática, você precisa fazer o match correto com suas colunas
-        status = "OK"
-        
-        # Aqui você faria a comparação real com self.df_excel
-        # Exemplo: buscar linha no Excel com mesmo número e comparar valores
-        
-        vol_total = dados.get('volume_total', float(dados.get('volume', 0)))
+    @staticmethod
+    def _item(documento: Dict) -> XMLItem:
+        """Documento do ``MotorAuditoria`` no formato da tabela/relatório"""
+        vol_total = float(documento['volume_total'] or 0)
         return XMLItem(
-            empresa=empresa,
-            tipo=dados['tipo'],
-            numero=dados['numero'],
-            valor_total=dados['valor_total'],
-            icms=dados['icms'],
-            pis=dados['pis'],
-            cofins=dados['cofins'],
+            empresa=documento['empresa'],
+            tipo=documento['tipo'],
+            numero=documento['numero'],
+            valor_total=float(documento['valor_total'] or 0),
+            icms=float(documento['icms'] or 0),
+            pis=float(documento['pis'] or 0),
+            cofins=float(documento['cofins'] or 0),
             volume=int(vol_total),
-            status=status,
-            volume_total=vol_total
+            status=documento['status'],
+            volume_total=vol_total,
+            chave=documento['chave'],
         )
     
     # ------------------------------------------------------------------
@@ -631,7 +579,7 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         
         # Cabeçalho
         headers = ["Empresa", "Tipo", "Número", "Valor Total", "ICMS", "PIS", 
-                   "COFINS", "Volume", "Status"]
+                   "COFINS", "Volume", "Status", "Chave de Acesso"]
         
         for col, header in enumerate(headers, 1):
             cell = ws.cell(1, col, header)
@@ -650,6 +598,7 @@ class AppAuditoriaXML(ctk.CTkToplevel):
             ws.cell(row, 7, item.cofins)
             ws.cell(row, 8, item.volume)
             ws.cell(row, 9, item.status)
+            ws.cell(row, 10, item.chave)
             
             # Colorir status
             status_cell = ws.cell(row, 9)
@@ -664,7 +613,7 @@ class AppAuditoriaXML(ctk.CTkToplevel):
         wb.save(nome_arquivo)
         
         # ===== SALVAR CGR NO BANCO =====
-        cgr_total = sum(item.valor_total for item in self.resultados)
+        cgr_total = sum(item.valor_total for item in self.resultados if item.status == STATUS_OK)
         
         periodo = simpledialog.askstring("Período CGR", 
                                         "Digite o período (ex: Q1 2026):",
@@ -4,6 +4,9 @@ import pandas as pd
 from pathlib import Path
 import customtkinter as ctk
 
+from log_lote import LogEmLote
+from tarefas import ExecutorTarefas
+
 # ---------------------------------------------
 # Configurações gerais CustomTkinter
 # ---------------------------------------------
@@ -60,6 +63,7 @@ class CGFApp(ctk.CTkToplevel):
         self.pmpv_manual  = ctk.StringVar(value="")
         self.volume_final_cgf = 0.0
         self.cgf_rs           = 0.0
+        self.tarefas = ExecutorTarefas(self)
 
         self._build_ui()
         self._refresh_files_listbox()
@@ -194,7 +198,8 @@ class CGFApp(ctk.CTkToplevel):
         btn_row = ctk.CTkFrame(content, fg_color="transparent")
         btn_row.pack(fill="x", pady=(0, 15))
         
-        ctk.CTkButton(btn_row, text="▶ INICIAR CÁLCULO", fg_color=ACCENT_GREEN, hover_color=ACCENT_GREEN_HOVER, font=("Segoe UI", 12, "bold"), command=self.calculate_total).pack(side="right")
+        self.btn_calcular = ctk.CTkButton(btn_row, text="▶ INICIAR CÁLCULO", fg_color=ACCENT_GREEN, hover_color=ACCENT_GREEN_HOVER, font=("Segoe UI", 12, "bold"), command=self.calculate_total)
+        self.btn_calcular.pack(side="right")
         self.btn_salvar_scg = ctk.CTkButton(btn_row, text="💾 Salvar CGF no SCG", fg_color=BG_INPUT, hover_color="#475569", text_color=FG_TEXT, state="disabled", command=self._salvar_cgf_scg)
         self.btn_salvar_scg.pack(side="right", padx=(0, 10))
 
@@ -228,6 +233,7 @@ class CGFApp(ctk.CTkToplevel):
         ctk.CTkLabel(content, text="Console de Execução:", font=("Segoe UI", 12), text_color=FG_MUTED).pack(anchor="w", pady=(5, 5))
         self.log_text = ctk.CTkTextbox(content, fg_color=BG_APP, text_color=FG_MUTED, font=("Consolas", 12), corner_radius=8)
         self.log_text.pack(fill="both", expand=True)
+        self.log_lote = LogEmLote(self.log_text, arquivo=LogEmLote.caminho("cgf"), somente_leitura=True)
 
         self.after(300, self._atualizar_combo_periodos)
 
@@ -263,15 +269,12 @@ class CGFApp(ctk.CTkToplevel):
         self.files_listbox.configure(state="disabled")
 
     def _log(self, message: str):
-        self.log_text.configure(state="normal")
-        self.log_text.insert("end", message + "\n")
-        self.log_text.see("end")
-        self.log_text.configure(state="disabled")
+        self.log_lote.escrever(message)
 
     # -----------------------------------------
     # Lógica de Cálculo (Mantida a Original)
     # -----------------------------------------
-    def _read_table(self, path: str):
+    def _read_table(self, path: str, log=None):
         try:
             ext = Path(path).suffix.lower()
             if ext in [".xlsx", ".xls"]:
@@ -280,7 +283,7 @@ class CGFApp(ctk.CTkToplevel):
                 return pd.read_csv(path, sep=";", engine="python")
             return None
         except Exception as e:
-            self._log(f"[ERRO] {e}\n")
+            (log or self._log)(f"[ERRO] {e}\n")
             return None
 
     @staticmethod
@@ -304,35 +307,56 @@ class CGFApp(ctk.CTkToplevel):
         if not self.selected_files:
             messagebox.showwarning("Aviso", "Selecione ao menos um arquivo.")
             return
+        if self.tarefas.ocupado:
+            return
 
-        fat_vol_col  = self.col_fat_volume.get().strip()
-        fat_cons_col = self.col_fat_consumo.get().strip()
-        fat_cons_val = self.val_fat_consumo.get().strip()
-        canc_vol_col = self.col_canc_volume.get().strip()
-        dev_vol_col  = self.col_dev_volume.get().strip()
+        colunas = {
+            'fat_vol':  self.col_fat_volume.get().strip(),
+            'fat_cons': self.col_fat_consumo.get().strip(),
+            'fat_val':  self.val_fat_consumo.get().strip(),
+            'canc_vol': self.col_canc_volume.get().strip(),
+            'dev_vol':  self.col_dev_volume.get().strip(),
+        }
 
-        if not fat_vol_col:
+        if not colunas['fat_vol']:
             messagebox.showerror("Erro", "Informe a coluna de volume da NF Faturada.")
             return
 
-        total_faturado = total_canceladas = total_devolucoes = total_consumo_proprio = 0.0
-
-        self.log_text.configure(state="normal")
-        self.log_text.delete("0.0", "end")
-        self.log_text.configure(state="disabled")
+        self.log_lote.limpar()
         self._log("⚡ INICIANDO PROCESSAMENTO...\n" + "-" * 40)
 
-        for path in self.selected_files:
+        self.btn_calcular.configure(state="disabled", text="⏳ Calculando...")
+        self.tarefas.executar(
+            self._calcular_volumes, list(self.selected_files), colunas,
+            ao_log=self._log,
+            ao_progresso=lambda pct, nome: self.btn_calcular.configure(text=f"⏳ {pct:.0f}%"),
+            ao_concluir=self._exibir_total,
+            ao_erro=self._erro_calculo,
+        )
+
+    def _calcular_volumes(self, progresso, arquivos, colunas):
+        """Worker: lê as planilhas e devolve o volume final (não acessa widgets)."""
+        log = progresso.log
+        fat_vol_col  = colunas['fat_vol']
+        fat_cons_col = colunas['fat_cons']
+        fat_cons_val = colunas['fat_val']
+        canc_vol_col = colunas['canc_vol']
+        dev_vol_col  = colunas['dev_vol']
+
+        total_faturado = total_canceladas = total_devolucoes = total_consumo_proprio = 0.0
+
+        for i, path in enumerate(arquivos, 1):
             nome     = Path(path).name
             nome_low = nome.lower()
-            df = self._read_table(path)
+            progresso(100 * (i - 1) / len(arquivos), nome)
+            df = self._read_table(path, log=log)
             if df is None:
                 continue
 
             if "faturada" in nome_low and "complementar" in nome_low:
-                self._log(f"🟢 FATURADA: {nome}")
+                log(f"🟢 FATURADA: {nome}")
                 if fat_vol_col not in df.columns:
-                    self._log(f"   [!] Coluna '{fat_vol_col}' ausente. Ignorado.\n")
+                    log(f"   [!] Coluna '{fat_vol_col}' ausente. Ignorado.\n")
                     continue
 
                 mask_cons = self._mask_consumo(df, fat_cons_col, fat_cons_val)
@@ -349,37 +373,49 @@ class CGFApp(ctk.CTkToplevel):
                 total_faturado        += float(vol_fat)
                 total_consumo_proprio += float(vol_cons)
 
-                self._log(f"   + Faturado limpo:   {vol_fat:,.2f}")
+                log(f"   + Faturado limpo:   {vol_fat:,.2f}")
                 if qtd_cons > 0:
-                    self._log(f"   - Consumo próprio:  {vol_cons:,.2f}  ({qtd_cons} linha(s) detectada(s))\n")
+                    log(f"   - Consumo próprio:  {vol_cons:,.2f}  ({qtd_cons} linha(s) detectada(s))\n")
                 else:
-                    self._log(f"   (nenhum consumo próprio detectado)\n")
+                    log(f"   (nenhum consumo próprio detectado)\n")
 
             elif "cancelad" in nome_low or "denegad" in nome_low:
-                self._log(f"🔴 CANCELADAS: {nome}")
+                log(f"🔴 CANCELADAS: {nome}")
                 if canc_vol_col in df.columns:
                     df[canc_vol_col] = pd.to_numeric(df[canc_vol_col], errors="coerce")
                     vol_canc = df[canc_vol_col].sum()
                     total_canceladas += float(vol_canc)
-                    self._log(f"   - Canceladas: {vol_canc:,.2f}\n")
+                    log(f"   - Canceladas: {vol_canc:,.2f}\n")
 
             elif "devolu" in nome_low:
-                self._log(f"🟡 DEVOLUÇÃO: {nome}")
+                log(f"🟡 DEVOLUÇÃO: {nome}")
                 if dev_vol_col in df.columns:
                     df[dev_vol_col] = pd.to_numeric(df[dev_vol_col], errors="coerce")
                     vol_dev = df[dev_vol_col].sum()
                     total_devolucoes += float(vol_dev)
-                    self._log(f"   - Devoluções: {vol_dev:,.2f}\n")
+                    log(f"   - Devoluções: {vol_dev:,.2f}\n")
 
         volume_final = total_faturado - total_canceladas - total_devolucoes - total_consumo_proprio
 
-        self._log("-" * 40 + "\n📊 RESUMO GERAL:")
-        self._log(f" (+) Faturado:          {total_faturado:,.2f}")
-        self._log(f" (-) Canceladas:        {total_canceladas:,.2f}")
-        self._log(f" (-) Devoluções:        {total_devolucoes:,.2f}")
-        self._log(f" (-) Consumo Próprio:   {total_consumo_proprio:,.2f}")
-        self._log(f"\n  => VOLUME FINAL CGF:  {volume_final:,.2f}")
-
+        log("-" * 40 + "\n📊 RESUMO GERAL:")
+        log(f" (+) Faturado:          {total_faturado:,.2f}")
+        log(f" (-) Canceladas:        {total_canceladas:,.2f}")
+        log(f" (-) Devoluções:        {total_devolucoes:,.2f}")
+        log(f" (-) Consumo Próprio:   {total_consumo_proprio:,.2f}")
+        log(f"\n  => VOLUME FINAL CGF:  {volume_final:,.2f}")
+        progresso(100)
+        return volume_final
+
+    def _restaurar_botao(self):
+        self.btn_calcular.configure(state="normal", text="▶ INICIAR CÁLCULO")
+
+    def _erro_calculo(self, erro):
+        self._restaurar_botao()
+        self._log(f"[ERRO] {erro}")
+        messagebox.showerror("Erro", f"Erro no cálculo: {erro}")
+
+    def _exibir_total(self, volume_final):
+        self._restaurar_botao()
         self.result_label.configure(text=f"Volume Final CGF: {volume_final:,.2f} m³")
         self.volume_final_cgf = volume_final
         self._atualizar_cgf_rs()          
@@ -3,7 +3,6 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
 import logging
-import threading  # Para não travar a tela enquanto processa
 from pathlib import Path
 from dataclasses import dataclass
 from typing import List, Tuple
@@ -16,6 +15,9 @@ import pytesseract
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill
 
+from log_lote import LogEmLote
+from tarefas import ExecutorTarefas
+
 # ==========================================
 # 1. CONFIGURAÇÕES E UTILITÁRIOS
 # ==========================================
@@ -104,11 +106,14 @@ def extrair_valor(text: str) -> Tuple[float, str]:
 
     return 0.0, "Valor não identificado"
 
-def processar_lista_arquivos(arquivos: List[Path], categoria: str, log_callback) -> List[PdfItem]:
+def processar_lista_arquivos(arquivos: List[Path], categoria: str, log_callback,
+                             item_callback=None) -> List[PdfItem]:
     itens = []
     total = len(arquivos)
     
     for i, arq in enumerate(arquivos):
+        if item_callback:
+            item_callback(i)
         log_callback(f"[{i+1}/{total}] Lendo: {arq.name}...")
         
         texto, metodo_leitura = ler_conteudo_pdf(arq)
@@ -182,6 +187,7 @@ class AppConciliador(ctk.CTkToplevel):
         self.path_desp = tk.StringVar()
         self.status_ocr_txt = "✅ MOTOR OCR ATIVO" if OCR_ATIVADO else "❌ OCR NÃO ENCONTRADO"
         self.cor_ocr = "#27ae60" if OCR_ATIVADO else "#c0392b"
+        self.tarefas = ExecutorTarefas(self)
 
         self._setup_ui()
 
@@ -236,6 +242,7 @@ class AppConciliador(ctk.CTkToplevel):
         
         self.log_box = ctk.CTkTextbox(self, height=200, font=("Consolas", 12))
         self.log_box.pack(fill="both", expand=True, padx=20, pady=(5, 20))
+        self.log_lote = LogEmLote(self.log_box, arquivo=LogEmLote.caminho("conciliacao"))
         self.log_message("Sistema pronto. Selecione as pastas acima.")
 
         # --- PROGRESS BAR ---
@@ -262,8 +269,7 @@ class AppConciliador(ctk.CTkToplevel):
 
     # --- LÓGICA DE INTERFACE ---
     def log_message(self, msg):
-        self.log_box.insert("end", f"> {datetime.now().strftime('%H:%M:%S')} | {msg}\n")
-        self.log_box.see("end")
+        self.log_lote.escrever(f"> {datetime.now().strftime('%H:%M:%S')} | {msg}")
 
     def sel_rec(self):
         p = filedialog.askdirectory()
@@ -277,74 +283,92 @@ class AppConciliador(ctk.CTkToplevel):
         if not self.path_rec.get() and not self.path_desp.get():
             messagebox.showwarning("Aviso", "Selecione pelo menos uma pasta!")
             return
+        if self.tarefas.ocupado:
+            return
             
         # Bloqueia botão para evitar duplo clique
         self.btn_run.configure(state="disabled", text="Processando... Aguarde")
-        self.progress.start()
+        self.progress.set(0)
         
-        # Inicia processamento em segundo plano (THREAD)
-        threading.Thread(target=self.rodar_processamento, daemon=True).start()
+        # Processamento em segundo plano; log, progresso e resultado voltam
+        # para a thread da interface pelo ExecutorTarefas
+        self.tarefas.executar(
+            self.rodar_processamento, self.path_rec.get(), self.path_desp.get(),
+            ao_log=self.log_message,
+            ao_progresso=lambda pct, _msg: self.progress.set(pct / 100),
+            ao_concluir=self._ao_concluir,
+            ao_erro=self._ao_erro,
+        )
 
-    def rodar_processamento(self):
-        try:
-            p_rec = Path(self.path_rec.get()) if self.path_rec.get() else None
-            p_desp = Path(self.path_desp.get()) if self.path_desp.get() else None
-            
-            arquivos_rec = list(p_rec.rglob("*.pdf")) if p_rec else []
-            arquivos_desp = list(p_desp.rglob("*.pdf")) if p_desp else []
-            
-            total_files = len(arquivos_rec) + len(arquivos_desp)
-            self.log_message(f"Iniciando. Total de arquivos: {total_files}")
-            
-            if total_files == 0:
-                self.log_message("Nenhum PDF encontrado.")
-                self.restaurar_interface()
-                return
-
-            # Processamento
-            itens = []
-            if arquivos_rec:
-                self.log_message("--- Processando Receitas ---")
-                itens += processar_lista_arquivos(arquivos_rec, "Receita", self.log_message)
-                
-            if arquivos_desp:
-                self.log_message("--- Processando Despesas ---")
-                itens += processar_lista_arquivos(arquivos_desp, "Despesa", self.log_message)
-
-            # Salvar
-            timestamp = datetime.now().strftime("%H%M%S")
-            nome_excel = f"Conciliacao_Final_{timestamp}.xlsx"
-            
-            # Pergunta onde salvar (precisa ser invocado na thread principal, mas aqui simplificamos)
-            # Vamos salvar na pasta de Downloads ou na pasta do script para evitar travar a thread
-            caminho_final = Path(os.getcwd()) / nome_excel
-            
-            self.log_message("Gerando Excel...")
-            tot_rec, tot_desp = salvar_excel(caminho_final, itens)
-            
-            self.log_message(f"CONCLUÍDO! Salvo em: {caminho_final}")
-            
-            # Mostra Resultado Final na Tela
-            saldo = tot_rec - tot_desp
-            msg_final = (f"PROCESSAMENTO FINALIZADO!\n\n"
-                         f"Receitas: R$ {format_br(tot_rec)}\n"
-                         f"Despesas: R$ {format_br(tot_desp)}\n"
-                         f"----------------\n"
-                         f"SALDO: R$ {format_br(saldo)}\n\n"
-                         f"Relatório salvo na pasta do programa.")
+    @staticmethod
+    def rodar_processamento(progresso, pasta_rec: str, pasta_desp: str):
+        """Worker: lê os PDFs e gera o Excel. Não acessa widgets."""
+        p_rec = Path(pasta_rec) if pasta_rec else None
+        p_desp = Path(pasta_desp) if pasta_desp else None
+        
+        arquivos_rec = list(p_rec.rglob("*.pdf")) if p_rec else []
+        arquivos_desp = list(p_desp.rglob("*.pdf")) if p_desp else []
+        
+        total_files = len(arquivos_rec) + len(arquivos_desp)
+        progresso.log(f"Iniciando. Total de arquivos: {total_files}")
+        
+        if total_files == 0:
+            progresso.log("Nenhum PDF encontrado.")
+            return None
+
+        # Processamento
+        itens = []
+        if arquivos_rec:
+            progresso.log("--- Processando Receitas ---")
+            itens += processar_lista_arquivos(
+                arquivos_rec, "Receita", progresso.log,
+                lambda i: progresso(100 * i / total_files))
             
-            messagebox.showinfo("Sucesso", msg_final)
+        if arquivos_desp:
+            progresso.log("--- Processando Despesas ---")
+            itens += processar_lista_arquivos(
+                arquivos_desp, "Despesa", progresso.log,
+                lambda i: progresso(100 * (len(arquivos_rec) + i) / total_files))
+
+        # Salvar
+        timestamp = datetime.now().strftime("%H%M%S")
+        nome_excel = f"Conciliacao_Final_{timestamp}.xlsx"
+        
+        # Salva na pasta do programa (o diálogo de arquivo só pode ser aberto na thread principal)
+        caminho_final = Path(os.getcwd()) / nome_excel
+        
+        progresso.log("Gerando Excel...")
+        tot_rec, tot_desp = salvar_excel(caminho_final, itens)
+        
+        progresso.log(f"CONCLUÍDO! Salvo em: {caminho_final}")
+        progresso(100)
+        return tot_rec, tot_desp
 
-            # Guarda saldo para o botão Salvar no SCG
-            self._ultimo_saldo_rp = saldo
-            self.btn_salvar_scg.configure(state="normal")
+    def _ao_concluir(self, totais):
+        self.restaurar_interface()
+        if totais is None:
+            return
 
-        except Exception as e:
-            self.log_message(f"ERRO CRÍTICO: {e}")
-            messagebox.showerror("Erro", str(e))
+        # Mostra Resultado Final na Tela
+        tot_rec, tot_desp = totais
+        saldo = tot_rec - tot_desp
+        msg_final = (f"PROCESSAMENTO FINALIZADO!\n\n"
+                     f"Receitas: R$ {format_br(tot_rec)}\n"
+                     f"Despesas: R$ {format_br(tot_desp)}\n"
+                     f"----------------\n"
+                     f"SALDO: R$ {format_br(saldo)}\n\n"
+                     f"Relatório salvo na pasta do programa.")
         
-        finally:
-            self.restaurar_interface()
+        messagebox.showinfo("Sucesso", msg_final)
+
+        # Guarda saldo para o botão Salvar no SCG
+        self._ultimo_saldo_rp = saldo
+        self.btn_salvar_scg.configure(state="normal")
+
+    def _ao_erro(self, erro: Exception):
+        self.restaurar_interface()
+        self.log_message(f"ERRO CRÍTICO: {erro}")
+        messagebox.showerror("Erro", str(erro))
 
     def _salvar_rp_scg(self):
         """Salva o saldo RP (Receita − Despesa) no banco de consolidação SCG."""
@@ -375,7 +399,6 @@ class AppConciliador(ctk.CTkToplevel):
         )
 
     def restaurar_interface(self):
-        self.progress.stop()
         self.progress.set(1)
         self.btn_run.configure(state="normal", text="⚡ PROCESSAR E CONCILIAR")
 
@@ -1,8 +1,12 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox, simpledialog
+from tkinter import filedialog, messagebox, simpledialog
 from database import DatabasePMPV
 from excel_handler import ExcelHandlerPMPV
+from importacao_contratos import importar_contratos, salvar_contratos
+from motor_pmpv import (DIAS_MES, TrimestreIncremental, calcular_trimestre, dias_trimestre,
+                        para_float)
+from sessoes_pmpv import IGUAL, comparar_sessoes
 
 # Configuração Visual
 ctk.set_appearance_mode("Dark")
@@ -20,14 +24,17 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         
         self.empresas_padrao = ["PETROBRAS", "GALP", "PETRORECONCAVO", "BRAVA", "ENEVA", "ORIZON"]
         
-        self.mapa_dias = {
-            "Janeiro": 31, "Fevereiro": 28, "Março": 31, "Abril": 30,
-            "Maio": 31, "Junho": 30, "Julho": 31, "Agosto": 31,
-            "Setembro": 30, "Outubro": 31, "Novembro": 30, "Dezembro": 31
-        }
+        self.mapa_dias = dict(DIAS_MES)
         self.lista_meses = list(self.mapa_dias.keys())
         self.dias_config = {"Mês 1": 30, "Mês 2": 30, "Mês 3": 30}
         self.dados_meses = {} 
+        self._scrolls = {}
+        
+        # PMPV ao vivo: somas parciais por linha/mês; redesenho adiado (debounce)
+        self.modelo = TrimestreIncremental(self.dias_config)
+        self._linhas_sujas = {}
+        self._redesenho = None
+        self.intervalo_redesenho_ms = 150
 
         self._setup_ui()
 
@@ -56,7 +63,7 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         for i in range(1, 4):
             nome = f"Mês {i}"
             self.tabview.add(nome)
-            self.dados_meses[nome] = self._criar_aba(self.tabview.tab(nome))
+            self.dados_meses[nome] = self._criar_aba(self.tabview.tab(nome), nome)
         
         self._atualizar_trimestre()
 
@@ -71,6 +78,7 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         self.entry_cg = ctk.CTkEntry(left, justify="center")
         self.entry_cg.insert(0, "-0.0210")
         self.entry_cg.pack(pady=5)
+        self.entry_cg.bind("<KeyRelease>", lambda _e: self._agendar_redesenho())
         ctk.CTkButton(left, text="⚡ CALCULAR", command=self.calcular, fg_color="#27ae60", hover_color="#2ecc71").pack(pady=5)
 
         # Centro: Resultados
@@ -84,11 +92,14 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         # Direita: Botões
         right = ctk.CTkFrame(foot, fg_color="transparent")
         right.pack(side="right", padx=20)
+        ctk.CTkButton(right, text="📥 Importar Contratos",  command=self.importar_planilha,    fg_color="#34495e").pack(pady=5)
+        ctk.CTkButton(right, text="📂 Abrir Sessão",        command=self.abrir_sessao,         fg_color="#34495e").pack(pady=5)
+        ctk.CTkButton(right, text="🔍 Comparar Sessões",    command=self.comparar_sessoes,     fg_color="#34495e").pack(pady=5)
         ctk.CTkButton(right, text="💾 Salvar Sessão",       command=self.salvar,               fg_color="#8e44ad").pack(pady=5)
         ctk.CTkButton(right, text="📅 Salvar PMPV Mensal",  command=self._salvar_pmpv_mensal,  fg_color="#16a085").pack(pady=5)
         ctk.CTkButton(right, text="📊 Exportar Excel",      command=self.exportar,             fg_color="#2980b9").pack(pady=5)
 
-    def _criar_aba(self, parent):
+    def _criar_aba(self, parent, mes):
         # Cabeçalho Tabela
         head = ctk.CTkFrame(parent, height=30, fg_color="#2c3e50")
         head.pack(fill="x", pady=5)
@@ -99,17 +110,26 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         # Scroll
         scroll = ctk.CTkScrollableFrame(parent, fg_color="transparent")
         scroll.pack(fill="both", expand=True)
+        self._scrolls[mes] = scroll
         
         linhas = []
-        for emp in self.empresas_padrao:
-            linhas.append(self._add_linha(scroll, emp, linhas))
+        linhas.extend(self._add_linhas(scroll, self.empresas_padrao, linhas, mes))
             
-        ctk.CTkButton(parent, text="➕ Adicionar", command=lambda: self._add_nova(scroll, linhas), fg_color="transparent", border_width=1).pack(pady=5)
+        ctk.CTkButton(parent, text="➕ Adicionar", command=lambda: self._add_nova(scroll, linhas, mes), fg_color="transparent", border_width=1).pack(pady=5)
         return linhas
 
-    def _add_linha(self, parent, nome, lista):
+    def _add_linha(self, parent, nome, lista, mes):
+        return self._add_linhas(parent, [nome], lista, mes)[0]
+
+    def _add_linhas(self, parent, nomes, lista, mes):
+        """Monta todas as linhas fora do layout e só então as empacota, numa passada"""
+        novas = [self._montar_linha(parent, nome, lista, mes) for nome in nomes]
+        for d in novas:
+            d['nome'].master.pack(fill="x", pady=2)
+        return novas
+
+    def _montar_linha(self, parent, nome, lista, mes):
         row = ctk.CTkFrame(parent)
-        row.pack(fill="x", pady=2)
         
         conf = {"width": 100, "height": 30}
         
@@ -127,30 +147,60 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
         ctk.CTkButton(row, text="📋", width=40, command=lambda: self._popup_copy(dados), fg_color="#8e44ad").pack(side="left", padx=2)
         ctk.CTkButton(row, text="🗑️", width=40, command=lambda: self._del_linha(row, dados, lista), fg_color="#c0392b").pack(side="left", padx=2)
 
-        dados = {'nome': e_nom, 'mol': e_mol, 'trans': e_tra, 'log': e_log, 'tot': l_tot, 'vol': e_vol}
+        dados = {'nome': e_nom, 'mol': e_mol, 'trans': e_tra, 'log': e_log, 'tot': l_tot, 'vol': e_vol, 'mes': mes}
         
-        # Bind Cálculo
-        for e in [e_mol, e_tra, e_log]:
+        # Bind Cálculo (só a linha editada entra no modelo)
+        for e in [e_mol, e_tra, e_log, e_vol]:
             e._entry.bind("<KeyRelease>", lambda e, d=dados: self._calc_row(d))
             
         return dados
 
     def _calc_row(self, d):
-        tot = self._val(d['mol']) + self._val(d['trans']) + self._val(d['log'])
-        d['tot'].configure(text=f"{tot:.4f}")
+        """Troca só a contribuição da linha no modelo e agenda o redesenho"""
+        preco = self.modelo.definir_linha(id(d), d['mes'], d['mol'].get(), d['trans'].get(),
+                                          d['log'].get(), d['vol'].get())
+        self._linhas_sujas[id(d)] = (d, preco)
+        self._agendar_redesenho()
+
+    def _agendar_redesenho(self):
+        if self._redesenho is None:
+            self._redesenho = self.after(self.intervalo_redesenho_ms, self._redesenhar)
+
+    def _redesenhar(self):
+        """Aplica de uma vez os totais das linhas editadas e o PMPV ao vivo"""
+        self._redesenho = None
+        for d, preco in self._linhas_sujas.values():
+            if d['tot'].winfo_exists():
+                d['tot'].configure(text=f"{preco:.4f}")
+        self._linhas_sujas.clear()
+
+        res = self.modelo.resultado(self._val(self.entry_cg))
+        pmpv, final = (res['pmpv'], res['preco_final']) if res else (0.0, 0.0)
+        self.lbl_pmpv.configure(text=f"PMPV: R$ {pmpv:.4f}")
+        self.lbl_final.configure(text=f"PREÇO FINAL: R$ {final:.4f}")
+
+    def _atualizar_resultado(self):
+        """Após trocar as entradas em bloco, o resultado salvo/exportado passa a ser o do modelo"""
+        res = self.modelo.resultado(self._val(self.entry_cg))
+        if res:
+            self.res_final = res
+        elif hasattr(self, 'res_final'):
+            del self.res_final
 
     def _val(self, e):
-        try: return float(e.get().replace(',', '.'))
-        except: return 0.0
+        return para_float(e.get())
 
-    def _add_nova(self, parent, lista):
-        novo = self._add_linha(parent, "Nova Empresa", lista)
+    def _add_nova(self, parent, lista, mes):
+        novo = self._add_linha(parent, "Nova Empresa", lista, mes)
         lista.append(novo)
 
     def _del_linha(self, row, dados, lista):
         if messagebox.askyesno("Remover", "Apagar linha?"):
             row.destroy()
             if dados in lista: lista.remove(dados)
+            self.modelo.remover(id(dados))
+            self._linhas_sujas.pop(id(dados), None)
+            self._agendar_redesenho()
 
     def _popup_copy(self, origem):
         top = ctk.CTkToplevel(self)
@@ -181,38 +231,28 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
     def _atualizar_trimestre(self, _=None):
         mes = self.combo_mes.get()
         if not mes: return
-        idx = self.lista_meses.index(mes)
-        biss = self.chk_biss.get()
-        
-        for i in range(3):
-            m_atual = self.lista_meses[(idx + i) % 12]
-            dias = self.mapa_dias[m_atual]
-            if m_atual == "Fevereiro" and biss: dias = 29
+        for i, dias in enumerate(dias_trimestre(mes, bool(self.chk_biss.get()))):
             self.dias_config[f"Mês {i+1}"] = dias
+            self.modelo.definir_dias(f"Mês {i+1}", dias)
+        self._agendar_redesenho()
 
     def calcular(self):
-        c_tot = v_tot = 0.0
+        """Lê as entradas e delega o cálculo ao ``motor_pmpv``"""
         cg = self._val(self.entry_cg)
+        dados = {k: [{'molecula': l['mol'].get(), 'transporte': l['trans'].get(),
+                      'logistica': l['log'].get(), 'volume': l['vol'].get()} for l in linhas]
+                 for k, linhas in self.dados_meses.items()}
+        dias = [self.dias_config.get(k, 30) for k in dados]
         
-        for k, linhas in self.dados_meses.items():
-            dias = self.dias_config.get(k, 30)
-            for l in linhas:
-                vol = self._val(l['vol'])
-                if vol > 0:
-                    v_mes = vol * dias
-                    pr = self._val(l['mol']) + self._val(l['trans']) + self._val(l['log'])
-                    c_tot += pr * v_mes
-                    v_tot += v_mes
+        try:
+            res = calcular_trimestre(dados, dias, cg)
+        except ValueError:
+            return messagebox.showwarning("Erro", "Volume Zero")
         
-        if v_tot == 0: return messagebox.showwarning("Erro", "Volume Zero")
+        self.lbl_pmpv.configure(text=f"PMPV: R$ {res['pmpv']:.4f}")
+        self.lbl_final.configure(text=f"PREÇO FINAL: R$ {res['preco_final']:.4f}")
         
-        pmpv = c_tot / v_tot
-        final = pmpv + cg
-        
-        self.lbl_pmpv.configure(text=f"PMPV: R$ {pmpv:.4f}")
-        self.lbl_final.configure(text=f"PREÇO FINAL: R$ {final:.4f}")
-        
-        self.res_final = {'volume_total': v_tot, 'custo_total': c_tot, 'pmpv': pmpv, 'conta_grafica': cg, 'preco_final': final}
+        self.res_final = res
 
     def _get_data_dict(self):
         idx_start = self.lista_meses.index(self.combo_mes.get())
@@ -230,6 +270,121 @@ class CalculadoraTrimestralPMPV(ctk.CTkToplevel):
             export[real_name] = linhas
         return export
 
+    # ── Sessões salvas ──
+
+    def _escolher_sessao(self, titulo, texto="Sessão"):
+        sessoes = self.db.listar_sessoes()
+        if not sessoes:
+            messagebox.showinfo(titulo, "Nenhuma sessão salva.")
+            return None
+        lista = "\n".join(f"  {s['id']:>4}  {s['nome']}" for s in sessoes[:15])
+        sid = simpledialog.askinteger(titulo, f"{lista}\n\nID da {texto}:", parent=self)
+        if sid is None:
+            return None
+        sessao = self.db.carregar_sessao(sid)
+        if sessao is None:
+            messagebox.showwarning(titulo, f"Sessão {sid} não encontrada.")
+        return sessao
+
+    def abrir_sessao(self):
+        sessao = self._escolher_sessao("Abrir Sessão")
+        if sessao is None: return
+        por_mes = sessao.por_mes()
+        for mes in self.dados_meses:
+            self._preencher_mes(mes, por_mes.get(mes, []))
+        if sessao.resultado and sessao.resultado.get('conta_grafica') is not None:
+            self._definir(self.entry_cg, sessao.resultado['conta_grafica'])
+        self._redesenhar()
+        self._atualizar_resultado()
+        self.title(f"Sistema PMPV Master - {sessao.nome}")
+
+    def importar_planilha(self):
+        caminho = filedialog.askopenfilename(
+            title="Planilha de contratos",
+            filetypes=[("Planilhas", "*.xlsx *.xls *.csv"), ("Todos", "*.*")],
+        )
+        if not caminho: return
+        try:
+            dados, erros = importar_contratos(caminho)
+        except Exception as e:
+            return messagebox.showerror("Erro", f"Falha ao ler a planilha:\n{e}")
+
+        total = sum(len(v) for v in dados.values())
+        if erros:
+            resumo = "\n".join(f"  Linha {e['linha']}: {e['erro']}" for e in erros[:10])
+            if len(erros) > 10:
+                resumo += f"\n  ... e mais {len(erros) - 10}"
+            if not messagebox.askyesno("Importar Contratos",
+                                       f"{len(erros)} erro(s) encontrados:\n{resumo}\n\n"
+                                       f"Importar as {total} linha(s) válidas?"):
+                return
+        if not total:
+            return messagebox.showwarning("Importar Contratos", "Nenhuma linha válida.")
+
+        for mes in self.dados_meses:
+            self._preencher_mes(mes, dados.get(mes, []))
+        self._redesenhar()
+        self._atualizar_resultado()
+
+        nome = simpledialog.askstring("Importar Contratos", "Salvar como sessão (nome):", parent=self)
+        if nome:
+            salvar_contratos(self.db, nome, dados)
+        messagebox.showinfo("Sucesso", f"{total} linha(s) importadas.")
+
+    def _preencher_mes(self, mes, registros):
+        """Reaproveita as linhas já criadas; só cria as que faltam e apaga as que sobram"""
+        linhas = self.dados_meses[mes]
+        faltam = len(registros) - len(linhas)
+        if faltam > 0:
+            linhas.extend(self._add_linhas(self._scrolls[mes], [""] * faltam, linhas, mes))
+        for d in linhas[len(registros):]:
+            d['nome'].master.destroy()
+            self.modelo.remover(id(d))
+            self._linhas_sujas.pop(id(d), None)
+        del linhas[len(registros):]
+
+        for d, r in zip(linhas, registros):
+            self._definir(d['nome'], r['empresa'])
+            for chave, campo in [('mol', 'molecula'), ('trans', 'transporte'), ('log', 'logistica'), ('vol', 'volume')]:
+                self._definir(d[chave], r[campo])
+            preco = self.modelo.definir_linha(id(d), mes, r['molecula'], r['transporte'],
+                                              r['logistica'], r['volume'])
+            self._linhas_sujas[id(d)] = (d, preco)
+
+    def _definir(self, entry, valor):
+        if isinstance(valor, float):
+            texto = repr(valor)
+            valor = texto[:-2] if texto.endswith(".0") else texto
+        entry.delete(0, "end")
+        entry.insert(0, valor)
+
+    def comparar_sessoes(self):
+        a = self._escolher_sessao("Comparar Sessões", "sessão base")
+        if a is None: return
+        b = self._escolher_sessao("Comparar Sessões", "sessão comparada")
+        if b is None: return
+
+        diferencas = [d for d in comparar_sessoes(a, b) if d['status'] != IGUAL]
+        top = ctk.CTkToplevel(self)
+        top.geometry("700x500")
+        top.title(f"{a.nome} × {b.nome}")
+        top.transient(self)
+        texto = ctk.CTkTextbox(top, font=("Consolas", 12))
+        texto.pack(fill="both", expand=True, padx=10, pady=10)
+
+        linhas = []
+        for d in diferencas:
+            campos = ", ".join(
+                f"{c}: {'-' if va is None else f'{va:.4f}'} → {'-' if vb is None else f'{vb:.4f}'}"
+                for c, (va, vb) in ((c, d[c]) for c in ('molecula', 'transporte', 'logistica', 'volume') if c in d))
+            linhas.append(f"Mês {d['mes']}  {d['empresa']:<20} {d['status'].upper():<9} {campos}")
+        ra, rb = a.resultado or {}, b.resultado or {}
+        if ra.get('pmpv') is not None and rb.get('pmpv') is not None:
+            linhas.append(f"\nPMPV: R$ {ra['pmpv']:.4f} → R$ {rb['pmpv']:.4f} "
+                          f"({rb['pmpv'] - ra['pmpv']:+.4f})")
+        texto.insert("end", "\n".join(linhas) or "Sessões idênticas.")
+        texto.configure(state="disabled")
+
     def salvar(self):
         nome = simpledialog.askstring("Salvar", "Nome da Sessão:")
         if not nome or not hasattr(self, 'res_final'): return
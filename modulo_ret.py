@@ -1,14 +1,17 @@
 import os
-import sqlite3
-import pandas as pd
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-import pdfplumber
-import re
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+from database import BANCO_CENTRAL
+from extrator_ret import (extrair_dados_ret, extrair_empresa, extrair_tipo_nota,
+                          identificar_tipo)
+from log_lote import LogEmLote
+from relatorio_ret import exportar_relatorio_ret
+from repositorio_ret import NOME_BANCO, RepositorioRET
+from saida_arquivos import gravar_arquivo
+from tabela_virtual import Coluna, TabelaVirtual, chave_data, chave_numero
+from tarefas import ExecutorTarefas
 
 # Configuração Visual
 ctk.set_appearance_mode("Dark")
@@ -17,6 +20,20 @@ ctk.set_default_color_theme("blue")
 # Taxa de câmbio EUR → BRL (ajuste conforme a cotação desejada)
 TAXA_EUR_BRL = 6.0
 
+
+def resumir_por_tipo(dados):
+    """Totais por tipo de encargo das notas em memória, no formato de ``RepositorioRET.totais``"""
+    resumo = {}
+    for d in dados:
+        tipo = resumo.setdefault(d['tipo_encargo'], {'tipo_encargo': d['tipo_encargo'], 'notas': 0,
+                                                     'com_valores': 0, 'valor_total': 0.0,
+                                                     'quantidade': 0.0})
+        tipo['notas'] += 1
+        tipo['com_valores'] += d['valor_total'] > 0
+        tipo['valor_total'] += d['valor_total']
+        tipo['quantidade'] += d.get('quantidade') or 0.0
+    return [resumo[t] for t in sorted(resumo)]
+
 class SistemaRET(ctk.CTkToplevel):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -28,6 +45,8 @@ class SistemaRET(ctk.CTkToplevel):
         self.pasta_selecionada = None
         self.dados_processados = []
         self.resultados = None
+        self.tarefas = ExecutorTarefas(self)
+        self._token = None
         
         self._setup_ui()
     
@@ -85,8 +104,8 @@ class SistemaRET(ctk.CTkToplevel):
             hover_color="#1976D2"
         ).pack(pady=10, padx=20, fill="x")
         
-        # BOTÃO PROCESSAR
-        ctk.CTkButton(
+        # BOTÃO PROCESSAR (vira CANCELAR durante o processamento)
+        self.btn_processar = ctk.CTkButton(
             left,
             text="PROCESSAR PDFs",
             command=self.processar,
@@ -94,7 +113,15 @@ class SistemaRET(ctk.CTkToplevel):
             font=("Roboto", 16, "bold"),
             fg_color="#4CAF50",
             hover_color="#45a049"
-        ).pack(pady=30, padx=20, fill="x")
+        )
+        self.btn_processar.pack(pady=(30, 10), padx=20, fill="x")
+        
+        self.progresso = ctk.CTkProgressBar(left)
+        self.progresso.set(0)
+        self.progresso.pack(pady=(0, 5), padx=20, fill="x")
+        
+        self.lbl_progresso = ctk.CTkLabel(left, text="", font=("Roboto", 11), text_color="#808080")
+        self.lbl_progresso.pack(padx=20)
         
         # PAINEL DIREITO - Resultados
         right = ctk.CTkFrame(main, corner_radius=15)
@@ -128,8 +155,24 @@ class SistemaRET(ctk.CTkToplevel):
         self.lbl_stats.pack(pady=20, padx=20, anchor="w")
         
         # ABA DADOS DETALHADOS
-        self.frame_dados = ctk.CTkScrollableFrame(self.tabview.tab("Dados Detalhados"))
-        self.frame_dados.pack(fill="both", expand=True)
+        # Só as linhas visíveis são desenhadas; ordenação no cabeçalho e
+        # filtros por tipo/empresa atuam sobre todos os registros
+        self.tabela_dados = TabelaVirtual(
+            self.tabview.tab("Dados Detalhados"),
+            colunas=[
+                Coluna("Tipo", 'tipo_encargo', 80),
+                Coluna("Empresa", 'empresa', 150),
+                Coluna("Nota", 'nota_tipo', 80),
+                Coluna("Nº", 'numero_nd', 100, chave=chave_numero),
+                Coluna("Vencimento", 'data_vencimento', 100, chave=chave_data),
+                Coluna("Valor Total", 'valor_total', 120, lambda v: f"{v * TAXA_EUR_BRL:.2f}"),
+                Coluna("QT", 'quantidade', 80, lambda v: f"{v:.2f}"),
+                Coluna("Valor Unit.", 'valor_unitario', 100, lambda v: f"{v * TAXA_EUR_BRL:.2f}"),
+            ],
+            filtros=['tipo_encargo', 'empresa'],
+            fg_color="transparent",
+        )
+        self.tabela_dados.pack(fill="both", expand=True)
         
         # ABA LOGS
         self.txt_logs = ctk.CTkTextbox(
@@ -137,6 +180,7 @@ class SistemaRET(ctk.CTkToplevel):
             font=("Consolas", 11)
         )
         self.txt_logs.pack(fill="both", expand=True, padx=10, pady=10)
+        self.log_lote = LogEmLote(self.txt_logs, arquivo=LogEmLote.caminho("ret"))
         
         # ABA SEM VALORES (PDFs processados mas sem valores extraídos)
         self.txt_sem_valores = ctk.CTkTextbox(
@@ -173,6 +217,26 @@ class SistemaRET(ctk.CTkToplevel):
         btn_frame = ctk.CTkFrame(footer, fg_color="transparent")
         btn_frame.pack(side="right", padx=30, pady=20)
         
+        ctk.CTkButton(
+            btn_frame,
+            text="Carregar do Banco",
+            command=self.carregar_db,
+            width=140,
+            height=35,
+            fg_color="#607D8B",
+            hover_color="#455A64"
+        ).pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            btn_frame,
+            text="Histórico Central",
+            command=self.carregar_historico,
+            width=140,
+            height=35,
+            fg_color="#546E7A",
+            hover_color="#37474F"
+        ).pack(side="left", padx=5)
+        
         ctk.CTkButton(
             btn_frame,
             text="Salvar no Banco",
@@ -206,9 +270,7 @@ class SistemaRET(ctk.CTkToplevel):
     def log(self, mensagem):
         """Adiciona mensagem ao log"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.txt_logs.insert("end", f"[{timestamp}] {mensagem}\n")
-        self.txt_logs.see("end")
-        self.update()
+        self.log_lote.escrever(f"[{timestamp}] {mensagem}")
     
     def selecionar_pasta(self):
         """Seleciona pasta para processamento"""
@@ -222,114 +284,32 @@ class SistemaRET(ctk.CTkToplevel):
             )
             self.log(f"Pasta selecionada: {pasta}")
     
-    def extrair_dados_pdf(self, caminho_pdf):
-        """Extrai informações estruturadas do PDF"""
-        dados = {
-            'arquivo': os.path.basename(caminho_pdf),
-            'caminho': caminho_pdf,
-            'tipo_encargo': self._identificar_tipo(caminho_pdf),
-            'empresa': self._extrair_empresa(caminho_pdf),
-            'nota_tipo': self._extrair_tipo_nota(caminho_pdf),
-            'numero_nd': '',
-            'data_vencimento': '',
-            'valor_total': 0.0,
-            'quantidade': 0.0,
-            'valor_unitario': 0.0,
-            'valores_encontrados': []
-        }
-        
-        try:
-            with pdfplumber.open(caminho_pdf) as pdf:
-                texto_completo = ''
-                
-                for pagina in pdf.pages:
-                    texto = pagina.extract_text()
-                    if texto:
-                        texto_completo += texto + '\n'
-                
-                # Extrair número ND
-                nd_match = re.search(r'ND\s*[:\-]?\s*(\d+)', texto_completo, re.IGNORECASE)
-                if nd_match:
-                    dados['numero_nd'] = nd_match.group(1)
-                
-                # Extrair data
-                data_match = re.search(r'(\d{2}[/-]\d{2}[/-]\d{4})', texto_completo)
-                if data_match:
-                    dados['data_vencimento'] = data_match.group(1)
-                
-                # Extrair valores
-                padroes_valores = [
-                    r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-                    r'€\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-                    r'(\d{1,3}(?:\.\d{3})*,\d{2})',
-                ]
-                
-                for padrao in padroes_valores:
-                    matches = re.findall(padrao, texto_completo)
-                    for match in matches:
-                        valor_str = match.replace('.', '').replace(',', '.')
-                        try:
-                            valor = float(valor_str)
-                            if valor > 0:
-                                dados['valores_encontrados'].append(valor)
-                        except:
-                            pass
-                
-                # Calcular valores principais
-                if dados['valores_encontrados']:
-                    dados['valor_total'] = max(dados['valores_encontrados'])
-                    
-                    # Tentar encontrar quantidade
-                    qt_match = re.search(r'(?:QT|Quantidade)[:\s]*(\d+(?:[.,]\d+)?)', texto_completo, re.IGNORECASE)
-                    if qt_match:
-                        dados['quantidade'] = float(qt_match.group(1).replace(',', '.'))
-                    
-                    if dados['quantidade'] > 0:
-                        dados['valor_unitario'] = dados['valor_total'] / dados['quantidade']
-                
-        except Exception as e:
-            self.log(f"Erro ao processar {caminho_pdf}: {e}")
-        
+    def extrair_dados_pdf(self, caminho_pdf, log=None):
+        """Extrai informações estruturadas do PDF (ver ``extrator_ret``)"""
+        dados = extrair_dados_ret(caminho_pdf)
+        if dados['erro']:
+            (log or self.log)(f"Erro ao processar {caminho_pdf}: {dados['erro']}")
         return dados
     
     def _identificar_tipo(self, caminho):
         """Identifica tipo de encargo pela pasta"""
-        if 'EAT' in caminho.upper():
-            return 'EAT'
-        elif 'PENALIDADE' in caminho.upper():
-            return 'Penalidades'
-        elif 'TOP' in caminho.upper():
-            return 'TOP'
-        return 'Outros'
+        return identificar_tipo(caminho)
     
     def _extrair_empresa(self, caminho):
         """Extrai nome da empresa do nome do arquivo"""
-        nome = os.path.basename(caminho).upper()
-        empresas_conhecidas = [
-            'COPERGAS', 'AMBEV', 'CBA', 'CERVEJARIA', 'DEXCO', 'GERDAU',
-            'INDORAMA', 'INGREDION', 'KLABIN', 'MONDELEZ', 'NISSIN', 'VETRUS',
-            'M DIAS BRANCO', 'PETROBRAS', 'GALP'
-        ]
-        
-        for empresa in empresas_conhecidas:
-            if empresa in nome:
-                return empresa
-        
-        return 'N/A'
+        return extrair_empresa(caminho)
     
     def _extrair_tipo_nota(self, caminho):
         """Identifica se é Nota Débito ou Crédito"""
-        nome = os.path.basename(caminho).upper()
-        
-        if 'ND' in nome or 'DEBITO' in nome or 'DÉBITO' in nome:
-            return 'Débito'
-        elif 'NC' in nome or 'CREDITO' in nome or 'CRÉDITO' in nome:
-            return 'Crédito'
-        
-        return 'N/A'
+        return extrair_tipo_nota(caminho)
     
     def processar(self):
-        """Processa todos os PDFs da pasta selecionada"""
+        """Processa todos os PDFs da pasta selecionada (em segundo plano)"""
+        if self.tarefas.ocupado:
+            self._token.cancelar()
+            self.btn_processar.configure(state="disabled", text="Cancelando...")
+            return
+        
         if not self.pasta_selecionada:
             messagebox.showwarning("Aviso", "Selecione uma pasta primeiro!")
             return
@@ -338,42 +318,84 @@ class SistemaRET(ctk.CTkToplevel):
         self.log("INICIANDO PROCESSAMENTO")
         self.log("="*60)
         
-        self.dados_processados = []
-        arquivos_processados = 0
-        
-        for raiz, _, ficheiros in os.walk(self.pasta_selecionada):
-            for ficheiro in ficheiros:
-                if ficheiro.lower().endswith('.pdf'):
-                    caminho_completo = os.path.join(raiz, ficheiro)
-                    
-                    self.log(f"[PDF] Processando: {ficheiro}")
-                    
-                    dados_pdf = self.extrair_dados_pdf(caminho_completo)
-                    
-                    if dados_pdf['valores_encontrados']:
-                        self.dados_processados.append(dados_pdf)
-                        self.log(f"   [OK] {len(dados_pdf['valores_encontrados'])} valores")
-                    else:
-                        self.dados_processados.append(dados_pdf)
-                        self.log(f"   [AVISO] Sem valores")
-                    
-                    arquivos_processados += 1
-        
-        # Processar resultados
-        self._mostrar_resultados(arquivos_processados)
+        self.progresso.set(0)
+        self.btn_processar.configure(text="CANCELAR", fg_color="#c0392b", hover_color="#a93226")
+        self._token = self.tarefas.executar(
+            self._processar_pasta, self.pasta_selecionada,
+            ao_progresso=self._ao_progresso,
+            ao_log=self.log,
+            ao_concluir=self._ao_concluir_processamento,
+            ao_erro=self._ao_erro_processamento,
+            ao_cancelar=self._ao_cancelar_processamento,
+        )
     
-    def _mostrar_resultados(self, total_arquivos):
-        """Exibe resultados do processamento"""
+    def _processar_pasta(self, progresso, pasta):
+        """Worker: lista os PDFs e extrai em paralelo num pool de processos"""
+        caminhos = [
+            os.path.join(raiz, ficheiro)
+            for raiz, _, ficheiros in os.walk(pasta)
+            for ficheiro in ficheiros
+            if ficheiro.lower().endswith('.pdf')
+        ]
+        progresso.log(f"{len(caminhos)} PDF(s) encontrados")
+        
+        def _registrar(dados_pdf):
+            progresso.log(f"[PDF] {dados_pdf['arquivo']}")
+            if dados_pdf['erro']:
+                progresso.log(f"   [ERRO] {dados_pdf['erro']}")
+            elif dados_pdf['valores_encontrados']:
+                progresso.log(f"   [OK] {len(dados_pdf['valores_encontrados'])} valores")
+            else:
+                progresso.log(f"   [AVISO] Sem valores")
+        
+        # Resultados voltam na ordem da pasta, independente de qual processo terminou antes
+        return self.tarefas.mapear_no_worker(progresso, extrair_dados_ret, caminhos,
+                                             por_item=_registrar)
+    
+    def _ao_progresso(self, percentual, mensagem):
+        self.progresso.set(percentual / 100)
+        self.lbl_progresso.configure(text=mensagem or "")
+    
+    def _restaurar_botao(self):
+        self.btn_processar.configure(state="normal", text="PROCESSAR PDFs",
+                                     fg_color="#4CAF50", hover_color="#45a049")
+    
+    def _ao_concluir_processamento(self, dados):
+        self._restaurar_botao()
+        self.dados_processados = dados
+        self._mostrar_resultados(len(dados))
+    
+    def _ao_erro_processamento(self, erro):
+        self._restaurar_botao()
+        self.log(f"[ERRO] {erro}")
+        messagebox.showerror("Erro", f"Erro no processamento: {erro}")
+    
+    def _ao_cancelar_processamento(self):
+        self._restaurar_botao()
+        self.lbl_progresso.configure(text="Cancelado")
+        self.log("Processamento cancelado pelo usuário.")
+    
+    def _mostrar_resultados(self, total_arquivos, resumo=None, sem_valores=None):
+        """Exibe resultados do processamento
+        
+        ``resumo`` (totais por tipo) e ``sem_valores`` vêm do banco quando as notas
+        foram carregadas de lá; sem eles, são calculados das notas em memória.
+        """
+        if resumo is None:
+            resumo = resumir_por_tipo(self.dados_processados)
+        if sem_valores is None:
+            sem_valores = [d for d in self.dados_processados if not d.get('valor_total')]
+        
         # Sempre atualizar a aba Sem Valores (mesmo quando nenhum foi processado)
-        self._mostrar_sem_valores()
+        self._mostrar_sem_valores(sem_valores)
         
         if not self.dados_processados:
             messagebox.showwarning("Aviso", "Nenhum PDF foi processado! Verifique a pasta e os tipos de encargo selecionados.")
             return
         
         # Calcular estatísticas
-        total_geral = sum(d['valor_total'] for d in self.dados_processados)
-        com_valores = len([d for d in self.dados_processados if d['valor_total'] > 0])
+        total_geral = sum(t['valor_total'] for t in resumo)
+        com_valores = sum(t['com_valores'] for t in resumo)
         
         # Converter para Reais (BRL)
         total_geral_brl = total_geral * TAXA_EUR_BRL
@@ -381,15 +403,6 @@ class SistemaRET(ctk.CTkToplevel):
         # Atualizar total
         self.lbl_total.configure(text=f"R$ {total_geral_brl:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
         
-        # Resumo por tipo
-        resumo_tipos = {}
-        for d in self.dados_processados:
-            tipo = d['tipo_encargo']
-            if tipo not in resumo_tipos:
-                resumo_tipos[tipo] = {'count': 0, 'total': 0}
-            resumo_tipos[tipo]['count'] += 1
-            resumo_tipos[tipo]['total'] += d['valor_total']
-        
         # Atualizar aba resumo
         for widget in self.frame_resumo.winfo_children():
             widget.destroy()
@@ -405,11 +418,11 @@ Valor Total: {total_brl_fmt}
 RESUMO POR TIPO:
 """
         
-        for tipo, stats in resumo_tipos.items():
-            total_tipo_brl = stats['total'] * TAXA_EUR_BRL
+        for stats in resumo:
+            total_tipo_brl = stats['valor_total'] * TAXA_EUR_BRL
             total_tipo_fmt = f"R$ {total_tipo_brl:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            stats_text += f"\n{tipo}:\n"
-            stats_text += f"  - Arquivos: {stats['count']}\n"
+            stats_text += f"\n{stats['tipo_encargo']}:\n"
+            stats_text += f"  - Arquivos: {stats['notas']}\n"
             stats_text += f"  - Total: {total_tipo_fmt}\n"
         
         ctk.CTkLabel(
@@ -430,60 +443,15 @@ RESUMO POR TIPO:
         messagebox.showinfo("Sucesso", f"Processados {total_arquivos} PDFs!\nTotal: {total_msg}")
     
     def _mostrar_dados_detalhados(self):
-        """Mostra tabela com dados detalhados"""
-        for widget in self.frame_dados.winfo_children():
-            widget.destroy()
-        
-        # Cabeçalho
-        header = ctk.CTkFrame(self.frame_dados, fg_color="#2c3e50")
-        header.pack(fill="x", pady=(0, 5))
-        
-        colunas = [
-            ("Tipo", 80), ("Empresa", 150), ("Nota", 80),
-            ("Nº", 100), ("Vencimento", 100), ("Valor Total", 120),
-            ("QT", 80), ("Valor Unit.", 100)
-        ]
-        
-        for txt, w in colunas:
-            ctk.CTkLabel(
-                header, 
-                text=txt, 
-                width=w,
-                font=("Roboto", 11, "bold")
-            ).pack(side="left", padx=2)
-        
-        # Dados (valores em Reais na exibição)
-        for d in self.dados_processados[:50]:  # Limitar para não sobrecarregar
-            row = ctk.CTkFrame(self.frame_dados, fg_color="#34495e")
-            row.pack(fill="x", pady=1)
-            v_total_brl = d['valor_total'] * TAXA_EUR_BRL
-            v_unit_brl = d['valor_unitario'] * TAXA_EUR_BRL
-            valores = [
-                (d['tipo_encargo'], 80),
-                (d['empresa'], 150),
-                (d['nota_tipo'], 80),
-                (d['numero_nd'], 100),
-                (d['data_vencimento'], 100),
-                (f"{v_total_brl:.2f}", 120),
-                (f"{d['quantidade']:.2f}", 80),
-                (f"{v_unit_brl:.2f}", 100)
-            ]
-            
-            for val, w in valores:
-                ctk.CTkLabel(
-                    row,
-                    text=str(val),
-                    width=w,
-                    font=("Roboto", 10)
-                ).pack(side="left", padx=2)
+        """Mostra tabela com dados detalhados (valores em Reais na exibição)"""
+        self.tabela_dados.definir_linhas(self.dados_processados)
     
-    def _mostrar_sem_valores(self):
+    def _mostrar_sem_valores(self, sem_valores):
         """Preenche a aba Sem Valores com os PDFs processados nos quais não foi extraído nenhum valor"""
         self.txt_sem_valores.delete("1.0", "end")
         if not self.dados_processados:
             self.txt_sem_valores.insert("end", "Nenhum processamento realizado.\nSelecione a pasta e clique em PROCESSAR PDFs.")
             return
-        sem_valores = [d for d in self.dados_processados if not d.get('valores_encontrados') or d.get('valor_total', 0) == 0]
         if not sem_valores:
             self.txt_sem_valores.insert("end", "Nenhum arquivo sem valores.\n\nTodos os PDFs processados tiveram pelo menos um valor extraído.")
             return
@@ -504,47 +472,26 @@ RESUMO POR TIPO:
         if not self.dados_processados:
             messagebox.showwarning("Aviso", "Processe os PDFs primeiro!")
             return
+        if not self.pasta_selecionada:
+            messagebox.showwarning("Aviso", "Selecione a pasta onde gravar o banco!")
+            return
         
         try:
-            db_path = os.path.join(self.pasta_selecionada, 'RET_dados.db')
-            conexao = sqlite3.connect(db_path)
-            cursor = conexao.cursor()
-            
-            # Criar tabela
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS dados_ret (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo_encargo TEXT,
-                    empresa TEXT,
-                    nota_tipo TEXT,
-                    numero_nd TEXT,
-                    data_vencimento TEXT,
-                    valor_total REAL,
-                    quantidade REAL,
-                    valor_unitario REAL,
-                    arquivo TEXT,
-                    caminho TEXT,
-                    data_processamento TEXT
-                )
-            ''')
-            
-            # Inserir dados
-            for d in self.dados_processados:
-                cursor.execute('''
-                    INSERT INTO dados_ret (
-                        tipo_encargo, empresa, nota_tipo, numero_nd,
-                        data_vencimento, valor_total, quantidade, valor_unitario,
-                        arquivo, caminho, data_processamento
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    d['tipo_encargo'], d['empresa'], d['nota_tipo'], d['numero_nd'],
-                    d['data_vencimento'], d['valor_total'], d['quantidade'], d['valor_unitario'],
-                    d['arquivo'], d['caminho'], datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                ))
+            repositorio = RepositorioRET.da_pasta(self.pasta_selecionada)
+            try:
+                gravados = repositorio.salvar(self.dados_processados)
+            finally:
+                repositorio.fechar()
+            db_path = repositorio.db_path
             
-            conexao.commit()
-            conexao.close()
+            # Histórico central: o banco da pasta é mesclado no pmpv_data.db (botão Histórico Central)
+            central = RepositorioRET(BANCO_CENTRAL)
+            try:
+                central.importar(db_path)
+            finally:
+                central.fechar()
             
+            self.log(f"[OK] {gravados} notas gravadas/atualizadas")
             self.log(f"[OK] Dados salvos em: {db_path}")
             messagebox.showinfo("Sucesso", f"Dados salvos no banco!\n{db_path}")
             
@@ -552,6 +499,50 @@ RESUMO POR TIPO:
             self.log(f"[ERRO] Falha ao salvar: {e}")
             messagebox.showerror("Erro", f"Erro ao salvar: {e}")
     
+    def carregar_db(self):
+        """Carrega as notas gravadas no RET_dados.db da pasta, sem reprocessar os PDFs"""
+        if not self.pasta_selecionada:
+            messagebox.showwarning("Aviso", "Selecione uma pasta primeiro!")
+            return
+        if self.tarefas.ocupado:
+            messagebox.showwarning("Aviso", "Aguarde o processamento em andamento.")
+            return
+        
+        db_path = os.path.join(self.pasta_selecionada, NOME_BANCO)
+        if not os.path.exists(db_path):
+            messagebox.showwarning("Aviso", f"Nenhum banco salvo nesta pasta.\n{db_path}")
+            return
+        self._carregar_banco(db_path)
+    
+    def carregar_historico(self):
+        """Carrega o histórico central (notas de todas as pastas já salvas)"""
+        if self.tarefas.ocupado:
+            messagebox.showwarning("Aviso", "Aguarde o processamento em andamento.")
+            return
+        if not os.path.exists(BANCO_CENTRAL):
+            messagebox.showwarning("Aviso", f"Nenhuma nota no histórico central.\n{os.path.abspath(BANCO_CENTRAL)}")
+            return
+        self._carregar_banco(BANCO_CENTRAL)
+    
+    def _carregar_banco(self, db_path):
+        """Preenche detalhes, resumo e Sem Valores com as consultas do repositório"""
+        try:
+            repositorio = RepositorioRET(db_path)
+            try:
+                dados = repositorio.listar()
+                resumo = repositorio.totais(por=('tipo_encargo',))
+                sem_valores = repositorio.sem_valores()
+            finally:
+                repositorio.fechar()
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao carregar: {e}")
+            messagebox.showerror("Erro", f"Erro ao carregar: {e}")
+            return
+        
+        self.dados_processados = dados
+        self.log(f"[OK] {len(dados)} notas carregadas de: {db_path}")
+        self._mostrar_resultados(len(dados), resumo, sem_valores)
+    
     def exportar_excel(self):
         """Exporta dados para Excel formatado"""
         if not self.dados_processados:
@@ -559,150 +550,14 @@ RESUMO POR TIPO:
             return
         
         try:
-            # Nome único com timestamp
+            # Nome único com timestamp (_1, _2... se já existir)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            excel_base = f'RET_Relatorio_{timestamp}.xlsx'
-            excel_path = os.path.join(self.pasta_selecionada, excel_base)
-            
-            # Verificar se arquivo está em uso e adicionar número se necessário
-            contador = 1
-            while True:
-                try:
-                    with open(excel_path, 'w') as f:
-                        pass
-                    os.remove(excel_path)
-                    break
-                except (PermissionError, IOError):
-                    excel_path = os.path.join(self.pasta_selecionada, f'RET_Relatorio_{timestamp}_{contador}.xlsx')
-                    contador += 1
-                    if contador > 100:
-                        excel_path = os.path.join(self.pasta_selecionada, f'RET_Relatorio_{datetime.now().strftime("%Y%m%d_%H%M%S%f")}.xlsx')
-                        break
-            
-            # Criar DataFrame
-            df = pd.DataFrame([{
-                'Tipo de Encargo': d['tipo_encargo'],
-                'Empresa': d['empresa'],
-                'Nota Débito/Crédito': d['nota_tipo'],
-                'Nº': d['numero_nd'],
-                'Data Vencimento': d['data_vencimento'],
-                'Valor Total': d['valor_total'],
-                'QT': d['quantidade'],
-                'Valor Unitário': d['valor_unitario'],
-                'Arquivo': d['arquivo']
-            } for d in self.dados_processados])
-            
-            # Criar workbook com formatação
-            wb = Workbook()
-            ws_dados = wb.active
-            ws_dados.title = "Dados Completos"
-            
-            # Estilos
-            header_fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
+            pasta = self.pasta_selecionada or os.path.dirname(os.path.abspath(BANCO_CENTRAL))
+            excel_path = gravar_arquivo(
+                os.path.join(pasta, f'RET_Relatorio_{timestamp}.xlsx'),
+                lambda caminho: exportar_relatorio_ret(self.dados_processados, caminho, TAXA_EUR_BRL)
             )
             
-            # Adicionar dados
-            for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-                for c_idx, value in enumerate(row, 1):
-                    cell = ws_dados.cell(row=r_idx, column=c_idx, value=value)
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    
-                    if r_idx == 1:  # Header
-                        cell.fill = header_fill
-                        cell.font = header_font
-                    else:
-                        if c_idx in [6, 7, 8]:  # Colunas numéricas
-                            if isinstance(value, (int, float)):
-                                cell.number_format = '#,##0.00'
-            
-            # Ajustar larguras
-            ws_dados.column_dimensions['A'].width = 20
-            ws_dados.column_dimensions['B'].width = 25
-            ws_dados.column_dimensions['C'].width = 20
-            ws_dados.column_dimensions['D'].width = 15
-            ws_dados.column_dimensions['E'].width = 18
-            ws_dados.column_dimensions['F'].width = 15
-            ws_dados.column_dimensions['G'].width = 12
-            ws_dados.column_dimensions['H'].width = 15
-            ws_dados.column_dimensions['I'].width = 40
-            
-            # ABA RESUMO POR TIPO
-            ws_resumo = wb.create_sheet("Resumo por Tipo")
-            
-            resumo = df.groupby('Tipo de Encargo').agg({
-                'Valor Total': 'sum',
-                'QT': 'sum',
-                'Arquivo': 'count'
-            }).rename(columns={'Arquivo': 'Quantidade de Arquivos'}).reset_index()
-            
-            for r_idx, row in enumerate(dataframe_to_rows(resumo, index=False, header=True), 1):
-                for c_idx, value in enumerate(row, 1):
-                    cell = ws_resumo.cell(row=r_idx, column=c_idx, value=value)
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    
-                    if r_idx == 1:
-                        cell.fill = header_fill
-                        cell.font = header_font
-                    else:
-                        if c_idx > 1:
-                            if isinstance(value, (int, float)):
-                                cell.number_format = '#,##0.00'
-            
-            ws_resumo.column_dimensions['A'].width = 25
-            ws_resumo.column_dimensions['B'].width = 18
-            ws_resumo.column_dimensions['C'].width = 15
-            ws_resumo.column_dimensions['D'].width = 25
-            
-            # ABA RESUMO GERAL
-            ws_geral = wb.create_sheet("Resumo Geral")
-            
-            total_geral = df['Valor Total'].sum()
-            total_qt = df['QT'].sum()
-            total_arquivos = len(df)
-            
-            total_geral_brl = total_geral * TAXA_EUR_BRL
-            dados_geral = [
-                ['RESUMO GERAL DO PROCESSAMENTO', ''],
-                ['', ''],
-                ['Métrica', 'Valor'],
-                ['Total de PDFs Processados', total_arquivos],
-                ['Quantidade Total (QT)', total_qt],
-                ['Valor Total (R$)', total_geral_brl],
-                ['', ''],
-                ['Data do Processamento', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
-            ]
-            
-            for r_idx, row in enumerate(dados_geral, 1):
-                for c_idx, value in enumerate(row, 1):
-                    cell = ws_geral.cell(row=r_idx, column=c_idx, value=value)
-                    if r_idx == 1:
-                        cell.font = Font(bold=True, size=16, color="1F4788")
-                    elif r_idx == 3:
-                        cell.fill = header_fill
-                        cell.font = header_font
-                    else:
-                        cell.alignment = Alignment(horizontal='left', vertical='center')
-                        if c_idx == 2 and isinstance(value, (int, float)):
-                            cell.number_format = '#,##0.00'
-                # Mesclar célula do título só depois de escrever toda a linha (evita MergedCell read-only)
-                if r_idx == 1:
-                    ws_geral.merge_cells('A1:B1')
-            
-            ws_geral.column_dimensions['A'].width = 30
-            ws_geral.column_dimensions['B'].width = 25
-            
-            # Salvar e fechar
-            wb.save(excel_path)
-            wb.close()
-            
             self.log(f"[OK] Excel criado: {excel_path}")
             messagebox.showinfo("Sucesso", f"Excel exportado com sucesso!\n{excel_path}")
             
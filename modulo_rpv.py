@@ -230,7 +230,7 @@ class ModuloRPV(ctk.CTkToplevel):
             font=("Roboto", 12),
             height=44, width=170,
             fg_color=INPUT_BG, hover_color=AZUL,
-            command=self._atualizar_historico
+            command=self._recarregar_historico
         ).pack(side="left")
 
         # ── HISTÓRICO ─────────────────────────────────────────────────────────
@@ -351,7 +351,7 @@ class ModuloRPV(ctk.CTkToplevel):
 
         self.db.atualizar_cgr(periodo, cgr)
         self.db.atualizar_cgf(periodo, cgf)
-        rpv = self.db.calcular_e_salvar_rpv(periodo)
+        rpv = self.db.buscar_consolidacao(periodo)["rpv"]
 
         self._recalcular()
         self._atualizar_historico()
@@ -368,19 +368,20 @@ class ModuloRPV(ctk.CTkToplevel):
         )
 
     # ── HISTÓRICO ─────────────────────────────────────────────────────────────
-    def _atualizar_historico(self):
-        periodos = self.db.listar_periodos()
+    def _recarregar_historico(self):
+        """Botão 'Atualizar histórico': descarta o cache e relê o banco."""
+        self.db.cache.invalidar()
+        self._atualizar_historico()
 
-        # Busca CGR, CGF e RPV de cada período
+    def _atualizar_historico(self):
+        # CGR, CGF e RPV de todos os períodos numa única consulta (cache)
         linhas = []
-        for p in periodos:
-            dados = self.db.buscar_consolidacao(p["periodo"])
-            if dados:
-                cgr = dados.get("cgr") or 0.0
-                cgf = dados.get("cgf") or 0.0
-                rpv = dados.get("rpv") or (cgr - cgf)
-                data = (dados.get("data_atualizacao") or "")[:16]
-                linhas.append((p["periodo"], cgr, cgf, rpv, data))
+        for dados in self.db.historico_consolidacao():
+            cgr = dados.get("cgr") or 0.0
+            cgf = dados.get("cgf") or 0.0
+            rpv = dados.get("rpv") or 0.0
+            data = (dados.get("data_atualizacao") or "")[:16]
+            linhas.append((dados["periodo"], cgr, cgf, rpv, data))
 
         self.hist_box.configure(state="normal")
         self.hist_box.delete("1.0", "end")
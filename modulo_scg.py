@@ -320,21 +320,20 @@ class ModuloSCG(ctk.CTkToplevel):
         if messagebox.askyesno("Confirmar",
                                 f"Excluir o período '{self.periodo_atual}'?\n"
                                 "Todos os valores serão perdidos."):
-            self.db.cursor.execute(
-                "DELETE FROM consolidacao WHERE periodo = ?",
-                (self.periodo_atual,))
-            self.db.conn.commit()
+            self.db.excluir_periodo_consolidacao(self.periodo_atual)
             self._carregar_periodos()
 
     def _ao_mudar_periodo(self, periodo: str):
         self.periodo_atual = periodo
         dados = self.db.buscar_consolidacao(periodo)
-        if not dados:
-            return
+        if dados:
+            self._exibir_consolidacao(dados)
 
+    def _exibir_consolidacao(self, dados: dict):
+        """Preenche as linhas e o label SCG a partir de uma linha de consolidação."""
         cgr = dados.get('cgr') or 0.0
         cgf = dados.get('cgf') or 0.0
-        rpv = dados.get('rpv') or (cgr - cgf)
+        rpv = dados.get('rpv') or 0.0   # coluna gerada: sempre CGR − CGF
         ret = dados.get('ret') or 0.0
         rp  = dados.get('rp')  or 0.0
         scg = dados.get('scg') or 0.0
@@ -364,7 +363,7 @@ class ModuloSCG(ctk.CTkToplevel):
         self.db.atualizar_cgf(self.periodo_atual, cgf)
         self.db.atualizar_ret(self.periodo_atual, ret)
         self.db.atualizar_rp(self.periodo_atual, rp)
-        rpv = self.db.calcular_e_salvar_rpv(self.periodo_atual)
+        rpv = self.db.buscar_consolidacao(self.periodo_atual)['rpv']
 
         # Atualiza o label RPV
         self.linhas["rpv"].set_valor(rpv, "Calc")
@@ -384,12 +383,21 @@ class ModuloSCG(ctk.CTkToplevel):
         if self.modo_manual:
             self._salvar_manual()
 
-        self.db.calcular_e_salvar_rpv(self.periodo_atual)
-        scg = self.db.calcular_scg(self.periodo_atual)
-        self._ao_mudar_periodo(self.periodo_atual)
-        self._atualizar_historico(self.db.listar_periodos())
+        # RPV/SCG são colunas geradas e as linhas vêm do cache compartilhado:
+        # ler na própria thread do Tk custa menos que despachar um worker
+        try:
+            dados = self.db.buscar_consolidacao(self.periodo_atual) or {}
+            periodos = self.db.listar_periodos()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao calcular SCG: {e}")
+            return
+        self._exibir_calculo(self.periodo_atual, dados, periodos)
+
+    def _exibir_calculo(self, periodo: str, dados: dict, periodos: list):
+        self._exibir_consolidacao(dados)
+        self._atualizar_historico(periodos)
 
-        dados = self.db.buscar_consolidacao(self.periodo_atual)
+        scg = dados.get('scg') or 0.0
         cgr = dados.get('cgr') or 0.0
         cgf = dados.get('cgf') or 0.0
         rpv = dados.get('rpv') or 0.0
@@ -397,7 +405,7 @@ class ModuloSCG(ctk.CTkToplevel):
         rp  = dados.get('rp')  or 0.0
 
         detalhe = (
-            f"Período : {self.periodo_atual}\n"
+            f"Período : {periodo}\n"
             f"{'─'*38}\n"
             f"  CGR          = {_fmt(cgr)}\n"
             f"  CGF          = {_fmt(cgf)}\n"
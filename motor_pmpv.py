@@ -0,0 +1,185 @@
+"""
+Motor de cálculo do PMPV (preço médio ponderado pelo volume), sem interface.
+
+Fórmula (a mesma da calculadora trimestral): para cada empresa/mês com
+volume diário > 0, ``volume_mes = volume * dias`` e
+``custo = (molecula + transporte + logistica) * volume_mes``;
+``PMPV = Σ custo / Σ volume_mes`` e ``preço final = PMPV + conta gráfica``.
+
+As entradas viram arrays numpy e as somas são vetorizadas. Para recalcular
+muitas sessões salvas, ``recalcular_sessoes`` junta as linhas de todas as
+sessões num só conjunto de arrays e soma por sessão com ``np.bincount``.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+DIAS_MES = {
+    "Janeiro": 31, "Fevereiro": 28, "Março": 31, "Abril": 30,
+    "Maio": 31, "Junho": 30, "Julho": 31, "Agosto": 31,
+    "Setembro": 30, "Outubro": 31, "Novembro": 30, "Dezembro": 31
+}
+MESES = list(DIAS_MES)
+DIAS_PADRAO = (30, 30, 30)
+CAMPOS = ('molecula', 'transporte', 'logistica', 'volume')
+
+
+def para_float(valor) -> float:
+    """Converte entrada livre ("1,5", "", None...) em float; inválido vale 0."""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).replace(',', '.'))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def dias_trimestre(mes_inicial: str, bissexto: bool = False) -> List[int]:
+    """Dias de cada um dos 3 meses do trimestre que começa em ``mes_inicial``."""
+    idx = MESES.index(mes_inicial)
+    dias = []
+    for i in range(3):
+        mes = MESES[(idx + i) % 12]
+        dias.append(29 if mes == "Fevereiro" and bissexto else DIAS_MES[mes])
+    return dias
+
+
+def calcular_pmpv(molecula, transporte, logistica, volume, dias,
+                  conta_grafica: float = 0.0) -> Dict[str, float]:
+    """PMPV a partir de arrays alinhados (uma posição por empresa/mês).
+
+    ``dias`` é um escalar ou um array com os dias do mês de cada posição.
+    Levanta ``ValueError`` se o volume total for zero.
+    """
+    volume = np.asarray(volume, dtype=float)
+    preco = (np.asarray(molecula, dtype=float) + np.asarray(transporte, dtype=float)
+             + np.asarray(logistica, dtype=float))
+    volume_mes = np.where(volume > 0, volume * np.asarray(dias, dtype=float), 0.0)
+    v_tot = float(volume_mes.sum())
+    if v_tot == 0:
+        raise ValueError("Volume Zero")
+    c_tot = float((preco * volume_mes).sum())
+    pmpv = c_tot / v_tot
+    return {'volume_total': v_tot, 'custo_total': c_tot, 'pmpv': pmpv,
+            'conta_grafica': conta_grafica, 'preco_final': pmpv + conta_grafica}
+
+
+def arrays_trimestre(dados_por_mes: Mapping[str, Sequence[Mapping]],
+                     dias: Sequence[int]) -> Dict[str, np.ndarray]:
+    """Achata ``{mês: [linhas]}`` (na ordem dos meses) em arrays alinhados + ``dias``."""
+    colunas = {campo: [] for campo in CAMPOS + ('dias',)}
+    for linhas, dias_mes in zip(dados_por_mes.values(), dias):
+        for linha in linhas:
+            for campo in CAMPOS:
+                colunas[campo].append(para_float(linha.get(campo)))
+            colunas['dias'].append(dias_mes)
+    return {campo: np.asarray(valores, dtype=float) for campo, valores in colunas.items()}
+
+
+def calcular_trimestre(dados_por_mes: Mapping[str, Sequence[Mapping]],
+                       dias: Sequence[int] = DIAS_PADRAO,
+                       conta_grafica: float = 0.0) -> Dict[str, float]:
+    """PMPV de um trimestre no formato ``{mês: [{'molecula': ..., 'volume': ...}]}``."""
+    a = arrays_trimestre(dados_por_mes, dias)
+    return calcular_pmpv(a['molecula'], a['transporte'], a['logistica'], a['volume'],
+                         a['dias'], conta_grafica)
+
+
+def recalcular_sessoes(db, sessao_ids: Optional[List[int]] = None,
+                       dias: Sequence[int] = DIAS_PADRAO) -> List[Dict]:
+    """Recalcula o PMPV das sessões salvas a partir de ``dados_mes``.
+
+    ``dias[i]`` são os dias do mês ``i + 1`` (as sessões não guardam o mês
+    inicial). A conta gráfica é a do último resultado salvo da sessão (0 se
+    não houver). Sessões sem volume voltam com ``pmpv`` ``None``.
+    """
+    sessoes = db.carregar_sessoes(sessao_ids)
+    if not sessoes:
+        return []
+
+    linhas = [(i, r) for i, sessao in enumerate(sessoes)
+              for registros in sessao['dados_por_mes'].values() for r in registros]
+
+    dias_mes = np.asarray(dias, dtype=float)
+    indice = np.fromiter((i for i, _ in linhas), dtype=np.int64, count=len(linhas))
+    mes = np.fromiter((r['mes'] for _, r in linhas), dtype=np.int64, count=len(linhas))
+    valores = {campo: np.fromiter((para_float(r[campo]) for _, r in linhas), dtype=float,
+                                  count=len(linhas)) for campo in CAMPOS}
+
+    # Meses fora de 1..len(dias) usam 30 dias, como a calculadora
+    dias_linha = np.where((mes >= 1) & (mes <= len(dias_mes)),
+                          dias_mes[np.clip(mes - 1, 0, len(dias_mes) - 1)], 30.0)
+    volume_mes = np.where(valores['volume'] > 0, valores['volume'] * dias_linha, 0.0)
+    custo = (valores['molecula'] + valores['transporte'] + valores['logistica']) * volume_mes
+    v_tot = np.bincount(indice, weights=volume_mes, minlength=len(sessoes))
+    c_tot = np.bincount(indice, weights=custo, minlength=len(sessoes))
+
+    resultados = []
+    for i, sessao in enumerate(sessoes):
+        cg = (sessao['resultado'] or {}).get('conta_grafica') or 0.0
+        pmpv = float(c_tot[i] / v_tot[i]) if v_tot[i] else None
+        resultados.append({
+            'sessao_id': sessao['id'], 'nome': sessao['nome'],
+            'volume_total': float(v_tot[i]), 'custo_total': float(c_tot[i]),
+            'pmpv': pmpv, 'conta_grafica': cg,
+            'preco_final': pmpv + cg if pmpv is not None else None,
+        })
+    return resultados
+
+
+class TrimestreIncremental:
+    """Somas parciais por linha e por mês para o PMPV ao vivo na calculadora.
+
+    Cada linha (empresa/mês) guarda seu preço e volume diário; cada mês guarda
+    ``Σ volume`` e ``Σ preço * volume`` das linhas com volume > 0. Editar uma
+    linha troca só a contribuição dela, e o total do trimestre combina os
+    três meses com os dias de cada um: O(1) por tecla. ``calcular_trimestre``
+    continua sendo o cálculo de referência (sem acúmulo de arredondamento).
+    """
+
+    def __init__(self, dias: Optional[Mapping[str, int]] = None):
+        self._linhas: Dict = {}                         # chave -> (mês, preço, volume)
+        self._volume: Dict[str, float] = {}             # mês -> Σ volume diário
+        self._custo: Dict[str, float] = {}              # mês -> Σ preço * volume diário
+        self._contagem: Dict[str, int] = {}             # mês -> linhas com volume > 0
+        self._dias: Dict[str, float] = dict(dias or {})
+
+    def definir_dias(self, mes: str, dias: int):
+        self._dias[mes] = dias
+
+    def definir_linha(self, chave, mes: str, molecula, transporte, logistica, volume) -> float:
+        """Atualiza (ou cria) a linha e retorna o preço unitário dela."""
+        preco = para_float(molecula) + para_float(transporte) + para_float(logistica)
+        volume = para_float(volume)
+        self.remover(chave)
+        self._linhas[chave] = (mes, preco, volume)
+        if volume > 0:
+            self._volume[mes] = self._volume.get(mes, 0.0) + volume
+            self._custo[mes] = self._custo.get(mes, 0.0) + preco * volume
+            self._contagem[mes] = self._contagem.get(mes, 0) + 1
+        return preco
+
+    def remover(self, chave):
+        antiga = self._linhas.pop(chave, None)
+        if antiga is None:
+            return
+        mes, preco, volume = antiga
+        if volume > 0:
+            self._contagem[mes] -= 1
+            if self._contagem[mes]:
+                self._volume[mes] -= volume
+                self._custo[mes] -= preco * volume
+            else:
+                # Mês sem linhas: zera de fato, sem resíduo de arredondamento
+                self._volume[mes] = self._custo[mes] = 0.0
+
+    def resultado(self, conta_grafica: float = 0.0) -> Optional[Dict[str, float]]:
+        """Totais do trimestre (mesmas chaves de ``calcular_pmpv``); ``None`` sem volume."""
+        v_tot = sum(v * self._dias.get(m, 30) for m, v in self._volume.items())
+        if v_tot <= 0:
+            return None
+        c_tot = sum(c * self._dias.get(m, 30) for m, c in self._custo.items())
+        pmpv = c_tot / v_tot
+        return {'volume_total': v_tot, 'custo_total': c_tot, 'pmpv': pmpv,
+                'conta_grafica': conta_grafica, 'preco_final': pmpv + conta_grafica}
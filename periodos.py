@@ -0,0 +1,80 @@
+"""
+Normalização dos períodos digitados pelo usuário.
+
+Os períodos chegam como texto livre nos ``simpledialog`` ("Dez/2025",
+"Q1 2026", "Jan/2026", "12/2025"...). Aqui eles viram chaves numéricas
+(ano, mês, trimestre) que permitem ordenar, filtrar por intervalo e
+consolidar meses em trimestres direto no SQL.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+MESES = {
+    'JAN': 1, 'FEV': 2, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'APR': 4, 'MAI': 5, 'MAY': 5,
+    'JUN': 6, 'JUL': 7, 'AGO': 8, 'AUG': 8, 'SET': 9, 'SEP': 9, 'OUT': 10, 'OCT': 10,
+    'NOV': 11, 'DEZ': 12, 'DEC': 12,
+}
+
+_RE_TRIMESTRE = [
+    re.compile(r'^[QT]\s*([1-4])[\s/\-]*(\d{2}|\d{4})$'),                       # Q1 2026, T1/26
+    re.compile(r'^([1-4])\s*[ºO]?\s*(?:T|TRI|TRIMESTRE)[\s/\-]*(\d{2}|\d{4})$'),  # 1T2026, 1º TRIMESTRE 2026
+]
+_RE_MES_NOME = re.compile(r'^([A-Z]{3,})\.?[\s/\-]*(\d{2}|\d{4})$')             # DEZ/2025, DEZEMBRO 2025
+_RE_MES_ANO  = re.compile(r'^(\d{1,2})[/\-](\d{4})$')                            # 12/2025
+_RE_ANO_MES  = re.compile(r'^(\d{4})[/\-](\d{1,2})$')                            # 2025-12
+
+
+@dataclass(frozen=True)
+class PeriodoNormalizado:
+    ano: int
+    mes: Optional[int]        # None para períodos trimestrais
+    trimestre: int
+    granularidade: str        # 'M' = mensal, 'T' = trimestral
+
+    @property
+    def chave(self) -> int:
+        """Índice contínuo de meses (ano*12 + mês-1). Trimestres usam o último mês."""
+        mes = self.mes if self.mes is not None else self.trimestre * 3
+        return self.ano * 12 + mes - 1
+
+
+def _sem_acento(texto: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def _ano(txt: str) -> int:
+    ano = int(txt)
+    return ano + 2000 if ano < 100 else ano
+
+
+def normalizar_periodo(periodo: str) -> Optional[PeriodoNormalizado]:
+    """Converte o texto do período em ``PeriodoNormalizado`` (None se não reconhecer)."""
+    if not periodo:
+        return None
+    txt = _sem_acento(periodo).upper().strip()
+    txt = re.sub(r'\s+', ' ', txt)
+
+    for regex in _RE_TRIMESTRE:
+        m = regex.match(txt)
+        if m:
+            return PeriodoNormalizado(_ano(m.group(2)), None, int(m.group(1)), 'T')
+
+    m = _RE_MES_NOME.match(txt)
+    if m and m.group(1)[:3] in MESES:
+        mes = MESES[m.group(1)[:3]]
+        return PeriodoNormalizado(_ano(m.group(2)), mes, (mes - 1) // 3 + 1, 'M')
+
+    m = _RE_MES_ANO.match(txt)
+    if m:
+        mes, ano = int(m.group(1)), int(m.group(2))
+    else:
+        m = _RE_ANO_MES.match(txt)
+        if not m:
+            return None
+        ano, mes = int(m.group(1)), int(m.group(2))
+    if not 1 <= mes <= 12:
+        return None
+    return PeriodoNormalizado(ano, mes, (mes - 1) // 3 + 1, 'M')
@@ -0,0 +1,121 @@
+"""
+Relatório Excel das notas RET.
+
+O workbook é ``write_only``: as linhas são gravadas em fluxo, sem manter a
+grade de células em memória. Os estilos são ``NamedStyle`` registrados uma
+vez; cada célula recebe só o array de índices do estilo já resolvido, em vez
+de objetos novos de borda, alinhamento e formato. Larguras são por coluna.
+Sem ``lxml`` instalado, o gargalo que resta é a serialização do XML.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from excel_handler import PlanilhaFluxo
+
+FORMATO_NUMERO = '#,##0.00'
+
+# (título, campo, largura, numérico)
+COLUNAS_DADOS = [
+    ('Tipo de Encargo', 'tipo_encargo', 20, False),
+    ('Empresa', 'empresa', 25, False),
+    ('Nota Débito/Crédito', 'nota_tipo', 20, False),
+    ('Nº', 'numero_nd', 15, False),
+    ('Data Vencimento', 'data_vencimento', 18, False),
+    ('Valor Total', 'valor_total', 15, True),
+    ('QT', 'quantidade', 12, True),
+    ('Valor Unitário', 'valor_unitario', 15, True),
+    ('Arquivo', 'arquivo', 40, False),
+]
+
+
+def _estilos() -> List[NamedStyle]:
+    borda = Side(style='thin')
+    centro = Alignment(horizontal='center', vertical='center')
+    cabecalho = NamedStyle(name='ret_cabecalho')
+    cabecalho.fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
+    cabecalho.font = Font(bold=True, color="FFFFFF", size=12)
+    cabecalho.border = Border(left=borda, right=borda, top=borda, bottom=borda)
+    cabecalho.alignment = centro
+
+    texto = NamedStyle(name='ret_texto')
+    texto.border = Border(left=borda, right=borda, top=borda, bottom=borda)
+    texto.alignment = centro
+
+    numero = NamedStyle(name='ret_numero', number_format=FORMATO_NUMERO)
+    numero.border = Border(left=borda, right=borda, top=borda, bottom=borda)
+    numero.alignment = centro
+
+    titulo = NamedStyle(name='ret_titulo')
+    titulo.font = Font(bold=True, size=16, color="1F4788")
+
+    rotulo = NamedStyle(name='ret_rotulo')
+    rotulo.alignment = Alignment(horizontal='left', vertical='center')
+
+    valor = NamedStyle(name='ret_valor', number_format=FORMATO_NUMERO)
+    valor.alignment = Alignment(horizontal='left', vertical='center')
+    return [cabecalho, texto, numero, titulo, rotulo, valor]
+
+
+def resumo_por_tipo(dados: Sequence[Dict]) -> List[Dict]:
+    """Valor total, QT e nº de arquivos por tipo de encargo (ordem alfabética)."""
+    resumo = defaultdict(lambda: {'valor_total': 0.0, 'quantidade': 0.0, 'arquivos': 0})
+    for d in dados:
+        r = resumo[d['tipo_encargo']]
+        r['valor_total'] += d['valor_total'] or 0.0
+        r['quantidade'] += d['quantidade'] or 0.0
+        r['arquivos'] += 1
+    return [{'tipo_encargo': tipo, **resumo[tipo]} for tipo in sorted(resumo)]
+
+
+def _planilha(wb: Workbook, titulo: str, larguras: Sequence[int]) -> PlanilhaFluxo:
+    return PlanilhaFluxo(wb, titulo, {get_column_letter(i): l for i, l in enumerate(larguras, 1)})
+
+
+def exportar_relatorio_ret(dados: Sequence[Dict], caminho: str, taxa_eur_brl: float) -> str:
+    """Grava o relatório (Dados Completos, Resumo por Tipo, Resumo Geral) em ``caminho``."""
+    wb = Workbook(write_only=True)
+    for estilo in _estilos():
+        wb.add_named_style(estilo)
+
+    # ABA DADOS COMPLETOS
+    aba = _planilha(wb, "Dados Completos", [c[2] for c in COLUNAS_DADOS])
+    aba.linha([c[0] for c in COLUNAS_DADOS], ['ret_cabecalho'] * len(COLUNAS_DADOS))
+    campos = [c[1] for c in COLUNAS_DADOS]
+    estilos = ['ret_numero' if c[3] else 'ret_texto' for c in COLUNAS_DADOS]
+    for d in dados:
+        aba.linha([d.get(campo) for campo in campos], estilos)
+
+    # ABA RESUMO POR TIPO
+    aba = _planilha(wb, "Resumo por Tipo", [25, 18, 15, 25])
+    aba.linha(['Tipo de Encargo', 'Valor Total', 'QT', 'Quantidade de Arquivos'],
+              ['ret_cabecalho'] * 4)
+    for r in resumo_por_tipo(dados):
+        aba.linha([r['tipo_encargo'], r['valor_total'], r['quantidade'], r['arquivos']],
+                  ['ret_texto', 'ret_numero', 'ret_numero', 'ret_numero'])
+
+    # ABA RESUMO GERAL
+    aba = _planilha(wb, "Resumo Geral", [30, 25])
+    total_geral = sum(d['valor_total'] or 0.0 for d in dados)
+    total_qt = sum(d['quantidade'] or 0.0 for d in dados)
+    aba.mesclar('A1:B1')
+    aba.linha(['RESUMO GERAL DO PROCESSAMENTO', ''], ['ret_titulo', 'ret_titulo'])
+    aba.linha(['', ''], [None, None])
+    aba.linha(['Métrica', 'Valor'], ['ret_cabecalho', 'ret_cabecalho'])
+    for rotulo, valor in [
+        ('Total de PDFs Processados', len(dados)),
+        ('Quantidade Total (QT)', total_qt),
+        ('Valor Total (R$)', total_geral * taxa_eur_brl),
+        ('', ''),
+        ('Data do Processamento', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+    ]:
+        aba.linha([rotulo, valor], ['ret_rotulo',
+                                    'ret_valor' if isinstance(valor, (int, float)) else 'ret_rotulo'])
+
+    wb.save(caminho)
+    return caminho
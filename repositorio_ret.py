@@ -0,0 +1,229 @@
+"""
+Persistência das notas RET processadas (``RET_dados.db`` da pasta).
+
+Cada nota é identificada por (hash do arquivo, número da ND, empresa): salvar
+o mesmo processamento de novo atualiza as linhas em vez de duplicá-las, e o
+mesmo PDF copiado para outra pasta não conta duas vezes. A gravação é um
+único ``executemany`` numa transação.
+
+Bancos criados pelas versões antigas (sem hash e sem unicidade) são migrados
+na abertura: o hash é preenchido a partir do arquivo (ou do caminho, se o
+arquivo não existe mais) e as duplicatas são removidas, ficando a linha
+gravada por último.
+
+O mesmo esquema serve de histórico central (``pmpv_data.db``): ``importar``
+anexa o banco de uma pasta (``ATTACH``) e mescla as notas com a mesma regra
+de upsert. As consultas (totais por empresa/tipo/mês, notas sem valores)
+rodam em SQL sobre colunas indexadas; ``mes_vencimento`` é uma coluna gerada
+(virtual) a partir da data de vencimento ``dd/mm/aaaa``.
+"""
+
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+NOME_BANCO = 'RET_dados.db'
+
+_CAMPOS = ('tipo_encargo', 'empresa', 'nota_tipo', 'numero_nd', 'data_vencimento',
+           'valor_total', 'quantidade', 'valor_unitario', 'arquivo', 'caminho')
+_CHAVE = ('hash_arquivo', 'numero_nd', 'empresa')
+_AGRUPAMENTOS = ('empresa', 'tipo_encargo', 'nota_tipo', 'mes_vencimento')
+
+# 'dd/mm/aaaa' ou 'dd-mm-aaaa' -> 'aaaa-mm' (NULL se a data não estiver nesse formato)
+_SQL_MES_VENCIMENTO = (
+    "CASE WHEN length(data_vencimento) = 10 "
+    "THEN substr(data_vencimento, 7, 4) || '-' || substr(data_vencimento, 4, 2) END"
+)
+
+_COLUNAS = _CAMPOS + ('data_processamento', 'hash_arquivo')
+_SQL_UPSERT = (
+    f"ON CONFLICT ({', '.join(_CHAVE)}) DO UPDATE SET "
+    + ', '.join(f"{c} = excluded.{c}" for c in _COLUNAS if c not in _CHAVE)
+)
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """SHA-1 do conteúdo do arquivo (lido em blocos)."""
+    h = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _registro(row: sqlite3.Row) -> Dict:
+    """Linha do banco com as mesmas chaves de um registro recém-extraído do PDF."""
+    nota = dict(row)
+    nota.setdefault('valores_encontrados', [nota['valor_total']] if nota.get('valor_total') else [])
+    nota.setdefault('erro', None)
+    return nota
+
+
+def _hash_registro(caminho: Optional[str]) -> str:
+    try:
+        if not caminho:
+            raise FileNotFoundError(caminho)  # linha antiga sem caminho gravado
+        return hash_arquivo(caminho)
+    except OSError:
+        # Arquivo movido/apagado: o caminho é o melhor identificador que resta
+        return 'caminho:' + hashlib.sha1((caminho or '').encode('utf-8')).hexdigest()
+
+
+class RepositorioRET:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.cursor = self.conn.cursor()
+        self._criar_tabelas()
+
+    @classmethod
+    def da_pasta(cls, pasta: str) -> "RepositorioRET":
+        return cls(os.path.join(pasta, NOME_BANCO))
+
+    def _criar_tabelas(self):
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dados_ret (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo_encargo TEXT,
+                empresa TEXT,
+                nota_tipo TEXT,
+                numero_nd TEXT,
+                data_vencimento TEXT,
+                valor_total REAL,
+                quantidade REAL,
+                valor_unitario REAL,
+                arquivo TEXT,
+                caminho TEXT,
+                data_processamento TEXT,
+                hash_arquivo TEXT
+            )
+        """)
+        self._migrar_legado()
+        self.cursor.execute("PRAGMA table_xinfo(dados_ret)")
+        if 'mes_vencimento' not in {row['name'] for row in self.cursor.fetchall()}:
+            self.cursor.execute(
+                "ALTER TABLE dados_ret ADD COLUMN mes_vencimento TEXT "
+                f"GENERATED ALWAYS AS ({_SQL_MES_VENCIMENTO}) VIRTUAL"
+            )
+        self.cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_dados_ret_chave "
+            "ON dados_ret (hash_arquivo, numero_nd, empresa)"
+        )
+        for coluna in ('empresa', 'tipo_encargo', 'data_vencimento', 'mes_vencimento'):
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_dados_ret_{coluna} ON dados_ret ({coluna})"
+            )
+        self.conn.commit()
+
+    def _migrar_legado(self):
+        """Preenche o hash das linhas antigas e remove as duplicatas."""
+        self.cursor.execute("PRAGMA table_info(dados_ret)")
+        if 'hash_arquivo' not in {row['name'] for row in self.cursor.fetchall()}:
+            self.cursor.execute("ALTER TABLE dados_ret ADD COLUMN hash_arquivo TEXT")
+
+        self.cursor.execute(
+            "SELECT id, caminho FROM dados_ret WHERE hash_arquivo IS NULL "
+            "OR numero_nd IS NULL OR empresa IS NULL"
+        )
+        pendentes = self.cursor.fetchall()
+        if not pendentes:
+            return
+        hashes: Dict[str, str] = {}
+        for row in pendentes:
+            if row['caminho'] not in hashes:
+                hashes[row['caminho']] = _hash_registro(row['caminho'])
+        self.cursor.executemany(
+            "UPDATE dados_ret SET hash_arquivo = COALESCE(hash_arquivo, ?), "
+            "numero_nd = COALESCE(numero_nd, ''), empresa = COALESCE(empresa, '') WHERE id = ?",
+            [(hashes[row['caminho']], row['id']) for row in pendentes]
+        )
+        self.cursor.execute(f"""
+            DELETE FROM dados_ret WHERE id NOT IN (
+                SELECT MAX(id) FROM dados_ret GROUP BY {', '.join(_CHAVE)}
+            )
+        """)
+
+    def salvar(self, registros: Iterable[Dict]) -> int:
+        """Grava (ou atualiza) as notas numa transação; retorna quantas linhas foram gravadas.
+
+        A mesma chave repetida no lote é gravada uma vez (vale a última, como no upsert).
+        """
+        agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        por_chave: Dict[tuple, tuple] = {}
+        for d in registros:
+            linha = (tuple(d.get(c) if d.get(c) is not None else '' for c in _CAMPOS)
+                     + (agora, d.get('hash_arquivo') or _hash_registro(d.get('caminho'))))
+            por_chave[tuple(linha[_COLUNAS.index(c)] for c in _CHAVE)] = linha
+        antes = self.conn.total_changes
+        with self.conn:
+            self.cursor.executemany(
+                f"INSERT INTO dados_ret ({', '.join(_COLUNAS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUNAS))}) {_SQL_UPSERT}",
+                list(por_chave.values())
+            )
+        return self.conn.total_changes - antes
+
+    def importar(self, caminho_db: str) -> int:
+        """Mescla as notas de outro ``RET_dados.db`` neste banco; retorna quantas."""
+        RepositorioRET(caminho_db).fechar()  # migra o banco da pasta, se for antigo
+        self.conn.commit()
+        self.cursor.execute("ATTACH DATABASE ? AS origem", (caminho_db,))
+        try:
+            with self.conn:
+                self.cursor.execute(
+                    f"INSERT INTO dados_ret ({', '.join(_COLUNAS)}) "
+                    f"SELECT {', '.join(_COLUNAS)} FROM origem.dados_ret WHERE true {_SQL_UPSERT}"
+                )
+                return self.cursor.rowcount
+        finally:
+            self.cursor.execute("DETACH DATABASE origem")
+
+    # ==========================================
+    # CONSULTAS
+    # ==========================================
+
+    @staticmethod
+    def _filtro(filtros: Dict) -> Tuple[str, list]:
+        desconhecidos = set(filtros) - set(_AGRUPAMENTOS)
+        if desconhecidos:
+            raise ValueError(f"Filtro inválido: {', '.join(sorted(desconhecidos))}")
+        ativos = [(c, v) for c, v in filtros.items() if v is not None]
+        if not ativos:
+            return "", []
+        return "WHERE " + " AND ".join(f"{c} = ?" for c, _ in ativos), [v for _, v in ativos]
+
+    def listar(self, **filtros) -> List[Dict]:
+        """Notas gravadas, opcionalmente filtradas por empresa/tipo_encargo/nota_tipo/mes_vencimento."""
+        where, params = self._filtro(filtros)
+        self.cursor.execute(f"SELECT * FROM dados_ret {where} ORDER BY id", params)
+        return [_registro(row) for row in self.cursor.fetchall()]
+
+    def totais(self, por: Sequence[str] = ('empresa',), **filtros) -> List[Dict]:
+        """Soma de valor_total e quantidade de notas agrupadas pelos campos de ``por``."""
+        if not por or set(por) - set(_AGRUPAMENTOS):
+            raise ValueError(f"Agrupamento inválido: {por}")
+        where, params = self._filtro(filtros)
+        grupo = ', '.join(por)
+        self.cursor.execute(f"""
+            SELECT {grupo}, COUNT(*) AS notas,
+                   SUM(valor_total > 0) AS com_valores,
+                   COALESCE(SUM(valor_total), 0) AS valor_total,
+                   COALESCE(SUM(quantidade), 0) AS quantidade
+            FROM dados_ret {where}
+            GROUP BY {grupo} ORDER BY {grupo}
+        """, params)
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def sem_valores(self, **filtros) -> List[Dict]:
+        """Notas lidas das quais nenhum valor foi extraído."""
+        where, params = self._filtro(filtros)
+        condicao = "COALESCE(valor_total, 0) = 0"
+        where = f"{where} AND {condicao}" if where else f"WHERE {condicao}"
+        self.cursor.execute(f"SELECT * FROM dados_ret {where} ORDER BY id", params)
+        return [_registro(row) for row in self.cursor.fetchall()]
+
+    def fechar(self):
+        if self.conn: self.conn.close()
@@ -0,0 +1,66 @@
+"""
+Gravação segura de arquivos de saída (relatórios Excel, exportações).
+
+O arquivo é escrito primeiro num temporário oculto na pasta de destino e só
+depois ganha o nome final: quem abre a pasta nunca vê um relatório pela
+metade. O nome final é reservado com ``O_CREAT | O_EXCL`` — criação atômica
+que falha se o arquivo já existe (ou está aberto no Excel) — e o temporário é
+movido por cima da reserva com ``os.replace``. Exportações paralelas que
+pedem o mesmo nome recebem ``nome.xlsx``, ``nome_1.xlsx``, ``nome_2.xlsx``...
+sem colisão e sem sondar o disco criando e apagando arquivos.
+"""
+
+import os
+import tempfile
+from typing import Callable
+
+
+def _candidatos(caminho: str):
+    yield caminho
+    base, extensao = os.path.splitext(caminho)
+    contador = 1
+    while True:
+        yield f"{base}_{contador}{extensao}"
+        contador += 1
+
+
+def reservar_nome(caminho: str) -> str:
+    """Cria (vazio, atomicamente) o primeiro nome livre a partir de ``caminho``."""
+    for candidato in _candidatos(caminho):
+        try:
+            fd = os.open(candidato, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        except PermissionError:
+            # Windows: arquivo aberto/bloqueado por outro programa
+            if os.path.exists(candidato):
+                continue
+            raise
+        os.close(fd)
+        return candidato
+
+
+def gravar_arquivo(caminho: str, escrever: Callable[[str], None]) -> str:
+    """Grava um arquivo novo com o nome de ``caminho`` (ou o próximo livre).
+
+    ``escrever(caminho_temporario)`` produz o conteúdo (ex.: ``wb.save``).
+    Retorna o caminho final, no mesmo formato (relativo/absoluto) de ``caminho``.
+    Se ``escrever`` falhar, nada fica na pasta.
+    """
+    pasta = os.path.dirname(caminho) or "."
+    _, extensao = os.path.splitext(caminho)
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".~", suffix=extensao + ".tmp")
+    os.close(fd)
+    try:
+        escrever(temporario)
+        final = reservar_nome(caminho)
+        try:
+            os.replace(temporario, final)
+        except OSError:
+            os.remove(final)
+            raise
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return final
@@ -0,0 +1,105 @@
+"""
+Sessões PMPV salvas em formato colunar, e comparação entre sessões.
+
+``DatabasePMPV.carregar_sessao`` traz a sessão inteira (todos os meses e o
+último resultado) numa consulta e devolve uma ``SessaoPMPV``: uma lista de
+empresas e arrays numpy alinhados (mês, molécula, transporte, logística,
+volume), prontos para o motor de cálculo, para preencher a calculadora de uma
+vez e para ``comparar_sessoes`` (empresa × mês).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from motor_pmpv import CAMPOS
+
+IGUAL = 'igual'
+ALTERADA = 'alterada'
+INCLUIDA = 'incluida'
+REMOVIDA = 'removida'
+
+
+@dataclass
+class SessaoPMPV:
+    id: int
+    nome: str
+    resultado: Optional[Dict] = None
+    empresa: List[str] = field(default_factory=list)
+    mes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    molecula: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    transporte: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    logistica: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    volume: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    @classmethod
+    def de_linhas(cls, id: int, nome: str, linhas, resultado: Optional[Dict] = None) -> "SessaoPMPV":
+        """Monta as colunas a partir de linhas com ``mes``, ``empresa`` e os campos numéricos."""
+        def coluna(campo):
+            return np.fromiter((l[campo] or 0.0 for l in linhas), dtype=float, count=len(linhas))
+
+        return cls(id=id, nome=nome, resultado=resultado,
+                   empresa=[l['empresa'] for l in linhas],
+                   mes=np.fromiter((l['mes'] for l in linhas), dtype=np.int64, count=len(linhas)),
+                   **{campo: coluna(campo) for campo in CAMPOS})
+
+    def __len__(self) -> int:
+        return len(self.empresa)
+
+    def meses(self) -> List[int]:
+        return sorted(set(self.mes.tolist()))
+
+    def por_mes(self) -> Dict[str, List[Dict]]:
+        """Linhas no formato da calculadora/exportação: ``{"Mês N": [{...}]}``."""
+        saida: Dict[str, List[Dict]] = {}
+        for i, empresa in enumerate(self.empresa):
+            saida.setdefault(f"Mês {self.mes[i]}", []).append({
+                'empresa': empresa, 'molecula': float(self.molecula[i]),
+                'transporte': float(self.transporte[i]), 'logistica': float(self.logistica[i]),
+                'volume': float(self.volume[i]),
+            })
+        return saida
+
+
+def comparar_sessoes(a: SessaoPMPV, b: SessaoPMPV, tolerancia: float = 1e-9) -> List[Dict]:
+    """Diferenças linha a linha (empresa × mês) de ``a`` para ``b``.
+
+    Cada item traz ``empresa``, ``mes``, ``status`` (incluida/removida/alterada/
+    igual) e, por campo, ``(valor_a, valor_b)``. Empresas repetidas no mesmo
+    mês são pareadas pela ordem em que aparecem.
+    """
+    def indexar(s: SessaoPMPV):
+        chaves: Dict = {}
+        for i, empresa in enumerate(s.empresa):
+            base = (int(s.mes[i]), (empresa or '').strip().upper())
+            n = 0
+            while (base, n) in chaves:
+                n += 1
+            chaves[(base, n)] = i
+        return chaves
+
+    ia, ib = indexar(a), indexar(b)
+    diferencas = []
+    for chave in sorted(set(ia) | set(ib), key=lambda c: (c[0][0], c[0][1], c[1])):
+        i, j = ia.get(chave), ib.get(chave)
+        empresa = a.empresa[i] if i is not None else b.empresa[j]
+        item = {'empresa': empresa, 'mes': chave[0][0]}
+        if i is None:
+            item['status'] = INCLUIDA
+        elif j is None:
+            item['status'] = REMOVIDA
+        else:
+            alterados = {}
+            for campo in CAMPOS:
+                va, vb = float(getattr(a, campo)[i]), float(getattr(b, campo)[j])
+                if abs(va - vb) > tolerancia:
+                    alterados[campo] = (va, vb)
+            item['status'] = ALTERADA if alterados else IGUAL
+            item.update(alterados)
+        if item['status'] == INCLUIDA:
+            item.update({c: (None, float(getattr(b, c)[j])) for c in CAMPOS})
+        elif item['status'] == REMOVIDA:
+            item.update({c: (float(getattr(a, c)[i]), None) for c in CAMPOS})
+        diferencas.append(item)
+    return diferencas
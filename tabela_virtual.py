@@ -0,0 +1,297 @@
+"""
+Tabela virtualizada para listas grandes (ex.: notas RET).
+
+Criar um ``CTkFrame`` + N ``CTkLabel`` por linha fica inviável com milhares
+de registros. Aqui os dados ficam num ``ModeloTabela`` (filtro e ordenação
+feitos sobre uma lista de índices, sem Tk) e a ``TabelaVirtual`` cria só as
+linhas que cabem na tela (o pool acompanha a altura do widget),
+reaproveitando os mesmos widgets ao rolar: rolar ou filtrar custa o mesmo
+com 50 ou 50.000 registros.
+
+A ordenação usa a ``chave`` de cada ``Coluna``: ``chave_data`` para
+"dd/mm/aaaa", ``chave_numero`` para números guardados como texto ("9" antes
+de "10"). Sem chave, números vêm antes de textos e tipos misturados não
+quebram a ordenação.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import customtkinter as ctk
+
+TODOS = "Todos"
+
+
+def chave_padrao(valor) -> tuple:
+    """Números antes de textos; textos sem diferenciar caixa."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return (0, valor, "")
+    return (1, 0, str(valor).casefold())
+
+
+def chave_numero(valor) -> tuple:
+    """Número guardado como texto ("10", "1,5"); o que não for número vai para o fim."""
+    try:
+        return (0, float(str(valor).strip().replace(",", ".")), "")
+    except ValueError:
+        return (1, 0, str(valor).casefold())
+
+
+def chave_data(valor) -> tuple:
+    """Data "dd/mm/aaaa"; datas inválidas vão para o fim, em ordem de texto."""
+    try:
+        return (0, datetime.strptime(str(valor).strip(), "%d/%m/%Y").toordinal(), "")
+    except ValueError:
+        return (1, 0, str(valor).casefold())
+
+
+@dataclass(frozen=True)
+class Coluna:
+    titulo: str
+    campo: str
+    largura: int = 100
+    formato: Callable[[Any], str] = str
+    chave: Callable[[Any], Any] = chave_padrao
+
+
+class ModeloTabela:
+    """Linhas (dicts) com filtro por igualdade e ordenação por campo.
+
+    ``chaves`` associa campos a funções de ordenação (padrão: ``chave_padrao``).
+    """
+
+    def __init__(self, linhas: Sequence[Dict] = (), chaves: Optional[Dict[str, Callable]] = None):
+        self.chaves = dict(chaves or {})
+        self.definir_linhas(linhas)
+
+    def definir_linhas(self, linhas: Sequence[Dict]):
+        self._linhas = list(linhas)
+        self._filtros: Dict[str, Any] = {}
+        self.campo_ordem: Optional[str] = None
+        self.decrescente = False
+        self._indices = list(range(len(self._linhas)))
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @property
+    def total(self) -> int:
+        return len(self._linhas)
+
+    def valores_unicos(self, campo: str) -> List:
+        return sorted({l.get(campo) for l in self._linhas if l.get(campo) not in (None, "")}, key=str)
+
+    def filtrar(self, **criterios):
+        """Mantém só as linhas com ``campo == valor`` (``None``/``''``/``Todos`` limpa o filtro)."""
+        for campo, valor in criterios.items():
+            if valor in (None, "", TODOS):
+                self._filtros.pop(campo, None)
+            else:
+                self._filtros[campo] = valor
+        self._recalcular()
+
+    def ordenar(self, campo: str, decrescente: Optional[bool] = None):
+        """Ordena por ``campo``; sem ``decrescente``, clicar de novo inverte a ordem."""
+        if decrescente is None:
+            decrescente = (not self.decrescente) if campo == self.campo_ordem else False
+        self.campo_ordem = campo
+        self.decrescente = decrescente
+        self._recalcular()
+
+    def fatia(self, inicio: int, quantidade: int) -> List[Dict]:
+        return [self._linhas[i] for i in self._indices[inicio:inicio + quantidade]]
+
+    def _recalcular(self):
+        filtros = list(self._filtros.items())
+        # Comparação como texto: os filtros vêm de comboboxes
+        indices = [i for i, l in enumerate(self._linhas)
+                   if all(str(l.get(c)) == str(v) for c, v in filtros)]
+        if self.campo_ordem is not None:
+            campo = self.campo_ordem
+            chave = self.chaves.get(campo, chave_padrao)
+            # Vazios sempre no fim, em qualquer sentido
+            vazios = [i for i in indices if self._linhas[i].get(campo) in (None, "")]
+            cheios = [i for i in indices if self._linhas[i].get(campo) not in (None, "")]
+            cheios.sort(key=lambda i: chave(self._linhas[i][campo]), reverse=self.decrescente)
+            indices = cheios + vazios
+        self._indices = indices
+
+
+def _formatar(coluna: Coluna, valor) -> str:
+    """Texto da célula; vazio para valores ausentes (ex.: linhas lidas do banco)."""
+    if valor in (None, ""):
+        return ""
+    try:
+        return coluna.formato(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+
+
+class TabelaVirtual(ctk.CTkFrame):
+    """Grade com pool de linhas do tamanho da área visível, rolagem, ordenação e filtros.
+
+    ``linhas_visiveis`` é só o tamanho inicial: ao redimensionar, o pool cresce
+    ou encolhe para preencher a altura disponível.
+    """
+
+    def __init__(self, master, colunas: Sequence[Coluna], filtros: Sequence[str] = (),
+                 linhas_visiveis: int = 25, **kwargs):
+        super().__init__(master, **kwargs)
+        self.colunas = list(colunas)
+        self.modelo = ModeloTabela(chaves={c.campo: c.chave for c in self.colunas})
+        self.linhas_visiveis = linhas_visiveis
+        self.primeira = 0
+
+        # Filtros (um combobox por campo)
+        self._combos: Dict[str, ctk.CTkComboBox] = {}
+        if filtros:
+            barra = ctk.CTkFrame(self, fg_color="transparent")
+            barra.pack(fill="x", pady=(0, 5))
+            titulos = {c.campo: c.titulo for c in self.colunas}
+            for campo in filtros:
+                ctk.CTkLabel(barra, text=f"{titulos.get(campo, campo)}:",
+                             font=("Roboto", 11)).pack(side="left", padx=(5, 2))
+                combo = ctk.CTkComboBox(barra, values=[TODOS], width=150, state="readonly",
+                                        command=lambda _v: self._aplicar_filtros())
+                combo.set(TODOS)
+                combo.pack(side="left", padx=(0, 10))
+                self._combos[campo] = combo
+        self.lbl_status = ctk.CTkLabel(self, text="", font=("Roboto", 10), text_color="#808080")
+        self.lbl_status.pack(side="bottom", anchor="e", padx=5)
+
+        # Cabeçalho clicável
+        header = ctk.CTkFrame(self, fg_color="#2c3e50")
+        header.pack(fill="x", pady=(0, 5))
+        self._botoes_cabecalho = []
+        for coluna in self.colunas:
+            btn = ctk.CTkButton(header, text=coluna.titulo, width=coluna.largura,
+                                font=("Roboto", 11, "bold"), fg_color="transparent",
+                                hover_color="#34495e", corner_radius=0,
+                                command=lambda c=coluna.campo: self.ordenar(c))
+            btn.pack(side="left", padx=2)
+            self._botoes_cabecalho.append(btn)
+
+        # Corpo: pool de linhas + barra de rolagem
+        corpo = ctk.CTkFrame(self, fg_color="transparent")
+        corpo.pack(fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(corpo, command=self._ao_rolar_barra)
+        self.scrollbar.pack(side="right", fill="y")
+        self._area = ctk.CTkFrame(corpo, fg_color="transparent")
+        self._area.pack(side="left", fill="both", expand=True)
+        # A altura vem do layout, não das linhas (senão o pool empurraria a janela)
+        self._area.pack_propagate(False)
+
+        self._pool = []
+        for _ in range(linhas_visiveis):
+            self._criar_linha().pack(fill="x", pady=1)
+        for widget in (self._area, corpo):
+            self._ligar_rolagem(widget)
+        self._area.bind("<Configure>", self._ao_redimensionar, add="+")
+
+        self._redesenhar()
+
+    def _ligar_rolagem(self, widget):
+        widget.bind("<MouseWheel>", self._ao_roda_mouse)
+        widget.bind("<Button-4>", lambda _e: self.rolar(-3))
+        widget.bind("<Button-5>", lambda _e: self.rolar(3))
+
+    def _criar_linha(self):
+        """Cria uma linha do pool (o chamador decide quando fazer o ``pack``)."""
+        row = ctk.CTkFrame(self._area, fg_color="#34495e")
+        labels = []
+        for coluna in self.colunas:
+            lbl = ctk.CTkLabel(row, text="", width=coluna.largura, font=("Roboto", 10))
+            lbl.pack(side="left", padx=2)
+            labels.append(lbl)
+        for widget in [row] + labels:
+            self._ligar_rolagem(widget)
+        self._pool.append((row, labels, [""] * len(self.colunas)))
+        return row
+
+    def _ao_redimensionar(self, event):
+        """Ajusta o pool ao número de linhas que cabem na nova altura."""
+        # pady=1 em cima e embaixo; piso para o caso de a linha ainda não ter sido medida
+        altura_linha = max(self._pool[0][0].winfo_reqheight() + 2, 20)
+        cabem = max(1, event.height // altura_linha)
+        if cabem == self.linhas_visiveis:
+            return
+        while len(self._pool) < cabem:
+            self._criar_linha()
+        # Linhas além do necessário ficam guardadas (sem pack) para um novo aumento;
+        # as que voltam entram em ordem, depois das que já estão visíveis
+        for row, _labels, _textos in self._pool[self.linhas_visiveis:cabem]:
+            row.pack(fill="x", pady=1)
+        for row, _labels, _textos in self._pool[cabem:self.linhas_visiveis]:
+            row.pack_forget()
+        self.linhas_visiveis = cabem
+        self.primeira = min(self.primeira, max(0, len(self.modelo) - cabem))
+        self._redesenhar()
+
+    # ── dados ────────────────────────────────────────────────────────────────
+    def definir_linhas(self, linhas: Sequence[Dict]):
+        self.modelo.definir_linhas(linhas)
+        for campo, combo in self._combos.items():
+            combo.configure(values=[TODOS] + [str(v) for v in self.modelo.valores_unicos(campo)])
+            combo.set(TODOS)
+        self.primeira = 0
+        self._atualizar_cabecalho()
+        self._redesenhar()
+
+    def ordenar(self, campo: str):
+        self.modelo.ordenar(campo)
+        self.primeira = 0
+        self._atualizar_cabecalho()
+        self._redesenhar()
+
+    def _aplicar_filtros(self):
+        self.modelo.filtrar(**{campo: combo.get() for campo, combo in self._combos.items()})
+        self.primeira = 0
+        self._redesenhar()
+
+    # ── rolagem ──────────────────────────────────────────────────────────────
+    def rolar(self, linhas: int):
+        maximo = max(0, len(self.modelo) - self.linhas_visiveis)
+        nova = min(max(0, self.primeira + linhas), maximo)
+        if nova != self.primeira:
+            self.primeira = nova
+            self._redesenhar()
+
+    def _ao_roda_mouse(self, event):
+        self.rolar(-3 if event.delta > 0 else 3)
+
+    def _ao_rolar_barra(self, acao, valor, unidade=None):
+        if acao == "moveto":
+            self.rolar(int(float(valor) * len(self.modelo)) - self.primeira)
+        elif acao == "scroll":
+            passo = self.linhas_visiveis if unidade == "pages" else 1
+            self.rolar(int(valor) * passo)
+
+    # ── desenho ──────────────────────────────────────────────────────────────
+    def _atualizar_cabecalho(self):
+        seta = " ▼" if self.modelo.decrescente else " ▲"
+        for btn, coluna in zip(self._botoes_cabecalho, self.colunas):
+            sufixo = seta if coluna.campo == self.modelo.campo_ordem else ""
+            btn.configure(text=coluna.titulo + sufixo)
+
+    def _redesenhar(self):
+        linhas = self.modelo.fatia(self.primeira, self.linhas_visiveis)
+        for n, (row, labels, textos) in enumerate(self._pool[:self.linhas_visiveis]):
+            linha = linhas[n] if n < len(linhas) else None
+            for j, coluna in enumerate(self.colunas):
+                texto = "" if linha is None else _formatar(coluna, linha.get(coluna.campo))
+                if texto != textos[j]:      # só reconfigura o que mudou
+                    labels[j].configure(text=texto)
+                    textos[j] = texto
+            row.configure(fg_color="#34495e" if linha is not None else "transparent")
+
+        total = len(self.modelo)
+        if total:
+            fim = min(total, self.primeira + self.linhas_visiveis)
+            self.scrollbar.set(self.primeira / total, fim / total)
+            self.lbl_status.configure(
+                text=f"Linhas {self.primeira + 1}–{fim} de {total}"
+                     + (f" (filtradas de {self.modelo.total})" if total != self.modelo.total else ""))
+        else:
+            self.scrollbar.set(0, 1)
+            self.lbl_status.configure(text="Nenhum registro")
@@ -0,0 +1,262 @@
+"""
+Execução de tarefas pesadas fora da thread da interface.
+
+O Tk só pode ser tocado pela thread principal. ``ExecutorTarefas`` roda a
+função num pool de threads (ou de processos, via ``mapear``) e devolve
+progresso, mensagens de log, resultado e erros por uma fila drenada com
+``widget.after()``: todos os callbacks rodam na thread do Tk, então podem
+atualizar widgets e abrir ``messagebox`` à vontade.
+
+Uso típico numa janela::
+
+    self.tarefas = ExecutorTarefas(self)
+    self._token = self.tarefas.executar(
+        self._trabalho, pasta,                 # roda no worker
+        ao_progresso=self._ao_progresso,       # (percentual, mensagem)
+        ao_log=self.log,
+        ao_concluir=self._ao_concluir,         # recebe o retorno de _trabalho
+        ao_erro=self._ao_erro,                 # recebe a exceção
+        ao_cancelar=self._ao_cancelar,
+    )
+    ...
+    self._token.cancelar()
+
+A função do worker recebe um ``Progresso`` como primeiro argumento e não
+deve acessar widgets.
+"""
+
+import logging
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Optional
+
+_log = logging.getLogger(__name__)
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro do worker quando a tarefa foi cancelada."""
+
+
+class TokenCancelamento:
+    """Sinal de cancelamento compartilhado entre a interface e o worker."""
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self):
+        self._evento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+    def verificar(self):
+        """Interrompe o worker (``TarefaCancelada``) se o cancelamento foi pedido."""
+        if self._evento.is_set():
+            raise TarefaCancelada()
+
+
+class Progresso:
+    """Canal do worker para a interface: percentual, log e cancelamento."""
+
+    def __init__(self, fila: "queue.Queue", id_tarefa: int, token: TokenCancelamento):
+        self._fila = fila
+        self._id = id_tarefa
+        self.token = token
+
+    def __call__(self, percentual: float, mensagem: Optional[str] = None):
+        """Publica o percentual (0–100) e verifica o cancelamento."""
+        self.token.verificar()
+        self._fila.put(('progresso', self._id, max(0.0, min(100.0, float(percentual))), mensagem))
+
+    def log(self, mensagem: str):
+        self._fila.put(('log', self._id, mensagem))
+
+    @property
+    def cancelado(self) -> bool:
+        return self.token.cancelado
+
+    def verificar(self):
+        self.token.verificar()
+
+
+class ExecutorTarefas:
+    """Executa tarefas em segundo plano e entrega os eventos na thread do Tk."""
+
+    def __init__(self, widget, intervalo_ms: int = 50, max_threads: int = 2,
+                 max_processos: Optional[int] = None):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self._fila: "queue.Queue" = queue.Queue()
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="tarefa")
+        self._processos: Optional[ProcessPoolExecutor] = None
+        self._max_processos = max_processos
+        self._tarefas: Dict[int, Dict[str, Any]] = {}
+        self._proximo_id = 0
+        self._agendado = False
+
+        if hasattr(widget, "bind"):
+            widget.bind("<Destroy>", self._ao_destruir, add="+")
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    @property
+    def ocupado(self) -> bool:
+        """Há tarefas em andamento (ou com eventos ainda não entregues)."""
+        return bool(self._tarefas)
+
+    def executar(self, funcao: Callable, *args,
+                 ao_concluir: Optional[Callable] = None,
+                 ao_erro: Optional[Callable] = None,
+                 ao_progresso: Optional[Callable] = None,
+                 ao_log: Optional[Callable] = None,
+                 ao_cancelar: Optional[Callable] = None,
+                 **kwargs) -> TokenCancelamento:
+        """Roda ``funcao(progresso, *args, **kwargs)`` numa thread do pool."""
+        token = TokenCancelamento()
+        self._proximo_id += 1
+        id_tarefa = self._proximo_id
+        self._tarefas[id_tarefa] = {
+            'token': token,
+            'concluida': ao_concluir,
+            'erro': ao_erro,
+            'progresso': ao_progresso,
+            'log': ao_log,
+            'cancelada': ao_cancelar,
+        }
+        progresso = Progresso(self._fila, id_tarefa, token)
+
+        def _rodar():
+            try:
+                resultado = funcao(progresso, *args, **kwargs)
+            except TarefaCancelada:
+                self._fila.put(('cancelada', id_tarefa))
+            except Exception as e:
+                e.detalhe = traceback.format_exc()
+                self._fila.put(('erro', id_tarefa, e))
+            else:
+                if token.cancelado:
+                    self._fila.put(('cancelada', id_tarefa))
+                else:
+                    self._fila.put(('concluida', id_tarefa, resultado))
+
+        self._threads.submit(_rodar)
+        self._agendar()
+        return token
+
+    def mapear(self, funcao: Callable, itens: Iterable, tamanho_lote: Optional[int] = None,
+               **callbacks) -> TokenCancelamento:
+        """Aplica ``funcao(item)`` a cada item num pool de processos.
+
+        ``funcao`` precisa ser importável (nível de módulo) e não pode tocar
+        na interface. O resultado entregue a ``ao_concluir`` é a lista na
+        mesma ordem de ``itens``; o progresso avança a cada lote concluído.
+        """
+        return self.executar(self.mapear_no_worker, funcao, list(itens), tamanho_lote, **callbacks)
+
+    def mapear_no_worker(self, progresso: Progresso, funcao: Callable, itens: list,
+                         tamanho_lote: Optional[int] = None,
+                         por_item: Optional[Callable] = None) -> list:
+        """Corpo de ``mapear``, para usar dentro de uma tarefa que já está no worker.
+
+        Os itens vão ao pool em lotes de ``tamanho_lote`` (padrão: ~4 lotes por
+        processo, no máximo 32 itens) para diluir o custo de serialização.
+        ``por_item(resultado)`` é chamado no worker à medida que os lotes voltam.
+        """
+        if not itens:
+            return []
+        pool = self._pool_processos()
+        if tamanho_lote is None:
+            processos = self._max_processos or os.cpu_count() or 1
+            tamanho_lote = max(1, min(32, len(itens) // (4 * processos)))
+
+        futuros = {pool.submit(_aplicar_lote, funcao, itens[i:i + tamanho_lote]): i
+                   for i in range(0, len(itens), tamanho_lote)}
+        resultados = [None] * len(itens)
+        concluidos = 0
+        try:
+            for futuro in as_completed(futuros):
+                inicio = futuros[futuro]
+                lote = futuro.result()
+                resultados[inicio:inicio + len(lote)] = lote
+                concluidos += len(lote)
+                if por_item is not None:
+                    for resultado in lote:
+                        por_item(resultado)
+                progresso(concluidos * 100 / len(itens), f"{concluidos}/{len(itens)}")
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+        return resultados
+
+    def cancelar_todas(self):
+        for tarefa in self._tarefas.values():
+            tarefa['token'].cancelar()
+
+    def encerrar(self):
+        """Cancela as tarefas e libera os pools (chamado ao fechar a janela)."""
+        self.cancelar_todas()
+        self._tarefas.clear()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processos is not None:
+            self._processos.shutdown(wait=False, cancel_futures=True)
+            self._processos = None
+
+    # ── internos ─────────────────────────────────────────────────────────────
+    def _pool_processos(self) -> ProcessPoolExecutor:
+        if self._processos is None:
+            self._processos = ProcessPoolExecutor(max_workers=self._max_processos)
+        return self._processos
+
+    def _agendar(self):
+        if self._agendado:
+            return
+        self._agendado = True
+        try:
+            self.widget.after(self.intervalo_ms, self._drenar)
+        except Exception:
+            # Janela já destruída: ninguém para receber os eventos
+            self._agendado = False
+            self.encerrar()
+
+    def _drenar(self):
+        """Entrega os eventos pendentes (roda na thread do Tk).
+
+        Um callback que falha é registrado no log e não impede a entrega dos
+        eventos seguintes; a próxima drenagem é sempre reagendada.
+        """
+        self._agendado = False
+        try:
+            while True:
+                try:
+                    evento, id_tarefa, *dados = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                tarefa = self._tarefas.get(id_tarefa)
+                if tarefa is None:
+                    continue
+                if evento in ('concluida', 'erro', 'cancelada'):
+                    del self._tarefas[id_tarefa]
+                callback = tarefa[evento]
+                try:
+                    if callback is not None:
+                        callback(*dados)
+                    elif evento == 'erro':
+                        _log.error("Tarefa %d falhou:\n%s", id_tarefa,
+                                   getattr(dados[0], 'detalhe', repr(dados[0])))
+                except Exception:
+                    _log.exception("Erro no callback '%s' da tarefa %d", evento, id_tarefa)
+        finally:
+            if self._tarefas:
+                self._agendar()
+
+    def _ao_destruir(self, event):
+        if event.widget is self.widget:
+            self.encerrar()
+
+
+def _aplicar_lote(funcao: Callable, itens: list) -> list:
+    """Roda no processo filho: aplica ``funcao`` a um lote de itens."""
+    return [funcao(item) for item in itens]
@@ -0,0 +1,291 @@
+"""
+Templates de extração das notas RET, por emissor e tipo de encargo.
+
+A classificação (tipo de encargo, empresa, débito/crédito) sai de uma única
+varredura do caminho por um autômato Aho-Corasick montado uma vez com todas
+as palavras-chave; as prioridades são as mesmas dos ``if``/``for`` antigos
+(EAT > Penalidade > TOP, empresas na ordem da lista, débito antes de crédito).
+
+Cada ``TemplateRET`` traz os regex de campo já compilados e o
+``LayoutExtracao`` (páginas e regiões) do documento. O ``REGISTRO`` resolve
+o template mais específico para (empresa, tipo de encargo), passando pelo
+emissor da nota: as supridoras (Petrobras, Galp) emitem as próprias notas
+contra a Copergás; as demais empresas são clientes e recebem notas emitidas
+pela Copergás, todas no mesmo modelo.
+
+Templates devem ser registrados neste módulo (na importação): os processos
+do pool de extração reimportam o módulo e não enxergam registros feitos em
+tempo de execução na janela.
+"""
+
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+EMPRESAS_CONHECIDAS = [
+    'COPERGAS', 'AMBEV', 'CBA', 'CERVEJARIA', 'DEXCO', 'GERDAU',
+    'INDORAMA', 'INGREDION', 'KLABIN', 'MONDELEZ', 'NISSIN', 'VETRUS',
+    'M DIAS BRANCO', 'PETROBRAS', 'GALP'
+]
+
+# categoria -> (escopo, [(palavra, valor)] em ordem de prioridade, valor padrão)
+# escopo 'caminho' = caminho completo; 'nome' = só o nome do arquivo
+CATEGORIAS = {
+    'tipo_encargo': ('caminho', [('EAT', 'EAT'), ('PENALIDADE', 'Penalidades'), ('TOP', 'TOP')],
+                     'Outros'),
+    'empresa': ('nome', [(e, e) for e in EMPRESAS_CONHECIDAS], 'N/A'),
+    'nota_tipo': ('nome', [('ND', 'Débito'), ('DEBITO', 'Débito'), ('DÉBITO', 'Débito'),
+                           ('NC', 'Crédito'), ('CREDITO', 'Crédito'), ('CRÉDITO', 'Crédito')],
+                  'N/A'),
+}
+
+
+# ==========================================
+# LAYOUT (páginas e regiões)
+# ==========================================
+
+@dataclass(frozen=True)
+class LayoutExtracao:
+    """Como ler o texto de um documento.
+
+    ``regioes`` são recortes (x0, topo, x1, base) em frações da página
+    (0–1, a partir do canto superior esquerdo); vazio = página inteira.
+    """
+    max_paginas: Optional[int] = None
+    regioes: Tuple[Tuple[float, float, float, float], ...] = ()
+    parar_quando_completo: bool = False
+    campos_obrigatorios: Tuple[str, ...] = ('numero_nd', 'data_vencimento', 'valor_total')
+
+
+# Documento inteiro, como a extração original
+LAYOUT_COMPLETO = LayoutExtracao()
+# Notas de débito/crédito: campos na 1ª página; anexos longos não são lidos
+LAYOUT_NOTA = LayoutExtracao(max_paginas=3, parar_quando_completo=True)
+
+
+# ==========================================
+# AHO-CORASICK
+# ==========================================
+
+class AhoCorasick:
+    """Busca simultânea de várias palavras num texto, em tempo linear."""
+
+    def __init__(self, palavras: Sequence[str]):
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saida: List[List[str]] = [[]]
+        for palavra in palavras:
+            self._inserir(palavra)
+        self._ligar_falhas()
+
+    def _inserir(self, palavra: str):
+        estado = 0
+        for ch in palavra:
+            proximo = self._transicoes[estado].get(ch)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[estado][ch] = proximo
+                self._transicoes.append({})
+                self._falha.append(0)
+                self._saida.append([])
+            estado = proximo
+        self._saida[estado].append(palavra)
+
+    def _ligar_falhas(self):
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for ch, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and ch not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                destino = self._transicoes[falha].get(ch, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                self._saida[proximo] = self._saida[proximo] + self._saida[self._falha[proximo]]
+
+    def buscar(self, texto: str) -> Iterator[Tuple[int, str]]:
+        """Gera (posição inicial, palavra) para cada ocorrência."""
+        estado = 0
+        for i, ch in enumerate(texto):
+            while estado and ch not in self._transicoes[estado]:
+                estado = self._falha[estado]
+            estado = self._transicoes[estado].get(ch, 0)
+            for palavra in self._saida[estado]:
+                yield i - len(palavra) + 1, palavra
+
+
+class Classificador:
+    """Classifica o documento pelo caminho numa única varredura."""
+
+    def __init__(self, categorias: Dict = CATEGORIAS):
+        self._categorias = categorias
+        # palavra -> [(categoria, prioridade, valor)]
+        self._palavras: Dict[str, List[Tuple[str, int, str]]] = {}
+        for categoria, (_escopo, palavras, _padrao) in categorias.items():
+            for prioridade, (palavra, valor) in enumerate(palavras):
+                self._palavras.setdefault(palavra, []).append((categoria, prioridade, valor))
+        self._automato = AhoCorasick(list(self._palavras))
+
+    def classificar(self, caminho: str) -> Dict[str, str]:
+        nome = os.path.basename(caminho)
+        pasta = caminho[:len(caminho) - len(nome)].upper()
+        texto = pasta + nome.upper()
+        inicio_nome = len(pasta)
+
+        melhor: Dict[str, Tuple[int, str]] = {}
+        for inicio, palavra in self._automato.buscar(texto):
+            for categoria, prioridade, valor in self._palavras[palavra]:
+                if self._categorias[categoria][0] == 'nome' and inicio < inicio_nome:
+                    continue
+                if categoria not in melhor or prioridade < melhor[categoria][0]:
+                    melhor[categoria] = (prioridade, valor)
+
+        return {categoria: melhor[categoria][1] if categoria in melhor else padrao
+                for categoria, (_escopo, _palavras, padrao) in self._categorias.items()}
+
+
+CLASSIFICADOR = Classificador()
+
+
+# ==========================================
+# TEMPLATES
+# ==========================================
+
+PADROES_PADRAO: Dict[str, Pattern] = {
+    'numero_nd': re.compile(r'ND\s*[:\-]?\s*(\d+)', re.IGNORECASE),
+    'data_vencimento': re.compile(r'(\d{2}[/-]\d{2}[/-]\d{4})'),
+    'quantidade': re.compile(r'(?:QT|Quantidade)[:\s]*(\d+(?:[.,]\d+)?)', re.IGNORECASE),
+}
+
+VALORES_PADRAO: Tuple[Pattern, ...] = (
+    re.compile(r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)'),
+    re.compile(r'€\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)'),
+    re.compile(r'(\d{1,3}(?:\.\d{3})*,\d{2})'),
+)
+
+
+@dataclass(frozen=True)
+class TemplateRET:
+    """Layout e regex de um tipo de documento.
+
+    ``empresa``/``tipo_encargo`` vazios valem para qualquer valor. Cada
+    campo de ``padroes`` é um regex ou uma tupla de regex tentados em ordem
+    (o rótulo do emissor primeiro, o padrão genérico como reserva). Com
+    ``regex_total``, o valor total é o primeiro casamento dele; sem ele, ou
+    se ele não casar, é o maior dos valores monetários encontrados.
+    """
+    nome: str
+    empresa: Optional[str] = None
+    tipo_encargo: Optional[str] = None
+    layout: LayoutExtracao = LAYOUT_NOTA
+    padroes: Dict[str, Pattern] = field(default_factory=lambda: dict(PADROES_PADRAO))
+    valores: Tuple[Pattern, ...] = VALORES_PADRAO
+    regex_total: Optional[Pattern] = None
+
+    def buscar(self, campo: str, texto: str):
+        """Primeiro casamento do campo em ``texto`` (ou ``None``)."""
+        padroes = self.padroes.get(campo, ())
+        for padrao in (padroes if isinstance(padroes, tuple) else (padroes,)):
+            match = padrao.search(texto)
+            if match:
+                return match
+        return None
+
+    def presente(self, campo: str, texto: str) -> bool:
+        """O campo obrigatório aparece em ``texto``? (para a parada antecipada)"""
+        if campo == 'valor_total':
+            padroes = (self.regex_total,) if self.regex_total else self.valores
+            return any(p.search(texto) for p in padroes)
+        return self.buscar(campo, texto) is not None
+
+
+class RegistroTemplates:
+    """Templates por (empresa, tipo de encargo), do mais ao menos específico.
+
+    ``emissores`` mapeia a empresa do arquivo para quem emite a nota (padrão:
+    ``emissor_padrao``); um template registrado para o emissor vale para todas
+    as suas empresas: (empresa, tipo) > (empresa) > (emissor, tipo) > (emissor)
+    > (tipo) > padrão.
+    """
+
+    def __init__(self, padrao: TemplateRET, emissores: Optional[Dict[str, str]] = None,
+                 emissor_padrao: Optional[str] = None):
+        self.padrao = padrao
+        self.emissores = dict(emissores or {})
+        self.emissor_padrao = emissor_padrao
+        self._templates: Dict[Tuple[Optional[str], Optional[str]], TemplateRET] = {}
+
+    def registrar(self, template: TemplateRET):
+        self._templates[(template.empresa, template.tipo_encargo)] = template
+
+    def emissor(self, empresa: Optional[str]) -> Optional[str]:
+        """Emissor das notas da empresa (``None`` se a empresa não foi identificada)."""
+        if empresa in (None, '', 'N/A'):
+            return None
+        return self.emissores.get(empresa, self.emissor_padrao)
+
+    def resolver(self, empresa: Optional[str], tipo_encargo: Optional[str]) -> TemplateRET:
+        chaves = [(empresa, tipo_encargo), (empresa, None)]
+        emissor = self.emissor(empresa)
+        if emissor is not None and emissor != empresa:
+            chaves += [(emissor, tipo_encargo), (emissor, None)]
+        chaves.append((None, tipo_encargo))
+        for chave in chaves:
+            if chave in self._templates:
+                return self._templates[chave]
+        return self.padrao
+
+
+# ==========================================
+# EMISSORES
+# ==========================================
+
+# Valores monetários brasileiros ("1.234,56"), sem o símbolo
+_VALOR = r'(\d{1,3}(?:\.\d{3})*,\d{2})'
+# "ND 123", "ND: 123", "Nota de Débito nº 123", "Nota de Crédito N. 45"
+_NUMERO_NOTA = re.compile(r'\b(?:ND|NC|NOTA\s+DE\s+(?:D[ÉE]BITO|CR[ÉE]DITO))(?![^\W\d_])'
+                          r'\s*(?:N[º°O]?\.?)?\s*[:\-]?\s*(\d+)', re.IGNORECASE)
+# A data de emissão vem antes do vencimento no cabeçalho: o rótulo decide
+_VENCIMENTO = (re.compile(r'VENCIMENTO\s*[:\-]?\s*(\d{2}[/-]\d{2}[/-]\d{4})', re.IGNORECASE),
+               PADROES_PADRAO['data_vencimento'])
+
+# Notas da Copergás para os clientes: tudo na 1ª página. O canhoto de
+# recebimento (último sexto da página) repete datas e valores e fica de fora;
+# se algum campo obrigatório não estiver no recorte, o extrator relê o
+# documento inteiro.
+TEMPLATE_COPERGAS = TemplateRET(
+    'copergas', empresa='COPERGAS',
+    layout=LayoutExtracao(max_paginas=1, regioes=((0.0, 0.0, 1.0, 0.83),)),
+    padroes=dict(PADROES_PADRAO, numero_nd=_NUMERO_NOTA, data_vencimento=_VENCIMENTO),
+    regex_total=re.compile(r'\bVALOR\s+TOTAL(?:\s+DA\s+NOTA)?\s*[:\-]?\s*(?:R\$)?\s*' + _VALOR, re.IGNORECASE),
+)
+
+# Notas da Petrobras: capa com número, vencimento e total; as páginas seguintes
+# são memória de cálculo (volumes diários), lida só se a capa não bastar.
+TEMPLATE_PETROBRAS = TemplateRET(
+    'petrobras', empresa='PETROBRAS',
+    layout=LayoutExtracao(max_paginas=2, parar_quando_completo=True),
+    padroes=dict(PADROES_PADRAO, numero_nd=_NUMERO_NOTA, data_vencimento=_VENCIMENTO),
+    regex_total=re.compile(r'\b(?:VALOR\s+TOTAL|TOTAL\s+A\s+PAGAR)\s*[:\-]?\s*(?:R\$)?\s*' + _VALOR,
+                           re.IGNORECASE),
+)
+
+# Notas da Galp: valores em euro ("€ 1.234,56" ou "1.234,56 EUR"); notas sem
+# o símbolo caem nos padrões genéricos
+TEMPLATE_GALP = TemplateRET(
+    'galp', empresa='GALP',
+    layout=LayoutExtracao(max_paginas=2, parar_quando_completo=True),
+    padroes=dict(PADROES_PADRAO, numero_nd=_NUMERO_NOTA),
+    valores=(re.compile(r'€\s*' + _VALOR), re.compile(_VALOR + r'\s*(?:€|EUR)\b')) + VALORES_PADRAO,
+    regex_total=re.compile(r'\bTOTAL\s*[:\-]?\s*(?:€|EUR)?\s*' + _VALOR, re.IGNORECASE),
+)
+
+EMISSORES = {'PETROBRAS': 'PETROBRAS', 'GALP': 'GALP'}
+EMISSOR_PADRAO = 'COPERGAS'
+
+REGISTRO = RegistroTemplates(TemplateRET('padrao'), EMISSORES, EMISSOR_PADRAO)
+for _template in (TEMPLATE_COPERGAS, TEMPLATE_PETROBRAS, TEMPLATE_GALP):
+    REGISTRO.registrar(_template)
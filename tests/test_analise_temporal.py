@@ -0,0 +1,142 @@
+"""
+Testes para periodos.py e analise_temporal.py
+"""
+import pytest
+from database import DatabasePMPV
+from periodos import normalizar_periodo
+from analise_temporal import AnaliseTemporal
+
+
+class TestNormalizarPeriodo:
+    """Formatos de período aceitos nos diálogos"""
+
+    @pytest.mark.parametrize("texto, esperado", [
+        ("Dez/2025", (2025, 12, 4, 'M')),
+        ("dezembro 2025", (2025, 12, 4, 'M')),
+        ("Mar/26", (2026, 3, 1, 'M')),
+        ("12/2025", (2025, 12, 4, 'M')),
+        ("2025-07", (2025, 7, 3, 'M')),
+        ("Q1 2026", (2026, None, 1, 'T')),
+        ("T2/26", (2026, None, 2, 'T')),
+        ("3º Trimestre 2025", (2025, None, 3, 'T')),
+    ])
+    def test_formatos(self, texto, esperado):
+        """Cada formato vira (ano, mês, trimestre, granularidade)"""
+        p = normalizar_periodo(texto)
+        assert (p.ano, p.mes, p.trimestre, p.granularidade) == esperado
+
+    @pytest.mark.parametrize("texto", ["", "Teste", "13/2025", "Q5 2025"])
+    def test_nao_reconhecido(self, texto):
+        """Texto fora do padrão devolve None"""
+        assert normalizar_periodo(texto) is None
+
+    def test_chave_continua(self):
+        """Dez/2025 e Jan/2026 são meses consecutivos na chave"""
+        assert normalizar_periodo("Jan/2026").chave - normalizar_periodo("Dez/2025").chave == 1
+        assert normalizar_periodo("Q1 2026").chave == normalizar_periodo("Mar/2026").chave
+
+
+class TestAnaliseTemporal:
+    """Séries, janelas móveis, acumulados e comparação anual"""
+
+    @pytest.fixture
+    def analise(self, tmp_path):
+        db = DatabasePMPV(str(tmp_path / "serie.db"))
+        # Fora de ordem de inserção de propósito
+        for periodo, cgr in [("Mar/2025", 30), ("Jan/2025", 10), ("Fev/2025", 20),
+                             ("Abr/2025", 40), ("Jan/2026", 15), ("Teste", 999)]:
+            db.criar_periodo_consolidacao(periodo)
+            db.atualizar_cgr(periodo, cgr)
+        db.salvar_pmpv_mensal("Jan/2025", 3000.0)
+        yield AnaliseTemporal(db)
+        db.fechar()
+
+    def test_dimensao_registrada(self, analise):
+        """Períodos criados entram na dimensão, inclusive os não reconhecidos"""
+        cur = analise.db.cursor
+        cur.execute("SELECT chave FROM periodos WHERE periodo = 'Teste'")
+        assert cur.fetchone()['chave'] is None
+        cur.execute("SELECT COUNT(*) FROM periodos")
+        assert cur.fetchone()[0] == 6
+
+    def test_dimensao_sincroniza_bancos_antigos(self, tmp_path):
+        """Períodos já existentes são indexados ao abrir o banco"""
+        caminho = str(tmp_path / "antigo.db")
+        db = DatabasePMPV(caminho)
+        db.criar_periodo_consolidacao("Out/2025")
+        db.cursor.execute("DELETE FROM periodos")
+        db.conn.commit()
+        db.fechar()
+
+        db = DatabasePMPV(caminho)
+        db.cursor.execute("SELECT ano, mes FROM periodos WHERE periodo = 'Out/2025'")
+        assert tuple(db.cursor.fetchone()) == (2025, 10)
+        db.fechar()
+
+    def test_serie_ordenada_e_intervalo(self, analise):
+        """Série sai em ordem cronológica e respeita o intervalo"""
+        serie = analise.serie('cgr')
+        assert [l['periodo'] for l in serie] == ["Jan/2025", "Fev/2025", "Mar/2025",
+                                                 "Abr/2025", "Jan/2026"]
+        parcial = analise.serie('cgr', inicio="02/2025", fim="2025-03")
+        assert [l['valor'] for l in parcial] == [20, 30]
+
+    def test_soma_movel(self, analise):
+        """Janela de 3 meses soma os meses anteriores existentes"""
+        linhas = {l['periodo']: l for l in analise.soma_movel('cgr', janela=3)}
+        assert linhas["Mar/2025"]['soma_movel'] == 60
+        assert linhas["Abr/2025"]['soma_movel'] == 90
+        assert linhas["Abr/2025"]['media_movel'] == 30
+        assert linhas["Jan/2026"]['soma_movel'] == 15
+
+    def test_trimestre_ate_data(self, analise):
+        """Acumulado reinicia a cada trimestre"""
+        linhas = {l['periodo']: l['acumulado_trimestre'] for l in analise.trimestre_ate_data('cgr')}
+        assert linhas["Mar/2025"] == 60
+        assert linhas["Abr/2025"] == 40
+
+    def test_ano_contra_ano(self, analise):
+        """Jan/2026 comparado com Jan/2025"""
+        linhas = {l['periodo']: l for l in analise.ano_contra_ano('cgr', inicio="Jan/2026")}
+        assert list(linhas) == ["Jan/2026"]
+        assert linhas["Jan/2026"]['valor_ano_anterior'] == 10
+        assert linhas["Jan/2026"]['variacao'] == 5
+        assert linhas["Jan/2026"]['variacao_pct'] == pytest.approx(50.0)
+
+    def test_consolidar_trimestres(self, analise):
+        """Meses somados por trimestre"""
+        tri = [(l['ano'], l['trimestre'], l['valor'], l['meses'])
+               for l in analise.consolidar_trimestres('cgr')]
+        assert tri == [(2025, 1, 60, 3), (2025, 2, 40, 1), (2026, 1, 15, 1)]
+
+    def test_pmpv_mensal(self, analise):
+        """PMPV vem da tabela pmpv_mensal"""
+        assert [l['valor'] for l in analise.serie('pmpv')] == [3000.0]
+
+    def test_grafias_do_mesmo_mes(self, analise):
+        """"Jan/2025" e "01/2025" são um único ponto da série"""
+        analise.db.criar_periodo_consolidacao("01/2025")
+        analise.db.atualizar_cgr("01/2025", 5)
+        serie = analise.serie('cgr')
+        assert [l['valor'] for l in serie][:2] == [15, 20]
+        assert len({l['chave'] for l in serie}) == len(serie)
+        linhas = {l['periodo']: l for l in analise.ano_contra_ano('cgr', inicio="Jan/2026")}
+        assert list(linhas) == ["Jan/2026"] and linhas["Jan/2026"]['valor_ano_anterior'] == 15
+        assert analise.soma_movel('cgr', janela=3)[2]['soma_movel'] == 65
+
+    def test_pmpv_nao_soma(self, analise):
+        """PMPV é preço: média por trimestre, e somas no tempo são recusadas"""
+        analise.db.salvar_pmpv_mensal("Fev/2025", 3200.0)
+        analise.db.salvar_pmpv_mensal("02/2025", 3400.0)
+        tri = analise.consolidar_trimestres('pmpv')
+        assert [(l['trimestre'], l['meses']) for l in tri] == [(1, 2)]
+        assert tri[0]['valor'] == pytest.approx((3000.0 + 3300.0) / 2)
+        with pytest.raises(ValueError):
+            analise.soma_movel('pmpv')
+        with pytest.raises(ValueError):
+            analise.trimestre_ate_data('pmpv')
+
+    def test_metrica_invalida(self, analise):
+        """Só métricas conhecidas podem ser interpoladas no SQL"""
+        with pytest.raises(ValueError):
+            analise.serie('cgr; DROP TABLE consolidacao')
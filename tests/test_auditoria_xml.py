@@ -0,0 +1,226 @@
+"""
+Testes para o módulo auditoria_xml.py
+"""
+import pytest
+from auditoria_xml import (STATUS_CANCELADA, STATUS_DENEGADA, STATUS_DUPLICADA, STATUS_ERRO,
+                           STATUS_OK, IndiceChaves, MotorAuditoria, detectar_tipo_xml, ler_chave,
+                           parse_cte, parse_evento, parse_nfe)
+
+CHAVE_A = "35260112345678000190550010000001231000001234"
+CHAVE_B = "35260112345678000190550010000001241000001240"
+CHAVE_CTE = "35260112345678000190570010000000011000000018"
+
+
+def nfe_xml(chave, valor=1000.0, qcom=500.0, proc=True, cstat="100"):
+    nfe = (f'<NFe xmlns="http://www.portalfiscal.inf.br/nfe"><infNFe Id="NFe{chave}" versao="4.00">'
+           f'<ide><nNF>{chave[25:34].lstrip("0")}</nNF></ide>'
+           f'<det nItem="1"><prod><uCom>M3</uCom><qCom>{qcom}</qCom></prod></det>'
+           f'<total><ICMSTot><vICMS>10</vICMS><vPIS>1</vPIS><vCOFINS>2</vCOFINS><vNF>{valor}</vNF></ICMSTot></total>'
+           f'</infNFe></NFe>')
+    if not proc:
+        return nfe
+    return (f'<?xml version="1.0" encoding="UTF-8"?><nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">'
+            f'{nfe}<protNFe><infProt><chNFe>{chave}</chNFe><cStat>{cstat}</cStat></infProt></protNFe></nfeProc>')
+
+
+def cte_xml(chave, valor=300.0):
+    return (f'<cteProc xmlns="http://www.portalfiscal.inf.br/cte"><CTe><infCte Id="CTe{chave}">'
+            f'<ide><nCT>1</nCT></ide><vPrest><vTPrest>{valor}</vTPrest></vPrest>'
+            f'<infQ><cUnid>00</cUnid><qCarga>50</qCarga></infQ></infCte></CTe></cteProc>')
+
+
+def evento_xml(chave, tp_evento="110111", cstat="135"):
+    ret = (f'<retEvento versao="1.00"><infEvento><cStat>{cstat}</cStat><chNFe>{chave}</chNFe>'
+           f'<tpEvento>{tp_evento}</tpEvento></infEvento></retEvento>') if cstat else ''
+    return (f'<procEventoNFe xmlns="http://www.portalfiscal.inf.br/nfe" versao="1.00">'
+            f'<evento versao="1.00"><infEvento Id="ID{tp_evento}{chave}01"><chNFe>{chave}</chNFe>'
+            f'<tpEvento>{tp_evento}</tpEvento><detEvento><descEvento>Cancelamento</descEvento></detEvento>'
+            f'</infEvento></evento>{ret}</procEventoNFe>')
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    (tmp_path / "GALP").mkdir()
+    (tmp_path / "BRAVA").mkdir()
+    (tmp_path / "GALP" / "a.xml").write_text(nfe_xml(CHAVE_A), encoding="utf-8")
+    (tmp_path / "GALP" / "b.xml").write_text(nfe_xml(CHAVE_B, 200.0, 100.0), encoding="utf-8")
+    # Mesma NF-e sem protocolo, em outra empresa
+    (tmp_path / "BRAVA" / "a_copia.xml").write_text(nfe_xml(CHAVE_A, proc=False), encoding="utf-8")
+    (tmp_path / "BRAVA" / "c.xml").write_text(cte_xml(CHAVE_CTE), encoding="utf-8")
+    return tmp_path
+
+
+def _auditar(motor, pasta):
+    for empresa in ("GALP", "BRAVA"):
+        for xml in sorted((pasta / empresa).glob("*.xml")):
+            motor.processar(xml, empresa)
+
+
+class TestChaveAcesso:
+    def test_parsers_extraem_chave(self, pasta):
+        assert parse_nfe(pasta / "GALP" / "a.xml")['chave'] == CHAVE_A
+        assert parse_nfe(pasta / "BRAVA" / "a_copia.xml")['chave'] == CHAVE_A
+        assert parse_cte(pasta / "BRAVA" / "c.xml")['chave'] == CHAVE_CTE
+
+    def test_ler_chave_so_do_inicio(self, pasta, tmp_path):
+        """A chave sai do cabeçalho, sem analisar o XML"""
+        assert ler_chave(pasta / "GALP" / "a.xml") == CHAVE_A
+        assert ler_chave(pasta / "BRAVA" / "c.xml") == CHAVE_CTE
+        (tmp_path / "sem.xml").write_text("<x/>")
+        assert ler_chave(tmp_path / "sem.xml") == ""
+        assert ler_chave(tmp_path / "inexistente.xml") == ""
+
+
+class TestMotorAuditoria:
+    def test_duplicata_entre_empresas_nao_soma(self, pasta):
+        """Mesma chave em nfeProc e NFe avulsa conta uma vez, com relatório"""
+        motor = MotorAuditoria()
+        _auditar(motor, pasta)
+        status = {d['arquivo'].split("/")[-1]: d['status'] for d in motor.documentos}
+        assert status == {'a.xml': STATUS_OK, 'b.xml': STATUS_OK,
+                          'a_copia.xml': STATUS_DUPLICADA, 'c.xml': STATUS_OK}
+        totais = motor.totais()
+        assert totais['NF-e'] == {'valor_total': 1200.0, 'volume_total': 600.0, 'documentos': 2}
+        assert totais['CT-e']['valor_total'] == 300.0
+        [dup] = motor.duplicadas
+        assert (dup['chave'], dup['empresa'], dup['empresa_original']) == (CHAVE_A, "BRAVA", "GALP")
+
+    def test_execucao_repetida_usa_indice(self, pasta, tmp_path, monkeypatch):
+        """Chaves gravadas numa execução não são reanalisadas na seguinte"""
+        banco = str(tmp_path / "indice.db")
+        motor = MotorAuditoria(IndiceChaves(banco))
+        _auditar(motor, pasta)
+        motor.concluir()
+        motor.indice.fechar()
+
+        import auditoria_xml
+        monkeypatch.setattr(auditoria_xml, "parse_nfe", lambda _p: pytest.fail("reanalisou"))
+        monkeypatch.setattr(auditoria_xml, "parse_cte", lambda _p: pytest.fail("reanalisou"))
+        motor = MotorAuditoria(IndiceChaves(banco))
+        _auditar(motor, pasta)
+        assert motor.reaproveitados == 4
+        assert motor.totais()['NF-e']['valor_total'] == 1200.0
+        assert len(motor.duplicadas) == 1
+        motor.indice.fechar()
+
+    def test_xml_invalido(self, tmp_path):
+        (tmp_path / "x.xml").write_text("<nfeProc><quebrado", encoding="utf-8")
+        motor = MotorAuditoria()
+        assert motor.processar(tmp_path / "x.xml", "E")['status'] == STATUS_ERRO
+        assert motor.totais()['NF-e']['documentos'] == 0
+
+
+class TestEventosCancelamento:
+    def test_parse_evento(self, tmp_path):
+        (tmp_path / "ev.xml").write_text(evento_xml(CHAVE_A), encoding="utf-8")
+        (tmp_path / "cce.xml").write_text(evento_xml(CHAVE_A, tp_evento="110110"), encoding="utf-8")
+        (tmp_path / "sem_ret.xml").write_text(evento_xml(CHAVE_A, cstat=""), encoding="utf-8")
+        assert detectar_tipo_xml(tmp_path / "ev.xml") == 'evento'
+        assert parse_evento(tmp_path / "ev.xml")['cancelamento'] is True
+        assert parse_evento(tmp_path / "ev.xml")['chave'] == CHAVE_A
+        # Carta de correção e evento sem retorno de registro não cancelam
+        assert parse_evento(tmp_path / "cce.xml")['cancelamento'] is False
+        assert parse_evento(tmp_path / "sem_ret.xml")['cancelamento'] is False
+
+    @pytest.mark.parametrize("evento_primeiro", [True, False])
+    def test_cancelada_fora_dos_totais(self, pasta, evento_primeiro):
+        """Evento antes ou depois da NF-e: a nota sai dos totais no mesmo fluxo"""
+        evento = pasta / "GALP" / ("0_evento.xml" if evento_primeiro else "z_evento.xml")
+        evento.write_text(evento_xml(CHAVE_B), encoding="utf-8")
+        motor = MotorAuditoria()
+        _auditar(motor, pasta)
+        assert motor.totais()['NF-e']['valor_total'] == 1000.0
+        motor.concluir()
+        status = {d['chave']: d['status'] for d in motor.documentos if d['status'] != STATUS_DUPLICADA}
+        assert status[CHAVE_B] == STATUS_CANCELADA and status[CHAVE_A] == STATUS_OK
+        assert len(motor.eventos) == 1
+
+    def test_denegada(self, tmp_path):
+        (tmp_path / "d.xml").write_text(nfe_xml(CHAVE_A, cstat="302"), encoding="utf-8")
+        motor = MotorAuditoria()
+        assert motor.processar(tmp_path / "d.xml")['status'] == STATUS_DENEGADA
+        assert motor.totais()['NF-e']['documentos'] == 0
+
+    def test_cancelamento_vale_nas_execucoes_seguintes(self, pasta, tmp_path):
+        """O conjunto de canceladas é persistido com o índice"""
+        banco = str(tmp_path / "indice.db")
+        (tmp_path / "eventos").mkdir()
+        (tmp_path / "eventos" / "ev.xml").write_text(evento_xml(CHAVE_B), encoding="utf-8")
+        motor = MotorAuditoria(IndiceChaves(banco))
+        motor.processar(tmp_path / "eventos" / "ev.xml")
+        motor.concluir()
+        motor.indice.fechar()
+
+        motor = MotorAuditoria(IndiceChaves(banco))
+        _auditar(motor, pasta)
+        assert CHAVE_B in motor.canceladas
+        assert motor.totais()['NF-e']['valor_total'] == 1000.0
+        motor.indice.fechar()
+
+
+class TestArquivosCompactados:
+    @pytest.fixture
+    def zips(self, tmp_path):
+        import zipfile
+        with zipfile.ZipFile(tmp_path / "galp.zip", "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("2026/01/a.xml", nfe_xml(CHAVE_A))
+            z.writestr("2026/01/b.xml", nfe_xml(CHAVE_B, 200.0, 100.0))
+            z.writestr("leia-me.txt", "ignorado")
+        with zipfile.ZipFile(tmp_path / "brava.zip", "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("a_copia.XML", nfe_xml(CHAVE_A, proc=False))
+            z.writestr("c.xml", cte_xml(CHAVE_CTE))
+            z.writestr("cancelamento_b.xml", evento_xml(CHAVE_B))
+            z.writestr("quebrado.xml", "<nfeProc><x")
+        return [tmp_path / "galp.zip", tmp_path / "brava.zip"]
+
+    def _conferir(self, motor):
+        motor.concluir()
+        totais = motor.totais()
+        assert totais['NF-e'] == {'valor_total': 1000.0, 'volume_total': 500.0, 'documentos': 1}
+        assert totais['CT-e']['valor_total'] == 300.0
+        status = sorted(d['status'] for d in motor.documentos)
+        assert status == sorted([STATUS_OK, STATUS_CANCELADA, STATUS_DUPLICADA, STATUS_OK, STATUS_ERRO])
+        origens = {d['arquivo'].rsplit("!", 1)[-1] for d in motor.documentos}
+        assert "2026/01/a.xml" in origens and "quebrado.xml" in origens
+
+    def test_zip_sem_extrair(self, zips, tmp_path):
+        """Membros lidos como streams; nada é gravado na pasta"""
+        antes = sorted(p.name for p in tmp_path.rglob("*"))
+        motor = MotorAuditoria()
+        lidos = []
+        assert motor.processar_arquivos(zips, "E", ao_concluir_arquivo=lambda i, c: lidos.append(i)) == 6
+        assert lidos == [1, 2]
+        self._conferir(motor)
+        assert sorted(p.name for p in tmp_path.rglob("*")) == antes
+
+    def test_paralelo_por_arquivo(self, zips):
+        """Um processo por arquivo, mesmo resultado da leitura sequencial"""
+        motor = MotorAuditoria()
+        assert motor.processar_arquivos(zips, "E", max_processos=2) == 6
+        self._conferir(motor)
+
+    def test_chaves_conhecidas_nao_sao_reanalisadas(self, zips, tmp_path):
+        banco = str(tmp_path / "indice.db")
+        motor = MotorAuditoria(IndiceChaves(banco))
+        motor.processar_arquivos(zips[:1])
+        motor.concluir()
+        motor.indice.fechar()
+
+        motor = MotorAuditoria(IndiceChaves(banco))
+        motor.processar_arquivos(zips[:1])
+        assert motor.reaproveitados == 2
+        assert motor.totais()['NF-e']['valor_total'] == 1200.0
+        motor.indice.fechar()
+
+    def test_7z(self, tmp_path):
+        py7zr = pytest.importorskip("py7zr")
+        with py7zr.SevenZipFile(tmp_path / "notas.7z", "w") as z:
+            z.writestr(nfe_xml(CHAVE_A), "a.xml")
+            z.writestr(nfe_xml(CHAVE_A, proc=False), "dup/a.xml")
+            z.writestr(cte_xml(CHAVE_CTE), "c.xml")
+        motor = MotorAuditoria()
+        assert motor.processar_arquivos([tmp_path / "notas.7z"]) == 3
+        totais = motor.totais()
+        assert totais['NF-e']['valor_total'] == 1000.0 and totais['CT-e']['documentos'] == 1
+        assert len(motor.duplicadas) == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["notas.7z"]
@@ -0,0 +1,107 @@
+"""
+Testes para o módulo cenarios.py
+"""
+import numpy as np
+import openpyxl
+import pytest
+from cenarios import (CenariosPMPV, CenariosSCG, distribuicao, exportar_tornado, grade,
+                      tornado)
+from database import DatabasePMPV
+from motor_pmpv import calcular_trimestre
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabasePMPV(str(tmp_path / "cenarios.db"))
+    yield db
+    db.fechar()
+
+
+DADOS = {"Mês 1": [{'empresa': 'A', 'molecula': 1.5, 'transporte': 0.3, 'logistica': 0.2, 'volume': 1000},
+                   {'empresa': 'B', 'molecula': 1.8, 'transporte': 0.1, 'logistica': 0.1, 'volume': 400}],
+         "Mês 2": [{'empresa': 'A', 'molecula': 1.6, 'transporte': 0.3, 'logistica': 0.2, 'volume': 900}],
+         "Mês 3": [{'empresa': 'C', 'molecula': 1.2, 'transporte': 0.5, 'logistica': 0.0, 'volume': 0}]}
+
+
+class TestCenariosPMPV:
+    """Lote vetorizado igual a recalcular cada cenário"""
+
+    @pytest.fixture
+    def base(self, db):
+        sid = db.criar_sessao("base")
+        for mes, linhas in enumerate(DADOS.values(), 1):
+            db.salvar_dados_mes(sid, mes, linhas)
+        db.salvar_resultado(sid, 0, 0, 0, -0.02, 0)
+        return CenariosPMPV.da_sessao(db, sid, dias=(31, 28, 31))
+
+    def test_grade(self):
+        g = grade(molecula=[-0.1, 0, 0.1], volume=[0, 0.02])
+        assert len(g['molecula']) == 6
+        assert list(zip(g['molecula'], g['volume']))[1] == (-0.1, 0.02)
+
+    def test_igual_ao_motor(self, base):
+        g = grade(molecula=[-0.05, 0, 0.05], transporte=[0, 0.1], volume=[-0.02, 0.03],
+                  conta_grafica=[0, 0.01])
+        res = base.avaliar(**g)
+        for i in range(len(g['molecula'])):
+            dados = {m: [{**l, 'molecula': l['molecula'] * (1 + g['molecula'][i]),
+                          'transporte': l['transporte'] * (1 + g['transporte'][i]),
+                          'volume': l['volume'] * (1 + g['volume'][i])} for l in linhas]
+                     for m, linhas in DADOS.items()}
+            esperado = calcular_trimestre(dados, (31, 28, 31), -0.02 + g['conta_grafica'][i])
+            assert res['pmpv'][i] == pytest.approx(esperado['pmpv'])
+            assert res['preco_final'][i] == pytest.approx(esperado['preco_final'])
+
+    def test_milhares_de_cenarios_em_blocos(self, base, monkeypatch):
+        monkeypatch.setattr("cenarios.TAMANHO_BLOCO", 100)
+        variacao = np.linspace(-0.1, 0.1, 5001)
+        res = base.avaliar(molecula=variacao)
+        assert res['pmpv'].shape == (5001,)
+        assert res['pmpv'][2500] == pytest.approx(base.avaliar()['pmpv'][0])
+        assert np.all(np.diff(res['pmpv']) > 0)
+
+    def test_parametro_desconhecido(self, base):
+        with pytest.raises(ValueError):
+            base.avaliar(cambio=[0.1])
+
+    def test_escalar_com_array(self, base):
+        """Escalar (ou array de um valor) vale para todos os cenários"""
+        variacao = np.array([-0.05, 0.0, 0.05])
+        res = base.avaliar(molecula=variacao, volume=0.02, conta_grafica=[0.01])
+        for i, m in enumerate(variacao):
+            unico = base.avaliar(molecula=m, volume=0.02, conta_grafica=0.01)
+            assert res['preco_final'][i] == pytest.approx(unico['preco_final'][0])
+        with pytest.raises(ValueError):
+            base.avaliar(molecula=variacao, volume=[0.0, 0.02])
+
+    def test_tornado_e_exportacao(self, base, tmp_path):
+        tabela = tornado(base, {'molecula': (-0.05, 0.05), 'logistica': (-0.05, 0.05)}, 'pmpv')
+        assert [l['parametro'] for l in tabela] == ['molecula', 'logistica']
+        assert tabela[0]['valor_baixo'] < tabela[0]['base'] < tabela[0]['valor_alto']
+
+        arquivo = exportar_tornado(tabela, str(tmp_path / "tornado.xlsx"))
+        ws = openpyxl.load_workbook(arquivo)["Tornado"]
+        assert ws["A2"].value == 'molecula'
+        assert ws["G2"].value == pytest.approx(tabela[0]['amplitude'])
+
+
+class TestCenariosSCG:
+    """Fórmula das colunas geradas"""
+
+    def test_avaliar_periodo(self, db):
+        db.atualizar_cgr("Jan/2026", 100.0)
+        db.atualizar_cgf("Jan/2026", 40.0)
+        db.atualizar_ret("Jan/2026", 5.0)
+        db.atualizar_rp("Jan/2026", 1.0)
+        base = CenariosSCG.da_consolidacao(db, "Jan/2026")
+        res = base.avaliar(cgf=[0.0, -0.02])
+        assert res['scg'][0] == pytest.approx(db.buscar_consolidacao("Jan/2026")['scg'])
+        assert res['scg'][1] == pytest.approx((100 - 39.2) * (100 + 39.2) + 6)
+        assert base.avaliar(cgf=[0.0, -0.02], ret=0.1)['scg'][1] == pytest.approx(
+            (100 - 39.2) * (100 + 39.2) + 5.5 + 1)
+
+    def test_distribuicao(self):
+        d = distribuicao(np.array([1.0, 2.0, 3.0, np.nan]))
+        assert d['cenarios'] == 3
+        assert d['mediana'] == 2.0
+        assert d['minimo'] == 1.0 and d['maximo'] == 3.0
@@ -190,3 +190,157 @@ class TestDatabasePMPV:
         assert dados_carregados[0]['transporte'] == 0
         assert dados_carregados[0]['logistica'] == 0
         assert dados_carregados[0]['volume'] == 0
+
+
+class TestCacheConsolidacao:
+    """Testes do cache read-through da tabela consolidacao"""
+
+    @pytest.fixture
+    def db_temp(self, tmp_path):
+        db = DatabasePMPV(str(tmp_path / "test_cache.db"))
+        yield db
+        db.fechar()
+
+    def _contar_selects(self, db):
+        consultas = []
+        db.conn.set_trace_callback(
+            lambda sql: consultas.append(sql) if sql.lstrip().upper().startswith("SELECT") else None
+        )
+        return consultas
+
+    def test_historico_em_uma_consulta(self, db_temp):
+        """Histórico completo e buscas por período saem de um único SELECT"""
+        for periodo in ["Jan/2026", "Fev/2026", "Mar/2026"]:
+            db_temp.atualizar_cgr(periodo, 100.0)
+
+        consultas = self._contar_selects(db_temp)
+        historico = db_temp.historico_consolidacao()
+        for linha in historico:
+            db_temp.buscar_consolidacao(linha['periodo'])
+        db_temp.listar_periodos()
+
+        assert len(historico) == 3
+        assert len(consultas) == 1
+
+    def test_escrita_invalida_cache(self, db_temp):
+        """Os métodos atualizar_* e calcular_* invalidam o cache"""
+        db_temp.atualizar_cgr("Dez/2025", 500.0)
+        assert db_temp.buscar_consolidacao("Dez/2025")['cgr'] == 500.0
+
+        db_temp.atualizar_cgf("Dez/2025", 200.0)
+        assert db_temp.buscar_consolidacao("Dez/2025")['cgf'] == 200.0
+
+        db_temp.calcular_e_salvar_rpv("Dez/2025")
+        scg = db_temp.calcular_scg("Dez/2025")
+        dados = db_temp.buscar_consolidacao("Dez/2025")
+        assert dados['rpv'] == 300.0
+        assert dados['scg'] == scg
+
+    def test_cache_compartilhado_entre_instancias(self, tmp_path):
+        """Duas conexões no mesmo arquivo enxergam as escritas uma da outra"""
+        caminho = str(tmp_path / "compartilhado.db")
+        db_scg = DatabasePMPV(caminho)
+        db_rpv = DatabasePMPV(caminho)
+
+        assert db_scg.cache is db_rpv.cache
+        assert db_rpv.buscar_consolidacao("Q1 2026") is None
+
+        db_scg.atualizar_ret("Q1 2026", 42.0)
+        assert db_rpv.buscar_consolidacao("Q1 2026")['ret'] == 42.0
+
+        db_scg.fechar()
+        db_rpv.fechar()
+
+    def test_excluir_periodo(self, db_temp):
+        """Excluir período remove a linha e atualiza o cache"""
+        db_temp.criar_periodo_consolidacao("Nov/2025")
+        assert db_temp.buscar_consolidacao("Nov/2025") is not None
+
+        db_temp.excluir_periodo_consolidacao("Nov/2025")
+        assert db_temp.buscar_consolidacao("Nov/2025") is None
+        assert db_temp.listar_periodos() == []
+
+
+class TestColunasGeradas:
+    """RPV e SCG são colunas geradas e nunca ficam desatualizados"""
+
+    @pytest.fixture
+    def db_temp(self, tmp_path):
+        db = DatabasePMPV(str(tmp_path / "test_geradas.db"))
+        for periodo, cgr, cgf, ret, rp in [
+            ("Jan/2026", 100.0, 40.0, 5.0, 1.0),
+            ("Fev/2026", 200.0, 50.0, 0.0, 2.0),
+            ("Mar/2026", 300.0, 300.0, 3.0, 0.0),
+        ]:
+            db.atualizar_cgr(periodo, cgr)
+            db.atualizar_cgf(periodo, cgf)
+            db.atualizar_ret(periodo, ret)
+            db.atualizar_rp(periodo, rp)
+        yield db
+        db.fechar()
+
+    def test_valores_calculados_sem_recalculo(self, db_temp):
+        """RPV e SCG refletem as entradas sem chamar calcular_*"""
+        jan = db_temp.buscar_consolidacao("Jan/2026")
+        assert jan['rpv'] == 60.0
+        assert jan['scg'] == 60.0 * 140.0 + 5.0 + 1.0
+        assert db_temp.buscar_consolidacao("Fev/2026")['scg'] == 150.0 * 250.0 + 2.0
+        assert db_temp.buscar_consolidacao("Mar/2026")['scg'] == 3.0
+
+    def test_entrada_alterada_atualiza_scg(self, db_temp):
+        """Alterar CGR muda RPV e SCG imediatamente"""
+        db_temp.atualizar_cgr("Jan/2026", 140.0)
+        assert db_temp.calcular_e_salvar_rpv("Jan/2026") == 100.0
+        assert db_temp.calcular_scg("Jan/2026") == 100.0 * 180.0 + 6.0
+
+    def test_correcao_em_lote(self, db_temp):
+        """Um UPDATE para vários períodos; volta só o que mudou, já recalculado"""
+        alteradas = db_temp.corrigir_consolidacao_lote({
+            "Jan/2026": {'cgf': 20.0},
+            "Fev/2026": {'cgr': 200.0},            # igual ao gravado: não muda
+            "Abr/2026": {'cgr': 10.0, 'rp': 1.0},  # período novo
+        })
+        assert [(l['periodo'], l['rpv'], l['scg']) for l in alteradas] == [
+            ("Jan/2026", 80.0, 80.0 * 120.0 + 6.0), ("Abr/2026", 10.0, 10.0 * 10.0 + 1.0)]
+        assert db_temp.buscar_consolidacao("Jan/2026")['scg'] == 80.0 * 120.0 + 6.0
+        assert db_temp.corrigir_consolidacao_lote({}) == []
+        with pytest.raises(ValueError):
+            db_temp.corrigir_consolidacao_lote({"Jan/2026": {'scg': 1.0}})
+
+    def test_colunas_nao_aceitam_escrita(self, db_temp):
+        """Não é possível gravar RPV manualmente"""
+        with pytest.raises(sqlite3.OperationalError):
+            db_temp.cursor.execute("UPDATE consolidacao SET rpv = 1")
+
+    def test_migracao_de_tabela_antiga(self, tmp_path):
+        """Bancos com RPV/SCG em colunas REAL comuns são migrados"""
+        caminho = tmp_path / "antigo.db"
+        conn = sqlite3.connect(caminho)
+        conn.execute("""
+            CREATE TABLE consolidacao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, periodo TEXT NOT NULL,
+                cgr REAL DEFAULT 0, ret REAL DEFAULT 0, rp REAL DEFAULT 0,
+                rpv REAL DEFAULT 0, cgf REAL DEFAULT 0, scg REAL DEFAULT 0,
+                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                observacoes TEXT
+            )
+        """)
+        conn.execute("""
+            INSERT INTO consolidacao (id, periodo, cgr, cgf, ret, rp, rpv, scg, observacoes)
+            VALUES (7, 'Dez/2025', 500, 200, 10, 1, 0, 0, 'legado')
+        """)
+        conn.commit()
+        conn.close()
+
+        db = DatabasePMPV(str(caminho))
+        db.cursor.execute("PRAGMA table_xinfo(consolidacao)")
+        ocultas = {row['name']: row['hidden'] for row in db.cursor.fetchall()}
+        dados = db.buscar_consolidacao("Dez/2025")
+        db.fechar()
+
+        assert ocultas['rpv'] != 0 and ocultas['scg'] != 0
+        assert dados['id'] == 7
+        assert dados['observacoes'] == 'legado'
+        assert dados['rpv'] == 300.0
+        assert dados['scg'] == 300.0 * 700.0 + 11.0
@@ -244,3 +244,101 @@ class TestExcelHandlerPMPV:
         assert ws.cell(2, 7).number_format == '#,##0.0000'  # Custo Total
         
         wb.close()
+
+    def test_estilos_nomeados_no_arquivo(self, dados_exemplo, resultado_exemplo, tmp_path):
+        """Estilos gravados pela API pública de NamedStyle sobrevivem à reabertura"""
+        arquivo = tmp_path / "estilos.xlsx"
+        ExcelHandlerPMPV.exportar_trimestre(dados_exemplo, resultado_exemplo, str(arquivo))
+
+        wb = openpyxl.load_workbook(arquivo)
+        ws = wb["Janeiro"]
+        cabecalho = ws["A1"]
+        assert cabecalho.style == "pmpv_cabecalho"
+        assert cabecalho.font.bold and cabecalho.font.color.rgb == "00FFFFFF"
+        assert cabecalho.fill.fgColor.rgb == "002C3E50"
+        assert ws["B2"].style == "pmpv_preco" and ws["B2"].border.left.style == "thin"
+
+        ws = wb["Resumo Executivo"]
+        assert ws["A1"].font.size == 16 and ws["A1"].font.bold
+        assert ws["B4"].number_format == 'R$ #,##0.00'
+        assert ws["A9"].style == "pmpv_res_rotulo_destaque"
+        assert ws["B9"].fill.fgColor.rgb == "00F1C40F" and ws["B9"].number_format == 'R$ 0.0000'
+        assert ws["A3"].style == "Normal"
+        wb.close()
+
+
+class TestExportacaoLote:
+    """Exportação de várias sessões salvas, sem interface"""
+
+    @pytest.fixture
+    def sessoes(self, tmp_path):
+        from database import DatabasePMPV
+        db = DatabasePMPV(str(tmp_path / "lote.db"))
+        for n in range(3):
+            sid = db.criar_sessao(f"Trimestre {n + 1}/2026")
+            for mes in (1, 2, 3):
+                db.salvar_dados_mes(sid, mes, [
+                    {'empresa': 'PETROBRAS', 'molecula': 1.5, 'transporte': 0.3,
+                     'logistica': 0.2, 'volume': 1000 * (n + 1)},
+                ])
+            db.salvar_resultado(sid, 1.0, 2.0, 3.0, 0.0, 3.0)  # substituído abaixo
+            db.salvar_resultado(sid, 9000.0 * (n + 1), 18000.0 * (n + 1), 2.0, -0.02, 1.98)
+        sessoes = db.carregar_sessoes()
+        db.fechar()
+        return sessoes
+
+    def test_carregar_sessoes_filtradas(self, tmp_path):
+        """Filtro por id aplicado a cada tabela (sessoes.id, dados_mes/resultados.sessao_id)"""
+        from database import DatabasePMPV
+        db = DatabasePMPV(str(tmp_path / "filtro.db"))
+        ids = [db.criar_sessao(f"S{n}") for n in range(3)]
+        for sid in ids:
+            db.salvar_dados_mes(sid, 1, [{'empresa': f"E{sid}", 'molecula': 1, 'transporte': 0,
+                                          'logistica': 0, 'volume': sid}])
+            db.salvar_resultado(sid, sid, sid, 1.0, 0.0, 1.0)
+        sessoes = db.carregar_sessoes([ids[2], ids[0]])
+        assert db.carregar_sessoes([]) == []
+        db.fechar()
+
+        assert [s['id'] for s in sessoes] == [ids[0], ids[2]]
+        assert [s['dados_por_mes']["Mês 1"][0]['empresa'] for s in sessoes] == \
+            [f"E{ids[0]}", f"E{ids[2]}"]
+        assert [s['resultado']['volume_total'] for s in sessoes] == [ids[0], ids[2]]
+
+    def test_carregar_sessoes(self, sessoes):
+        assert [s['nome'] for s in sessoes] == ["Trimestre 1/2026", "Trimestre 2/2026",
+                                                "Trimestre 3/2026"]
+        assert list(sessoes[1]['dados_por_mes']) == ["Mês 1", "Mês 2", "Mês 3"]
+        assert sessoes[1]['dados_por_mes']["Mês 2"][0]['volume'] == 2000
+        assert sessoes[2]['resultado']['volume_total'] == 27000.0
+        assert sessoes[2]['resultado']['pmpv'] == 2.0
+
+    def test_um_workbook(self, sessoes, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.startfile", lambda *_: pytest.fail("abriu o arquivo"), raising=False)
+        [arquivo] = ExcelHandlerPMPV.exportar_lote(sessoes, str(tmp_path / "anual.xlsx"))
+        wb = openpyxl.load_workbook(arquivo)
+        assert wb.sheetnames[0] == "Sessões"
+        assert f"{sessoes[0]['id']} Resumo" in wb.sheetnames
+        assert len(wb.sheetnames) == 1 + 3 * 4
+
+        ws = wb[f"{sessoes[1]['id']} Mês 1"]
+        assert [c.value for c in ws[1]][:2] == ["Empresa", "Molécula"]
+        assert ws.cell(2, 6).value == 2000
+        assert ws.cell(2, 6).number_format == '#,##0'
+        assert ws.cell(2, 2).number_format == '#,##0.0000'
+
+        ws = wb[f"{sessoes[2]['id']} Resumo"]
+        assert ws["B3"].value == 27000.0
+        assert ws["B9"].value == 1.98
+        assert ws["B9"].font.bold
+        wb.close()
+
+    def test_um_arquivo_por_sessao(self, sessoes, tmp_path):
+        arquivos = ExcelHandlerPMPV.exportar_lote(sessoes, str(tmp_path / "saida"),
+                                                  por_sessao=True, max_processos=2)
+        assert len(set(arquivos)) == 3
+        for sessao, arquivo in zip(sessoes, arquivos):
+            assert Path(arquivo).name.startswith(f"PMPV_{sessao['id']}_Trimestre_")
+            wb = openpyxl.load_workbook(arquivo)
+            assert wb.sheetnames == ["Resumo Executivo", "Mês 1", "Mês 2", "Mês 3"]
+            wb.close()
@@ -0,0 +1,134 @@
+"""
+Testes para o módulo exportacao_bi.py
+"""
+import csv
+import os
+
+import pytest
+from database import DatabasePMPV
+from exportacao_bi import ARQUIVO_MARCAS, CHAVES, SUBSTITUICAO, exportar_bi, ler_marcas
+
+
+def _envelhecer(db, quando="2020-01-01 00:00:00"):
+    """Leva as datas para o passado (a exportação ignora o segundo corrente)"""
+    db.conn.execute("UPDATE consolidacao SET data_atualizacao = ?", (quando,))
+    db.conn.execute("UPDATE pmpv_mensal SET data_atualizacao = ?", (quando,))
+    db.conn.execute("UPDATE sessoes SET data_modificacao = ?", (quando,))
+    db.conn.execute("UPDATE resultados SET data_calculo = ?", (quando,))
+    db.conn.execute("UPDATE exclusoes SET data_exclusao = ?", (quando,))
+    db.conn.commit()
+
+
+def _ler_csv(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabasePMPV(str(tmp_path / "bi.db"))
+    db.atualizar_cgr("Jan/2026", 100.0)
+    db.atualizar_cgf("Jan/2026", 40.0)
+    db.salvar_pmpv_mensal("Jan/2026", 1.5)
+    sid = db.criar_sessao("Q1")
+    db.salvar_dados_mes(sid, 1, [{'empresa': 'A', 'molecula': 1, 'transporte': 0, 'logistica': 0, 'volume': 10},
+                                 {'empresa': 'B', 'molecula': 2, 'transporte': 0, 'logistica': 0, 'volume': 5}])
+    db.salvar_resultado(sid, 1, 1, 1, 0, 1)
+    _envelhecer(db)
+    yield db
+    db.fechar()
+
+
+class TestExportacaoBI:
+    def test_primeira_exportacao_completa(self, db, tmp_path):
+        """Todas as tabelas exportadas, uma parte por tabela, e marcas gravadas"""
+        destino = str(tmp_path / "bi")
+        resumo = exportar_bi(destino, db.db_path, formato="csv")
+
+        assert {t: r['linhas'] for t, r in resumo.items()} == {
+            'consolidacao': 1, 'pmpv_mensal': 1, 'dados_mes': 2, 'resultados': 1, 'exclusoes': 0}
+        linhas = _ler_csv(resumo['consolidacao']['arquivo'])
+        assert linhas[0]['periodo'] == "Jan/2026" and float(linhas[0]['scg']) == 60.0 * 140.0
+        assert _ler_csv(resumo['dados_mes']['arquivo'])[0]['data_modificacao'] == "2020-01-01 00:00:00"
+        assert ler_marcas(destino)['consolidacao'] == "2020-01-01 00:00:00"
+
+    def test_chave_ou_grupo_de_cada_tabela(self, db, tmp_path):
+        """Cada tabela diz ao consumidor como deduplicar: por linha ou pelo grupo inteiro"""
+        db.criar_periodo_consolidacao("Fev/2026")
+        db.excluir_periodo_consolidacao("Fev/2026")
+        _envelhecer(db)
+        resumo = exportar_bi(str(tmp_path / "bi"), db.db_path, formato="csv")
+        for tabela, r in resumo.items():
+            assert (tabela in CHAVES) != (tabela in SUBSTITUICAO)
+            colunas = {**CHAVES, **SUBSTITUICAO}[tabela]
+            assert set(colunas) <= set(_ler_csv(r['arquivo'])[0])
+
+    def test_incremental_so_linhas_alteradas(self, db, tmp_path):
+        """Segunda exportação grava só o que mudou depois da marca"""
+        destino = str(tmp_path / "bi")
+        exportar_bi(destino, db.db_path, formato="csv")
+        assert all(r['arquivo'] is None for r in exportar_bi(destino, db.db_path, formato="csv").values())
+
+        db.atualizar_ret("Jan/2026", 5.0)
+        db.atualizar_cgr("Fev/2026", 1.0)
+        db.conn.execute("UPDATE consolidacao SET data_atualizacao = '2021-01-01 00:00:00' "
+                        "WHERE data_atualizacao > '2020-01-01 00:00:00'")
+        db.conn.commit()
+        resumo = exportar_bi(destino, db.db_path, formato="csv")
+
+        assert resumo['pmpv_mensal']['arquivo'] is None
+        assert sorted(l['periodo'] for l in _ler_csv(resumo['consolidacao']['arquivo'])) == ["Fev/2026", "Jan/2026"]
+        assert len(os.listdir(tmp_path / "bi" / "consolidacao")) == 2
+        assert ler_marcas(destino)['consolidacao'] == "2021-01-01 00:00:00"
+
+    def test_segundo_corrente_fica_para_depois(self, db, tmp_path):
+        """Linhas gravadas no segundo atual não são exportadas ainda"""
+        db.salvar_pmpv_mensal("Fev/2026", 1.7)
+        resumo = exportar_bi(str(tmp_path / "bi"), db.db_path, formato="csv", tabelas=["pmpv_mensal"])
+        assert [l['periodo'] for l in _ler_csv(resumo['pmpv_mensal']['arquivo'])] == ["Jan/2026"]
+
+    def test_paginacao(self, db, tmp_path):
+        """Páginas pequenas produzem o mesmo arquivo (keyset por marca + chave)"""
+        for i in range(7):
+            db.atualizar_cgr(f"{i + 1:02d}/2019", float(i))
+        _envelhecer(db)
+        resumo = exportar_bi(str(tmp_path / "bi"), db.db_path, formato="csv",
+                             tabelas=["consolidacao"], tamanho_pagina=3)
+        ids = [int(l['id']) for l in _ler_csv(resumo['consolidacao']['arquivo'])]
+        assert resumo['consolidacao']['linhas'] == 8 and ids == sorted(ids) and len(set(ids)) == 8
+
+    def test_parquet(self, db, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        db.conn.execute("UPDATE consolidacao SET observacoes = NULL")
+        db.conn.commit()
+        resumo = exportar_bi(str(tmp_path / "bi"), db.db_path, formato="parquet", tamanho_pagina=1)
+        tabela = pq.read_table(resumo['dados_mes']['arquivo'])
+        assert tabela.num_rows == 2 and tabela.column('volume').to_pylist() == [10.0, 5.0]
+        assert str(pq.read_table(resumo['consolidacao']['arquivo']).schema.field('scg').type) == "double"
+
+    def test_exclusao_exportada(self, db, tmp_path):
+        """Período apagado chega ao BI como tombstone na tabela exclusoes"""
+        destino = str(tmp_path / "bi")
+        exportar_bi(destino, db.db_path, formato="csv")
+        id_jan = db.buscar_consolidacao("Jan/2026")['id']
+        db.excluir_periodo_consolidacao("Jan/2026")
+        db.salvar_pmpv_mensal("Jan/2026", 1.6)   # substituição não é exclusão
+        _envelhecer(db, "2021-01-01 00:00:00")
+        resumo = exportar_bi(destino, db.db_path, formato="csv")
+        assert [(l['tabela'], l['chave']) for l in _ler_csv(resumo['exclusoes']['arquivo'])] == [
+            ("consolidacao", str(id_jan))]
+        assert resumo['consolidacao']['arquivo'] is None
+
+    def test_banco_sem_tabela_de_exclusoes(self, db, tmp_path):
+        db.conn.execute("DROP TABLE exclusoes")
+        db.conn.commit()
+        resumo = exportar_bi(str(tmp_path / "bi"), db.db_path, formato="csv")
+        assert resumo['exclusoes'] == {'linhas': 0, 'marca': None, 'arquivo': None}
+        assert resumo['consolidacao']['linhas'] == 1
+
+    def test_parametros_invalidos(self, db, tmp_path):
+        with pytest.raises(ValueError):
+            exportar_bi(str(tmp_path / "bi"), db.db_path, formato="xml")
+        with pytest.raises(ValueError):
+            exportar_bi(str(tmp_path / "bi"), db.db_path, formato="csv", tabelas=["sessoes"])
+        assert not os.path.exists(tmp_path / "bi" / ARQUIVO_MARCAS)
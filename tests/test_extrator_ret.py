@@ -0,0 +1,179 @@
+"""
+Testes para o módulo extrator_ret.py
+"""
+import pickle
+
+import pytest
+from extrator_ret import (LAYOUT_COMPLETO, LayoutExtracao, extrair_campos,
+                          extrair_dados_ret, registro_vazio)
+
+
+def criar_pdf(caminho, paginas):
+    """Gera um PDF mínimo (Helvetica) com uma lista de linhas por página"""
+    objetos = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for linhas in paginas:
+        conteudo = "BT /F1 11 Tf 50 780 Td 14 TL " + " ".join(
+            f"({l}) Tj T*" for l in linhas) + " ET"
+        objetos.append(f"<< /Length {len(conteudo)} >>\nstream\n{conteudo}\nendstream")
+        objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objetos)} 0 R >>")
+        kids.append(f"{len(objetos)} 0 R")
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    saida = b"%PDF-1.4\n"
+    offsets = []
+    for n, obj in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += f"{n} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    saida += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    saida += (f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\n"
+              f"startxref\n{xref}\n%%EOF").encode()
+    caminho.write_bytes(saida)
+    return str(caminho)
+
+
+class TestExtrairCampos:
+    """Regex sobre o texto da nota"""
+
+    def test_campos_principais(self):
+        texto = "NOTA DE DEBITO ND: 4521\nVencimento 15/01/2026\nQT: 10\nTotal R$ 1.250,00\n"
+        dados = extrair_campos(texto, registro_vazio("EAT/ND_GALP.pdf"))
+        assert dados['numero_nd'] == '4521'
+        assert dados['data_vencimento'] == '15/01/2026'
+        assert dados['valor_total'] == 1250.0
+        assert dados['quantidade'] == 10.0
+        assert dados['valor_unitario'] == 125.0
+
+
+class TestExtrairDadosRet:
+    """Função pura, enviável a processos, com erro por arquivo"""
+
+    def test_picklable(self):
+        assert pickle.loads(pickle.dumps(extrair_dados_ret)) is extrair_dados_ret
+
+    def test_erro_no_registro(self, tmp_path):
+        dados = extrair_dados_ret(str(tmp_path / "TOP" / "inexistente_AMBEV.pdf"))
+        assert dados['erro']
+        assert dados['tipo_encargo'] == 'TOP' and dados['empresa'] == 'AMBEV'
+        assert dados['valor_total'] == 0.0
+
+    def test_pdf_real(self, tmp_path):
+        pasta = tmp_path / "EAT"
+        pasta.mkdir()
+        caminho = criar_pdf(pasta / "ND_PETROBRAS.pdf", [
+            ["NOTA DE DEBITO ND: 77", "Vencimento 10/02/2026", "Total R$ 2.000,00"],
+        ])
+        dados = extrair_dados_ret(caminho)
+        assert dados['erro'] is None
+        assert (dados['numero_nd'], dados['data_vencimento'], dados['valor_total']) == \
+            ('77', '10/02/2026', 2000.0)
+        assert (dados['tipo_encargo'], dados['empresa'], dados['nota_tipo']) == \
+            ('EAT', 'PETROBRAS', 'Débito')
+
+
+class TestLayoutExtracao:
+    """Limite de páginas, parada antecipada e recorte de regiões"""
+
+    @pytest.fixture
+    def nota_com_anexo(self, tmp_path):
+        pasta = tmp_path / "TOP"
+        pasta.mkdir()
+        # Sem empresa conhecida no nome: template padrão (os dos emissores têm layout próprio)
+        return criar_pdf(pasta / "ND_nota.pdf", [
+            ["NOTA DE DEBITO ND: 12", "Vencimento 05/03/2026", "Total R$ 500,00"],
+            ["ANEXO - memoria de calculo", "Volume contratado 9.999,99"],
+            ["ANEXO - medicoes", "Leitura 88.888,88"],
+        ])
+
+    def test_para_na_primeira_pagina(self, nota_com_anexo):
+        """Campos completos na 1ª página: o anexo não é lido"""
+        dados = extrair_dados_ret(nota_com_anexo)
+        assert dados['valor_total'] == 500.0
+        assert dados['valores_encontrados'] == [500.0, 500.0]
+
+    def test_documento_completo(self, nota_com_anexo):
+        """O modo completo reproduz a leitura de todas as páginas"""
+        dados = extrair_dados_ret(nota_com_anexo, layout=LAYOUT_COMPLETO)
+        assert dados['valor_total'] == 88888.88
+
+    def test_limite_de_paginas(self, nota_com_anexo):
+        dados = extrair_dados_ret(nota_com_anexo, layout=LayoutExtracao(max_paginas=2))
+        assert dados['valor_total'] == 9999.99
+
+    def test_continua_ate_achar_campos(self, tmp_path):
+        """Sem o vencimento na 1ª página, a leitura segue para a próxima"""
+        caminho = criar_pdf(tmp_path / "nota.pdf", [
+            ["ND: 9", "Total R$ 10,00"],
+            ["Vencimento 01/04/2026"],
+            ["Leitura 99.999,99"],
+        ])
+        dados = extrair_dados_ret(caminho, layout=LayoutExtracao(parar_quando_completo=True))
+        assert dados['data_vencimento'] == '01/04/2026'
+        assert dados['valor_total'] == 10.0
+
+    def test_recorte_de_regiao(self, tmp_path):
+        """Só o texto dentro da região (metade superior) é considerado"""
+        caminho = criar_pdf(tmp_path / "nota.pdf", [
+            ["ND: 5", "Total R$ 300,00"] + [""] * 40 + ["Rodape 77.777,77"],
+        ])
+        dados = extrair_dados_ret(caminho, layout=LayoutExtracao(regioes=((0, 0, 1, 0.5),)))
+        assert dados['valor_total'] == 300.0
+        assert 77777.77 not in dados['valores_encontrados']
+
+
+class TestNotasDosEmissores:
+    """Cada template de emissor sobre uma nota no layout do emissor (dados anonimizados)"""
+
+    # Linhas em branco até passar do recorte da Copergás (83% da altura)
+    RODAPE = [""] * 46
+
+    def _extrair(self, tmp_path, nome, paginas):
+        pasta = tmp_path / "EAT"
+        pasta.mkdir(exist_ok=True)
+        return extrair_dados_ret(criar_pdf(pasta / nome, paginas))
+
+    def test_copergas(self, tmp_path):
+        """Canhoto de recebimento (rodapé) fica de fora do total"""
+        dados = self._extrair(tmp_path, "ND_AMBEV_0001.pdf", [[
+            "COMPANHIA PERNAMBUCANA DE GAS - COPERGAS", "NOTA DE DEBITO No 000123",
+            "Emissao: 02/01/2026", "Vencimento: 20/01/2026", "Volume 150.000,00",
+            "VALOR TOTAL DA NOTA: R$ 98.765,43",
+        ] + self.RODAPE + ["RECEBEMOS 02/01/2026 R$ 99.999,99"]])
+        assert (dados['numero_nd'], dados['data_vencimento'], dados['valor_total']) == \
+            ('000123', '20/01/2026', 98765.43)
+        assert 99999.99 not in dados['valores_encontrados']
+
+    def test_copergas_total_fora_do_recorte(self, tmp_path):
+        """Campo obrigatório abaixo do recorte: o documento inteiro é relido"""
+        dados = self._extrair(tmp_path, "ND_GERDAU_0002.pdf", [[
+            "NOTA DE DEBITO No 000124", "Vencimento: 25/01/2026",
+        ] + self.RODAPE + ["VALOR TOTAL: R$ 4.321,00"]])
+        assert dados['erro'] is None
+        assert (dados['numero_nd'], dados['valor_total']) == ('000124', 4321.0)
+
+    def test_petrobras(self, tmp_path):
+        dados = self._extrair(tmp_path, "ND_PETROBRAS_0003.pdf", [
+            ["PETROLEO BRASILEIRO S.A.", "Nota de Debito No 55012", "Emissao 03/01/2026",
+             "Vencimento: 18/01/2026", "TOTAL A PAGAR R$ 1.234.567,89"],
+            ["MEMORIA DE CALCULO", "01/12/2025 Volume 45.000,00 R$ 9.999.999,99"],
+        ])
+        assert (dados['numero_nd'], dados['data_vencimento'], dados['valor_total']) == \
+            ('55012', '18/01/2026', 1234567.89)
+
+    def test_galp_em_euro(self, tmp_path):
+        dados = self._extrair(tmp_path, "NC_GALP_0004.pdf", [
+            ["GALP ENERGIA", "Nota de Credito n. 77", "Vencimento: 28/02/2026",
+             "Subtotal 1.000,00 EUR", "TOTAL EUR 1.230,00"],
+        ])
+        assert (dados['numero_nd'], dados['valor_total']) == ('77', 1230.0)
+
+    def test_galp_sem_simbolo(self, tmp_path):
+        """Valores sem €/EUR ainda entram pelos padrões genéricos"""
+        dados = self._extrair(tmp_path, "ND_GALP_0005.pdf", [
+            ["GALP ENERGIA", "ND 78", "Vencimento: 28/02/2026", "Encargo 800,00", "Ajuste 1.234,56"],
+        ])
+        assert dados['valores_encontrados'] and dados['valor_total'] == 1234.56
@@ -0,0 +1,102 @@
+"""
+Testes para o módulo importacao_contratos.py
+"""
+import openpyxl
+import pandas as pd
+import pytest
+from database import DatabasePMPV
+from importacao_contratos import (importar_contratos, ler_contratos, salvar_contratos,
+                                  validar_contratos)
+
+
+CSV = ("Mês;Empresa;Molécula;Transporte;Logística;Volume\n"
+       "1;PETROBRAS;1,5;0,3;0,2;1.200,5\n"
+       "1;GALP;1.8;0.1;0.1;400\n"
+       "2;PETROBRAS;1,6;0,3;;900\n"
+       "3;ENEVA;abc;0;0;10\n"
+       "3;;1;1;1;1\n"
+       "4;BRAVA;1;1;1;1\n"
+       "2;ORIZON;1;1;1;-5\n")
+
+
+@pytest.fixture
+def csv(tmp_path):
+    caminho = tmp_path / "contratos.csv"
+    caminho.write_text(CSV, encoding="utf-8")
+    return str(caminho)
+
+
+class TestValidacao:
+    def test_linhas_validas_por_mes(self, csv):
+        """Colunas com acento/caixa, vírgula decimal e milhar; vazio vale 0"""
+        dados, _ = importar_contratos(csv)
+        assert list(dados) == ["Mês 1", "Mês 2"]
+        assert dados["Mês 1"][0] == {'empresa': 'PETROBRAS', 'molecula': 1.5, 'transporte': 0.3,
+                                     'logistica': 0.2, 'volume': 1200.5}
+        assert dados["Mês 1"][1]['molecula'] == 1.8
+        assert dados["Mês 2"] == [{'empresa': 'PETROBRAS', 'molecula': 1.6, 'transporte': 0.3,
+                                   'logistica': 0.0, 'volume': 900.0}]
+
+    def test_erros_com_numero_da_linha(self, csv):
+        """Cada problema aponta a linha da planilha (cabeçalho = linha 1)"""
+        _, erros = importar_contratos(csv)
+        assert [(e['linha'], e['erro']) for e in erros] == [
+            (5, "molecula não numérico"), (6, "empresa vazia"),
+            (7, "mês inválido (use 1, 2 ou 3)"), (8, "volume negativo")]
+
+    def test_linhas_em_branco_nao_deslocam_a_numeracao(self, tmp_path):
+        caminho = tmp_path / "brancos.csv"
+        caminho.write_text("mes;empresa;molecula;transporte;logistica;volume\n\n"
+                           "1;A;1;0;0;10\n\n\n1;;1;0;0;10\n", encoding="utf-8")
+        _, erros = importar_contratos(str(caminho))
+        assert erros == [{'linha': 6, 'erro': "empresa vazia"}]
+
+    def test_separador_de_milhar(self):
+        """"1.234" sem vírgula é ambíguo; "1.234.567" e "1.234,5" não"""
+        df = pd.DataFrame({'empresa': ['A', 'B', 'C'], 'molecula': ['1.234', '1.2345', '1'],
+                           'transporte': ['0', '0', '0'], 'logistica': ['0', '0', '0'],
+                           'volume': ['10', '1.234.567', '1.234,5']})
+        validas, erros = validar_contratos(df, mes=1)
+        assert erros == [{'linha': 2, 'erro': "molecula ambíguo (use vírgula decimal: 1,234 ou 1.234,00)"}]
+        assert validas['molecula'].tolist() == [1.2345, 1.0]
+        assert validas['volume'].tolist() == [1234567.0, 1234.5]
+
+    def test_mes_fixo_sem_coluna(self):
+        """Sem a coluna 'mes', todas as linhas vão para o mês informado"""
+        df = pd.DataFrame({'empresa': ['A'], 'molecula': ['1'], 'transporte': ['0'],
+                           'logistica': ['0'], 'volume': ['10']})
+        validas, erros = validar_contratos(df, mes=3)
+        assert erros == [] and validas['mes'].tolist() == [3]
+        with pytest.raises(ValueError, match="mes"):
+            validar_contratos(df)
+
+    def test_coluna_ausente(self):
+        with pytest.raises(ValueError, match="volume"):
+            validar_contratos(pd.DataFrame({'empresa': ['A'], 'molecula': ['1'],
+                                            'transporte': ['0'], 'logistica': ['0']}), mes=1)
+
+    def test_planilha_excel(self, tmp_path):
+        """xlsx é lido pelo mesmo caminho que o CSV"""
+        caminho = tmp_path / "contratos.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.append(["MES", "EMPRESA", "MOLECULA", "TRANSPORTE", "LOGISTICA", "VOLUME"])
+        wb.active.append([2, "GALP", 1.25, 0.5, 0.25, 300])
+        wb.active.append([None] * 6)
+        wb.active.append([1, "ENEVA", 1.234, 0, 0, -1])   # célula numérica: sem ambiguidade
+        wb.save(caminho)
+        assert list(ler_contratos(str(caminho)).columns)[:2] == ['mes', 'empresa']
+        dados, erros = importar_contratos(str(caminho))
+        assert erros == [{'linha': 4, 'erro': "volume negativo"}]
+        assert dados["Mês 2"][0]['volume'] == 300.0
+
+
+class TestSalvarContratos:
+    def test_cria_sessao_em_dados_mes(self, csv, tmp_path):
+        """Linhas importadas viram uma sessão numa única transação"""
+        db = DatabasePMPV(str(tmp_path / "contratos.db"))
+        dados, _ = importar_contratos(csv)
+        sid = salvar_contratos(db, "Importada", dados)
+        sessao = db.carregar_sessao(sid)
+        assert sessao.nome == "Importada"
+        assert sessao.por_mes() == dados
+        db.fechar()
@@ -0,0 +1,116 @@
+"""
+Testes para o módulo itens_nfe.py
+"""
+import zipfile
+
+import pytest
+from auditoria_xml import IndiceChaves, MotorAuditoria, parse_nfe
+from itens_nfe import ItensNFe
+
+CHAVE_A = "35260112345678000190550010000001231000001234"
+CHAVE_B = "35260212345678000190550010000001241000001240"
+CHAVE_C = "35260212345678000190550010000001251000001245"
+
+
+def item(n, cfop, qcom, vuncom, ucom="M3"):
+    return (f'<det nItem="{n}"><prod><cProd>P{n}</cProd><xProd>GAS NATURAL</xProd><NCM>27112100</NCM>'
+            f'<CFOP>{cfop}</CFOP><uCom>{ucom}</uCom><qCom>{qcom}</qCom><vUnCom>{vuncom}</vUnCom>'
+            f'<vProd>{qcom * vuncom}</vProd></prod></det>')
+
+
+def nfe_itens_xml(chave, data, cnpj, itens):
+    return (f'<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00"><NFe>'
+            f'<infNFe Id="NFe{chave}" versao="4.00"><ide><nNF>1</nNF><dhEmi>{data}T10:00:00-03:00</dhEmi></ide>'
+            f'<dest><CNPJ>{cnpj}</CNPJ><xNome>CLIENTE {cnpj[-2:]}</xNome></dest>{"".join(itens)}'
+            f'<total><ICMSTot><vNF>1</vNF></ICMSTot></total></infNFe></NFe>'
+            f'<protNFe><infProt><chNFe>{chave}</chNFe><cStat>100</cStat></infProt></protNFe></nfeProc>')
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    (tmp_path / "a.xml").write_text(nfe_itens_xml(CHAVE_A, "2026-01-15", "11111111000111",
+                                                  [item(1, "5102", 100.0, 2.0), item(2, "5102", 50.0, 4.0),
+                                                   item(3, "5949", 1.0, 30.0, ucom="UN")]), encoding="utf-8")
+    (tmp_path / "b.xml").write_text(nfe_itens_xml(CHAVE_B, "2026-02-03", "22222222000122",
+                                                  [item(1, "6102", 200.0, 3.0)]), encoding="utf-8")
+    return tmp_path
+
+
+class TestParseItens:
+    def test_modo_detalhe_no_mesmo_parse(self, pasta):
+        """Itens só com itens=True; o volume M3 continua igual"""
+        simples = parse_nfe(pasta / "a.xml")
+        assert 'itens' not in simples
+        dados = parse_nfe(pasta / "a.xml", itens=True)
+        assert dados['volume_total'] == simples['volume_total'] == 150.0
+        assert dados['data_emissao'].startswith("2026-01-15")
+        assert dados['cliente_cnpj'] == "11111111000111"
+        assert [i['cfop'] for i in dados['itens']] == ["5102", "5102", "5949"]
+        assert dados['itens'][1]['valor_unitario'] == 4.0
+        assert dados['itens'][2]['volume_m3'] == 0.0   # unidade UN não é volume
+
+
+class TestItensNFe:
+    def _auditar(self, pasta, db_path):
+        indice, itens = IndiceChaves(db_path), ItensNFe(db_path)
+        motor = MotorAuditoria(indice, itens)
+        for xml in sorted(pasta.glob("*.xml")):
+            motor.processar(xml, "GALP")
+        motor.concluir()
+        return motor, indice, itens
+
+    def test_preco_m3_por_cliente_e_cfop(self, pasta):
+        motor, indice, itens = self._auditar(pasta, None)
+        assert len(itens.itens(empresa="GALP")) == 4
+        por_cliente = {l['cliente_cnpj']: l for l in itens.preco_m3()}
+        assert por_cliente["11111111000111"]['preco_m3'] == pytest.approx(400.0 / 150.0)
+        assert por_cliente["11111111000111"]['volume_m3'] == 150.0
+        assert [l['cfop'] for l in itens.preco_m3(por=('cfop',), mes='2026-02')] == ["6102"]
+        with pytest.raises(ValueError):
+            itens.preco_m3(por=('valor_total; DROP TABLE nfe_itens',))
+
+    def test_cancelada_fora_e_reexecucao(self, pasta, tmp_path):
+        """Nota cancelada sai das análises; NF-e indexada sem itens é relida uma vez"""
+        db_path = str(tmp_path / "itens.db")
+        indice = IndiceChaves(db_path)
+        motor = MotorAuditoria(indice)   # primeira execução sem itens
+        for xml in sorted(pasta.glob("*.xml")):
+            motor.processar(xml, "GALP")
+        motor.concluir()
+        indice.fechar()
+
+        motor, indice, itens = self._auditar(pasta, db_path)
+        assert motor.reaproveitados == 0
+        assert itens.chaves == {CHAVE_A, CHAVE_B}
+        indice.registrar_cancelamento(CHAVE_B, "110111", "cancelamento.xml")
+        indice.salvar()
+        assert {l['cliente_cnpj'] for l in itens.preco_m3()} == {"11111111000111"}
+        indice.fechar()
+        itens.fechar()
+
+        motor, indice, itens = self._auditar(pasta, db_path)
+        assert motor.reaproveitados == 2
+        assert len(itens.itens()) == 3
+
+    def test_itens_de_zip(self, pasta, tmp_path):
+        arquivo = tmp_path / "lote.zip"
+        with zipfile.ZipFile(arquivo, "w") as z:
+            z.writestr("c.xml", nfe_itens_xml(CHAVE_C, "2026-02-10", "33333333000133",
+                                              [item(1, "5102", 10.0, 5.0)]))
+        itens = ItensNFe(None)
+        motor = MotorAuditoria(itens=itens)
+        motor.processar_arquivos([arquivo], "GALP")
+        motor.concluir()
+        assert itens.preco_m3(por=('empresa', 'mes'))[0]['preco_m3'] == pytest.approx(5.0)
+
+    def test_exportar_parquet_particionado(self, pasta, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        _, _, itens = self._auditar(pasta, None)
+        arquivos = itens.exportar_parquet(str(tmp_path / "bi"))
+        assert len(arquivos) == 2
+        assert (tmp_path / "bi" / "empresa=GALP" / "mes=2026-01" / "itens.parquet").exists()
+        tabela = pq.read_table(str(tmp_path / "bi" / "empresa=GALP" / "mes=2026-01" / "itens.parquet"))
+        assert tabela.num_rows == 3
+        assert 'empresa' not in tabela.column_names
+        # Reexportar substitui a partição
+        assert itens.exportar_parquet(str(tmp_path / "bi"), mes="2026-01") == arquivos[:1]
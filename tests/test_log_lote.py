@@ -0,0 +1,135 @@
+"""
+Testes para o módulo log_lote.py (textbox simulado, sem Tk)
+"""
+import os
+
+import log_lote
+import pytest
+from log_lote import LogEmLote
+
+
+class TextboxFalso:
+    """Implementa o subconjunto da API do Text usado pelo LogEmLote e conta as chamadas"""
+
+    def __init__(self):
+        self.texto = ""
+        self.agendados = []
+        self.chamadas = {'insert': 0, 'delete': 0, 'see': 0}
+        self.estados = []
+
+    def after(self, _ms, funcao):
+        self.agendados.append(funcao)
+        return len(self.agendados)
+
+    def rodar_timers(self):
+        while self.agendados:
+            self.agendados.pop(0)()
+
+    def insert(self, _indice, texto):
+        self.chamadas['insert'] += 1
+        self.texto += texto
+
+    def index(self, indice):
+        assert indice == "end-1c"
+        return f"{self.texto.count(chr(10)) + 1}.0"
+
+    def delete(self, inicio, fim):
+        self.chamadas['delete'] += 1
+        if fim == "end":
+            self.texto = ""
+            return
+        linhas = self.texto.splitlines(keepends=True)
+        self.texto = "".join(linhas[int(fim.split(".")[0]) - 1:])
+
+    def see(self, _indice):
+        self.chamadas['see'] += 1
+
+    def configure(self, state):
+        self.estados.append(state)
+
+    @property
+    def linhas(self):
+        return self.texto.splitlines()
+
+
+class TestLogEmLote:
+    """Descarga em lote, limite de linhas e arquivo rotativo"""
+
+    def test_lote_unico_por_timer(self):
+        """Muitas mensagens viram um único insert/see"""
+        caixa = TextboxFalso()
+        log = LogEmLote(caixa)
+        for i in range(500):
+            log.escrever(f"linha {i}")
+        assert caixa.texto == "" and len(caixa.agendados) == 1
+
+        caixa.rodar_timers()
+        assert caixa.chamadas['insert'] == 1 and caixa.chamadas['see'] == 1
+        assert caixa.linhas[0] == "linha 0" and caixa.linhas[-1] == "linha 499"
+
+    def test_limite_de_linhas(self):
+        """O widget guarda só as últimas max_linhas"""
+        caixa = TextboxFalso()
+        log = LogEmLote(caixa, max_linhas=10)
+        for lote in range(3):
+            for i in range(7):
+                log.escrever(f"{lote}-{i}")
+            caixa.rodar_timers()
+        assert len(caixa.linhas) == 10
+        assert caixa.linhas[-1] == "2-6" and caixa.linhas[0] == "1-4"
+
+    def test_lote_maior_que_limite(self):
+        """Lote gigante só insere o final, sem custo proporcional no widget"""
+        caixa = TextboxFalso()
+        log = LogEmLote(caixa, max_linhas=5)
+        for i in range(10_000):
+            log.escrever(str(i))
+        caixa.rodar_timers()
+        assert caixa.linhas == ["9995", "9996", "9997", "9998", "9999"]
+
+    def test_somente_leitura(self):
+        caixa = TextboxFalso()
+        log = LogEmLote(caixa, somente_leitura=True)
+        log.escrever("x")
+        caixa.rodar_timers()
+        assert caixa.estados == ["normal", "disabled"]
+
+    def test_arquivo_recebe_tudo(self, tmp_path):
+        """O arquivo tem o log completo mesmo quando o widget é cortado"""
+        caixa = TextboxFalso()
+        arquivo = tmp_path / "logs" / "ret.log"
+        log = LogEmLote(caixa, max_linhas=3, arquivo=str(arquivo))
+        for i in range(20):
+            log.escrever(f"msg {i} 100%")
+        caixa.rodar_timers()
+        log.fechar()
+        linhas = arquivo.read_text(encoding="utf-8").splitlines()
+        assert linhas == [f"msg {i} 100%" for i in range(20)]
+
+    def test_limpar(self):
+        caixa = TextboxFalso()
+        log = LogEmLote(caixa)
+        log.escrever("a")
+        caixa.rodar_timers()
+        log.escrever("b")
+        log.limpar()
+        caixa.rodar_timers()
+        assert caixa.texto == ""
+
+    def test_janelas_compartilham_o_arquivo(self, tmp_path):
+        """Dois logs no mesmo arquivo usam um único handler, fechado pelo último"""
+        arquivo = str(tmp_path / "logs" / "ret.log")
+        a, b = TextboxFalso(), TextboxFalso()
+        log_a = LogEmLote(a, arquivo=arquivo)
+        log_b = LogEmLote(b, arquivo=arquivo)
+        assert log_a._arquivo is log_b._arquivo
+        log_a.escrever("a")
+        log_a.fechar()
+        log_b.escrever("b")
+        log_b.fechar()
+        assert (tmp_path / "logs" / "ret.log").read_text(encoding="utf-8").splitlines() == ["a", "b"]
+        assert log_b._arquivo is None
+
+    def test_pasta_padrao_na_pasta_do_aplicativo(self):
+        assert os.path.dirname(LogEmLote.caminho("ret")) == os.path.join(
+            os.path.dirname(os.path.abspath(log_lote.__file__)), "logs")
@@ -4,7 +4,8 @@ Testes para o módulo modulo_ret.py
 import pytest
 import os
 from pathlib import Path
-from modulo_ret import SistemaRET, TAXA_EUR_BRL
+from modulo_ret import SistemaRET, TAXA_EUR_BRL, resumir_por_tipo
+from repositorio_ret import RepositorioRET
 
 
 class TestIdentificacaoTipo:
@@ -301,3 +302,22 @@ class TestValidacoes:
         """Testa que taxa de câmbio é válida"""
         assert TAXA_EUR_BRL > 0
         assert isinstance(TAXA_EUR_BRL, (int, float))
+
+
+class TestResumo:
+    """Resumo das notas em memória no mesmo formato das consultas do banco"""
+    
+    def test_resumo_igual_ao_do_banco(self, tmp_path):
+        notas = []
+        for i, (tipo, valor) in enumerate([("TOP", 10.0), ("EAT", 5.0), ("TOP", 0.0)]):
+            caminho = tmp_path / f"nota{i}.pdf"
+            caminho.write_bytes(f"%PDF-{i}".encode())
+            notas.append({'tipo_encargo': tipo, 'empresa': 'GALP', 'nota_tipo': 'Débito',
+                          'numero_nd': str(i), 'data_vencimento': '10/01/2026',
+                          'valor_total': valor, 'quantidade': 0.0, 'valor_unitario': 0.0,
+                          'arquivo': caminho.name, 'caminho': str(caminho)})
+        repositorio = RepositorioRET(str(tmp_path / "ret.db"))
+        repositorio.salvar(notas)
+        assert resumir_por_tipo(notas) == repositorio.totais(
+            por=('tipo_encargo',)) == resumir_por_tipo(repositorio.listar())
+        repositorio.fechar()
@@ -0,0 +1,126 @@
+"""
+Testes para o módulo motor_pmpv.py
+"""
+import random
+
+import pytest
+from database import DatabasePMPV
+from motor_pmpv import (TrimestreIncremental, calcular_pmpv, calcular_trimestre, dias_trimestre,
+                        para_float, recalcular_sessoes)
+
+
+def pmpv_laco(dados_por_mes, dias, cg):
+    """Laço original da calculadora, como referência"""
+    c_tot = v_tot = 0.0
+    for linhas, d in zip(dados_por_mes.values(), dias):
+        for l in linhas:
+            vol = para_float(l['volume'])
+            if vol > 0:
+                v_mes = vol * d
+                c_tot += (para_float(l['molecula']) + para_float(l['transporte'])
+                          + para_float(l['logistica'])) * v_mes
+                v_tot += v_mes
+    return c_tot / v_tot, c_tot / v_tot + cg
+
+
+class TestMotorPMPV:
+    """Cálculo vetorizado igual ao laço da interface"""
+
+    def test_entradas_livres(self):
+        assert para_float("1,5") == 1.5
+        assert para_float("") == 0.0
+        assert para_float(None) == 0.0
+        assert para_float("abc") == 0.0
+        assert para_float(3) == 3.0
+
+    def test_dias_trimestre(self):
+        assert dias_trimestre("Novembro") == [30, 31, 31]
+        assert dias_trimestre("Janeiro", bissexto=True) == [31, 29, 31]
+
+    def test_igual_ao_laco(self):
+        rnd = random.Random(7)
+        dados = {f"Mês {m}": [{'molecula': f"{rnd.uniform(1, 2):.4f}".replace('.', ','),
+                               'transporte': rnd.uniform(0, 1), 'logistica': "",
+                               'volume': rnd.choice([0, -5, rnd.uniform(100, 5000)])}
+                              for _ in range(40)] for m in (1, 2, 3)}
+        dias = [31, 28, 31]
+        res = calcular_trimestre(dados, dias, conta_grafica=-0.021)
+        pmpv, final = pmpv_laco(dados, dias, -0.021)
+        assert res['pmpv'] == pytest.approx(pmpv)
+        assert res['preco_final'] == pytest.approx(final)
+
+    def test_exemplo_simples(self):
+        res = calcular_pmpv([1.5, 1.6], [0.3, 0.35], [0.2, 0.25], [1000, 500], 30)
+        assert res['volume_total'] == 45000
+        assert res['custo_total'] == pytest.approx(2.0 * 30000 + 2.2 * 15000)
+
+    def test_volume_zero(self):
+        with pytest.raises(ValueError):
+            calcular_pmpv([1.0], [0.0], [0.0], [0.0], 30)
+
+    def test_recalcular_sessoes(self, tmp_path):
+        db = DatabasePMPV(str(tmp_path / "motor.db"))
+        dados = {"Mês 1": [{'empresa': 'A', 'molecula': 1.5, 'transporte': 0.3,
+                            'logistica': 0.2, 'volume': 1000}],
+                 "Mês 2": [{'empresa': 'B', 'molecula': 1.0, 'transporte': 0.0,
+                            'logistica': 0.0, 'volume': 500}]}
+        ids = []
+        for _ in range(2):
+            sid = db.criar_sessao("s")
+            for mes, linhas in enumerate(dados.values(), 1):
+                db.salvar_dados_mes(sid, mes, linhas)
+            db.salvar_resultado(sid, 0, 0, 0, -0.02, 0)
+            ids.append(sid)
+        vazia = db.criar_sessao("vazia")
+
+        res = recalcular_sessoes(db, dias=(31, 28, 31))
+        esperado = calcular_trimestre(dados, (31, 28, 31), -0.02)
+        assert [r['sessao_id'] for r in res] == ids + [vazia]
+        for r in res[:2]:
+            assert r['pmpv'] == pytest.approx(esperado['pmpv'])
+            assert r['preco_final'] == pytest.approx(esperado['preco_final'])
+        assert res[2]['pmpv'] is None
+        assert recalcular_sessoes(db, [ids[1]])[0]['volume_total'] == esperado['volume_total']
+        db.fechar()
+
+
+class TestTrimestreIncremental:
+    """Somas parciais atualizadas por linha"""
+
+    def test_edicoes_batem_com_calculo_completo(self):
+        rnd = random.Random(3)
+        dias = {"Mês 1": 31, "Mês 2": 28, "Mês 3": 31}
+        modelo = TrimestreIncremental(dias)
+        linhas = {}
+        for passo in range(500):
+            chave = rnd.randrange(60)
+            mes = f"Mês {chave % 3 + 1}"
+            if passo % 7 == 0 and chave in linhas:
+                modelo.remover(chave)
+                del linhas[chave]
+                continue
+            linha = {'molecula': f"{rnd.uniform(1, 2):.4f}".replace('.', ','),
+                     'transporte': rnd.uniform(0, 1), 'logistica': "",
+                     'volume': rnd.choice([0, rnd.uniform(10, 5000)])}
+            preco = modelo.definir_linha(chave, mes, linha['molecula'], linha['transporte'],
+                                         linha['logistica'], linha['volume'])
+            assert preco == pytest.approx(para_float(linha['molecula']) + linha['transporte'])
+            linhas[chave] = (mes, linha)
+
+        por_mes = {m: [l for mm, l in linhas.values() if mm == m] for m in dias}
+        esperado = calcular_trimestre(por_mes, list(dias.values()), -0.02)
+        res = modelo.resultado(-0.02)
+        assert res['pmpv'] == pytest.approx(esperado['pmpv'])
+        assert res['volume_total'] == pytest.approx(esperado['volume_total'])
+        assert res['preco_final'] == pytest.approx(esperado['preco_final'])
+
+    def test_dias_e_remocao(self):
+        modelo = TrimestreIncremental({"Mês 1": 30, "Mês 2": 30})
+        modelo.definir_linha("a", "Mês 1", 2, 0, 0, 100)
+        modelo.definir_linha("b", "Mês 2", 4, 0, 0, 100)
+        assert modelo.resultado()['pmpv'] == pytest.approx(3.0)
+        modelo.definir_dias("Mês 2", 90)
+        assert modelo.resultado()['pmpv'] == pytest.approx((2 * 30 + 4 * 90) / 120)
+        modelo.remover("b")
+        modelo.remover("a")
+        assert modelo.resultado() is None
@@ -0,0 +1,57 @@
+"""
+Testes para o módulo relatorio_ret.py
+"""
+import openpyxl
+import pytest
+from relatorio_ret import exportar_relatorio_ret, resumo_por_tipo
+
+
+def nota(tipo, valor, qt, arquivo):
+    return {'tipo_encargo': tipo, 'empresa': 'GALP', 'nota_tipo': 'Débito', 'numero_nd': '1',
+            'data_vencimento': '10/01/2026', 'valor_total': valor, 'quantidade': qt,
+            'valor_unitario': valor / qt if qt else 0.0, 'arquivo': arquivo}
+
+
+class TestRelatorioRET:
+    """Exportação em modo write-only com estilos nomeados"""
+
+    @pytest.fixture
+    def dados(self):
+        return [nota('TOP', 100.0, 10.0, 'a.pdf'), nota('EAT', 50.0, 5.0, 'b.pdf'),
+                nota('TOP', 25.0, 0.0, 'c.pdf')]
+
+    def test_resumo_por_tipo(self, dados):
+        assert resumo_por_tipo(dados) == [
+            {'tipo_encargo': 'EAT', 'valor_total': 50.0, 'quantidade': 5.0, 'arquivos': 1},
+            {'tipo_encargo': 'TOP', 'valor_total': 125.0, 'quantidade': 10.0, 'arquivos': 2},
+        ]
+
+    def test_abas_e_valores(self, dados, tmp_path):
+        caminho = exportar_relatorio_ret(dados, str(tmp_path / "ret.xlsx"), taxa_eur_brl=6.0)
+        wb = openpyxl.load_workbook(caminho)
+        assert wb.sheetnames == ["Dados Completos", "Resumo por Tipo", "Resumo Geral"]
+
+        ws = wb["Dados Completos"]
+        assert ws.max_row == 4
+        assert ws["A1"].value == "Tipo de Encargo"
+        assert ws["F2"].value == 100.0
+        assert ws["I4"].value == "c.pdf"
+        assert ws.column_dimensions['I'].width == 40
+
+        ws = wb["Resumo por Tipo"]
+        assert [c.value for c in ws[3]] == ['TOP', 125.0, 10.0, 2]
+
+        ws = wb["Resumo Geral"]
+        assert "A1:B1" in [str(r) for r in ws.merged_cells.ranges]
+        assert ws["B4"].value == 3
+        assert ws["B6"].value == pytest.approx(175.0 * 6.0)
+
+    def test_estilos_nomeados(self, dados, tmp_path):
+        caminho = exportar_relatorio_ret(dados, str(tmp_path / "ret.xlsx"), taxa_eur_brl=1.0)
+        ws = openpyxl.load_workbook(caminho)["Dados Completos"]
+        assert ws["A1"].style == 'ret_cabecalho'
+        assert ws["A1"].font.bold
+        assert ws["F2"].style == 'ret_numero'
+        assert ws["F2"].number_format == '#,##0.00'
+        assert ws["B2"].style == 'ret_texto'
+        assert ws["B2"].border.left.style == 'thin'
@@ -0,0 +1,152 @@
+"""
+Testes para o módulo repositorio_ret.py
+"""
+import sqlite3
+
+import pytest
+from repositorio_ret import RepositorioRET, hash_arquivo
+
+
+def nota(caminho, numero_nd="123", empresa="GALP", valor=100.0):
+    return {
+        'tipo_encargo': 'EAT', 'empresa': empresa, 'nota_tipo': 'Débito',
+        'numero_nd': numero_nd, 'data_vencimento': '10/01/2026',
+        'valor_total': valor, 'quantidade': 10.0, 'valor_unitario': valor / 10,
+        'arquivo': str(caminho).rsplit('/', 1)[-1], 'caminho': str(caminho),
+    }
+
+
+class TestRepositorioRET:
+    """Gravação em lote idempotente"""
+
+    @pytest.fixture
+    def pdfs(self, tmp_path):
+        a = tmp_path / "ND_GALP.pdf"
+        b = tmp_path / "ND_AMBEV.pdf"
+        a.write_bytes(b"%PDF-a")
+        b.write_bytes(b"%PDF-b")
+        return a, b
+
+    def test_salvar_duas_vezes_nao_duplica(self, tmp_path, pdfs):
+        repo = RepositorioRET.da_pasta(str(tmp_path))
+        notas = [nota(pdfs[0]), nota(pdfs[1], "456", "AMBEV")]
+        assert repo.salvar(notas) == 2
+        notas[0]['valor_total'] = 250.0
+        repo.salvar(notas)
+
+        linhas = repo.listar()
+        assert len(linhas) == 2
+        assert linhas[0]['valor_total'] == 250.0
+        assert linhas[0]['hash_arquivo'] == hash_arquivo(str(pdfs[0]))
+        repo.fechar()
+
+    def test_copia_do_mesmo_pdf_e_a_mesma_nota(self, tmp_path, pdfs):
+        copia = tmp_path / "copia.pdf"
+        copia.write_bytes(pdfs[0].read_bytes())
+        repo = RepositorioRET(str(tmp_path / "ret.db"))
+        assert repo.salvar([nota(pdfs[0]), nota(copia)]) == 1   # chave repetida no lote
+        assert len(repo.listar()) == 1
+        repo.fechar()
+
+    def test_indices(self, tmp_path):
+        repo = RepositorioRET(str(tmp_path / "ret.db"))
+        repo.cursor.execute("PRAGMA index_list(dados_ret)")
+        indices = {row['name']: row['unique'] for row in repo.cursor.fetchall()}
+        assert indices['idx_dados_ret_chave'] == 1
+        for coluna in ('empresa', 'tipo_encargo', 'data_vencimento'):
+            assert f'idx_dados_ret_{coluna}' in indices
+        repo.fechar()
+
+    def test_migra_banco_antigo_com_duplicatas(self, tmp_path, pdfs):
+        caminho_db = tmp_path / "RET_dados.db"
+        conn = sqlite3.connect(caminho_db)
+        conn.execute("""
+            CREATE TABLE dados_ret (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, tipo_encargo TEXT, empresa TEXT,
+                nota_tipo TEXT, numero_nd TEXT, data_vencimento TEXT, valor_total REAL,
+                quantidade REAL, valor_unitario REAL, arquivo TEXT, caminho TEXT,
+                data_processamento TEXT
+            )
+        """)
+        for valor in (1.0, 2.0):  # o mesmo PDF salvo duas vezes
+            conn.execute("INSERT INTO dados_ret (empresa, numero_nd, valor_total, caminho) "
+                         "VALUES ('GALP', '123', ?, ?)", (valor, str(pdfs[0])))
+        conn.execute("INSERT INTO dados_ret (empresa, numero_nd, valor_total, caminho) "
+                     "VALUES ('N/A', '', 3.0, '/nao/existe.pdf')")
+        conn.execute("INSERT INTO dados_ret (empresa, numero_nd, valor_total, caminho) "
+                     "VALUES ('N/A', '7', 4.0, NULL)")   # linha antiga sem caminho
+        conn.commit()
+        conn.close()
+
+        repo = RepositorioRET(str(caminho_db))
+        linhas = repo.listar()
+        assert [l['valor_total'] for l in linhas] == [2.0, 3.0, 4.0]
+        assert linhas[0]['hash_arquivo'] == hash_arquivo(str(pdfs[0]))
+        assert linhas[2]['hash_arquivo'].startswith('caminho:')
+
+        repo.salvar([nota(pdfs[0], valor=9.0)])
+        assert [l['valor_total'] for l in repo.listar()] == [9.0, 3.0, 4.0]
+        repo.fechar()
+
+
+class TestConsultasRET:
+    """Consultas indexadas e mescla no banco central"""
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        repo = RepositorioRET(str(tmp_path / "ret.db"))
+        notas = []
+        for i, (empresa, venc, valor) in enumerate([
+            ("GALP", "10/01/2026", 100.0),
+            ("GALP", "15/01/2026", 50.0),
+            ("GALP", "05-02-2026", 30.0),
+            ("AMBEV", "20/01/2026", 0.0),
+        ]):
+            pdf = tmp_path / f"nota{i}.pdf"
+            pdf.write_bytes(f"%PDF-{i}".encode())
+            d = nota(pdf, str(i), empresa, valor)
+            d['data_vencimento'] = venc
+            notas.append(d)
+        repo.salvar(notas)
+        yield repo
+        repo.fechar()
+
+    def test_totais_por_empresa_e_mes(self, repo):
+        totais = repo.totais(por=('empresa', 'mes_vencimento'))
+        assert [(t['empresa'], t['mes_vencimento'], t['notas'], t['valor_total']) for t in totais] == [
+            ("AMBEV", "2026-01", 1, 0.0),
+            ("GALP", "2026-01", 2, 150.0),
+            ("GALP", "2026-02", 1, 30.0),
+        ]
+        assert repo.totais(por=('empresa',), mes_vencimento="2026-01")[1]['valor_total'] == 150.0
+
+    def test_sem_valores(self, repo):
+        assert [d['empresa'] for d in repo.sem_valores()] == ["AMBEV"]
+        assert repo.sem_valores(empresa="GALP") == []
+
+    def test_linhas_com_chaves_da_extracao(self, repo):
+        """Notas lidas do banco têm as mesmas chaves de um registro extraído do PDF"""
+        galp, _, _, ambev = repo.listar()
+        assert galp['valores_encontrados'] == [100.0] and galp['erro'] is None
+        assert ambev['valores_encontrados'] == []
+        assert repo.sem_valores()[0]['erro'] is None
+
+    def test_filtro_invalido(self, repo):
+        with pytest.raises(ValueError):
+            repo.listar(caminho="x")
+        with pytest.raises(ValueError):
+            repo.totais(por=('valor_total',))
+
+    def test_consulta_usa_indice(self, repo):
+        repo.cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM dados_ret WHERE mes_vencimento = ?",
+                            ("2026-01",))
+        plano = " ".join(row['detail'] for row in repo.cursor.fetchall())
+        assert "idx_dados_ret_mes_vencimento" in plano
+
+    def test_importar_no_central(self, repo, tmp_path):
+        central = RepositorioRET(str(tmp_path / "central.db"))
+        assert central.importar(repo.db_path) == 4
+        central.importar(repo.db_path)  # de novo: nada duplica
+        assert len(central.listar()) == 4
+        assert central.totais(por=('empresa',))[1]['valor_total'] == 180.0
+        central.fechar()
@@ -0,0 +1,59 @@
+"""
+Testes para o módulo saida_arquivos.py
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from saida_arquivos import gravar_arquivo, reservar_nome
+
+
+def escrever_texto(conteudo):
+    def _escrever(caminho):
+        with open(caminho, "w") as f:
+            f.write(conteudo)
+    return _escrever
+
+
+class TestSaidaArquivos:
+    """Alocação atômica do nome final"""
+
+    def test_nome_livre(self, tmp_path):
+        destino = str(tmp_path / "rel.xlsx")
+        assert gravar_arquivo(destino, escrever_texto("a")) == destino
+        assert open(destino).read() == "a"
+
+    def test_nao_sobrescreve(self, tmp_path):
+        destino = tmp_path / "rel.xlsx"
+        destino.write_text("antigo")
+        final = gravar_arquivo(str(destino), escrever_texto("novo"))
+        assert final == str(tmp_path / "rel_1.xlsx")
+        assert destino.read_text() == "antigo"
+        assert open(final).read() == "novo"
+
+    def test_caminho_relativo(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert gravar_arquivo("rel.xlsx", escrever_texto("a")) == "rel.xlsx"
+        assert gravar_arquivo("rel.xlsx", escrever_texto("b")) == "rel_1.xlsx"
+
+    def test_falha_nao_deixa_lixo(self, tmp_path):
+        def falhar(caminho):
+            raise RuntimeError("disco cheio")
+
+        with pytest.raises(RuntimeError):
+            gravar_arquivo(str(tmp_path / "rel.xlsx"), falhar)
+        assert os.listdir(tmp_path) == []
+
+    def test_exportacoes_concorrentes(self, tmp_path):
+        destino = str(tmp_path / "rel.xlsx")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            finais = list(pool.map(lambda i: gravar_arquivo(destino, escrever_texto(str(i))),
+                                   range(20)))
+        assert len(set(finais)) == 20
+        assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(f) for f in finais)
+        assert sorted(open(f).read() for f in finais) == sorted(str(i) for i in range(20))
+
+    def test_reservar_nome(self, tmp_path):
+        destino = str(tmp_path / "a.txt")
+        assert reservar_nome(destino) == destino
+        assert reservar_nome(destino) == str(tmp_path / "a_1.txt")
@@ -0,0 +1,82 @@
+"""
+Testes para o módulo sessoes_pmpv.py
+"""
+import pytest
+from database import DatabasePMPV
+from motor_pmpv import calcular_trimestre
+from sessoes_pmpv import ALTERADA, IGUAL, INCLUIDA, REMOVIDA, SessaoPMPV, comparar_sessoes
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabasePMPV(str(tmp_path / "sessoes.db"))
+    yield db
+    db.fechar()
+
+
+DADOS = {"Mês 1": [{'empresa': 'A', 'molecula': 1.5, 'transporte': 0.3, 'logistica': 0.2, 'volume': 1000},
+                   {'empresa': 'B', 'molecula': 1.8, 'transporte': 0.1, 'logistica': 0.1, 'volume': 400}],
+         "Mês 3": [{'empresa': 'C', 'molecula': 1.2, 'transporte': 0.5, 'logistica': 0.0, 'volume': 300}]}
+
+
+def _salvar(db, nome, dados, resultado=True):
+    sid = db.criar_sessao(nome)
+    for mes, linhas in dados.items():
+        db.salvar_dados_mes(sid, int(mes.split()[-1]), linhas)
+    if resultado:
+        r = calcular_trimestre(dados, (30, 30), -0.02)
+        db.salvar_resultado(sid, r['volume_total'], r['custo_total'], r['pmpv'], -0.02, r['preco_final'])
+    return sid
+
+
+class TestCarregarSessao:
+    def test_sessao_completa_colunar(self, db):
+        """Todos os meses e o último resultado vêm numa consulta"""
+        sid = _salvar(db, "Q1", DADOS)
+        db.salvar_resultado(sid, 1, 1, 9.0, 0.5, 9.5)
+        sessao = db.carregar_sessao(sid)
+
+        assert (sessao.id, sessao.nome, len(sessao)) == (sid, "Q1", 3)
+        assert sessao.empresa == ['A', 'B', 'C']
+        assert sessao.mes.tolist() == [1, 1, 3]
+        assert sessao.volume.tolist() == [1000, 400, 300]
+        assert sessao.meses() == [1, 3]
+        assert sessao.resultado['pmpv'] == 9.0 and sessao.resultado['conta_grafica'] == 0.5
+        assert sessao.por_mes() == DADOS
+
+    def test_sessao_vazia_e_inexistente(self, db):
+        """Sessão sem linhas nem resultado carrega vazia; id inexistente retorna None"""
+        sid = db.criar_sessao("Vazia")
+        sessao = db.carregar_sessao(sid)
+        assert len(sessao) == 0 and sessao.resultado is None and sessao.por_mes() == {}
+        assert db.carregar_sessao(999) is None
+
+    def test_listar_sessoes(self, db):
+        """Sessões listadas da mais recente para a mais antiga"""
+        a, b = db.criar_sessao("A"), db.criar_sessao("B")
+        assert [s['id'] for s in db.listar_sessoes()] == [b, a]
+
+
+class TestCompararSessoes:
+    def test_diff_por_empresa_e_mes(self):
+        """Linhas pareadas por empresa × mês, com os campos que mudaram"""
+        novos = {"Mês 1": [dict(DADOS["Mês 1"][0], volume=1100), DADOS["Mês 1"][1]],
+                 "Mês 2": [{'empresa': 'D', 'molecula': 2.0, 'transporte': 0, 'logistica': 0, 'volume': 50}]}
+        a = SessaoPMPV.de_linhas(1, "a", [dict(r, mes=int(m[-1])) for m, ls in DADOS.items() for r in ls])
+        b = SessaoPMPV.de_linhas(2, "b", [dict(r, mes=int(m[-1])) for m, ls in novos.items() for r in ls])
+        diff = {(d['empresa'], d['mes']): d for d in comparar_sessoes(a, b)}
+
+        assert diff[('A', 1)]['status'] == ALTERADA
+        assert diff[('A', 1)]['volume'] == (1000, 1100) and 'molecula' not in diff[('A', 1)]
+        assert diff[('B', 1)]['status'] == IGUAL
+        assert diff[('D', 2)]['status'] == INCLUIDA and diff[('D', 2)]['molecula'] == (None, 2.0)
+        assert diff[('C', 3)]['status'] == REMOVIDA and diff[('C', 3)]['volume'] == (300, None)
+
+    def test_empresa_repetida_e_caixa(self, db):
+        """Nome ignora caixa/espaços; repetidas no mês são pareadas pela ordem"""
+        linha = {'molecula': 1, 'transporte': 0, 'logistica': 0, 'volume': 10}
+        a = db.carregar_sessao(_salvar(db, "a", {"Mês 1": [dict(linha, empresa='X'), dict(linha, empresa='X')]}))
+        b = db.carregar_sessao(_salvar(db, "b", {"Mês 1": [dict(linha, empresa=' x '),
+                                                            dict(linha, empresa='X', volume=20)]}))
+        status = [d['status'] for d in comparar_sessoes(a, b)]
+        assert status == [IGUAL, ALTERADA]
@@ -0,0 +1,75 @@
+"""
+Testes para o ModeloTabela de tabela_virtual.py (a parte sem Tk)
+"""
+import pytest
+from tabela_virtual import TODOS, Coluna, ModeloTabela, _formatar, chave_data, chave_numero
+
+
+@pytest.fixture
+def modelo():
+    linhas = [
+        {'tipo_encargo': 'EAT', 'empresa': 'GALP', 'valor_total': 300.0, 'numero_nd': '3'},
+        {'tipo_encargo': 'TOP', 'empresa': 'AMBEV', 'valor_total': 100.0, 'numero_nd': ''},
+        {'tipo_encargo': 'EAT', 'empresa': 'AMBEV', 'valor_total': 200.0, 'numero_nd': '1'},
+        {'tipo_encargo': 'Outros', 'empresa': 'N/A', 'valor_total': 0.0, 'numero_nd': '2'},
+    ]
+    return ModeloTabela(linhas)
+
+
+class TestModeloTabela:
+    """Filtro, ordenação e fatias sobre os dados completos"""
+
+    def test_sem_limite_de_linhas(self):
+        modelo = ModeloTabela([{'n': i} for i in range(10_000)])
+        assert len(modelo) == 10_000
+        assert [l['n'] for l in modelo.fatia(9_998, 25)] == [9_998, 9_999]
+
+    def test_filtrar(self, modelo):
+        modelo.filtrar(tipo_encargo='EAT')
+        assert len(modelo) == 2
+        modelo.filtrar(empresa='AMBEV')
+        assert [l['valor_total'] for l in modelo.fatia(0, 10)] == [200.0]
+        modelo.filtrar(tipo_encargo=TODOS, empresa='')
+        assert len(modelo) == 4
+
+    def test_ordenar_e_inverter(self, modelo):
+        modelo.ordenar('valor_total')
+        assert [l['valor_total'] for l in modelo.fatia(0, 10)] == [0.0, 100.0, 200.0, 300.0]
+        modelo.ordenar('valor_total')
+        assert modelo.decrescente
+        assert modelo.fatia(0, 1)[0]['valor_total'] == 300.0
+
+    def test_vazios_no_fim(self, modelo):
+        modelo.ordenar('numero_nd', decrescente=True)
+        assert [l['numero_nd'] for l in modelo.fatia(0, 10)] == ['3', '2', '1', '']
+
+    def test_ordem_mantida_ao_filtrar(self, modelo):
+        modelo.ordenar('valor_total')
+        modelo.filtrar(empresa='AMBEV')
+        assert [l['valor_total'] for l in modelo.fatia(0, 10)] == [100.0, 200.0]
+
+    def test_valores_unicos(self, modelo):
+        assert modelo.valores_unicos('tipo_encargo') == ['EAT', 'Outros', 'TOP']
+
+    def test_chaves_de_ordenacao(self):
+        """Datas dd/mm/aaaa por data, números em texto por valor, tipos misturados sem erro"""
+        linhas = [
+            {'venc': '05/03/2026', 'nd': '10', 'misto': 'abc'},
+            {'venc': '20/01/2026', 'nd': '9', 'misto': 2.5},
+            {'venc': '01/02/2025', 'nd': 'ND-1', 'misto': None},
+            {'venc': 'inválida', 'nd': '100', 'misto': 1},
+        ]
+        modelo = ModeloTabela(linhas, chaves={'venc': chave_data, 'nd': chave_numero})
+        modelo.ordenar('venc')
+        assert [l['venc'] for l in modelo.fatia(0, 4)] == ['01/02/2025', '20/01/2026', '05/03/2026', 'inválida']
+        modelo.ordenar('nd')
+        assert [l['nd'] for l in modelo.fatia(0, 4)] == ['9', '10', '100', 'ND-1']
+        modelo.ordenar('misto')
+        assert [l['misto'] for l in modelo.fatia(0, 4)] == [1, 2.5, 'abc', None]
+
+    def test_formato_tolera_valores_ausentes(self):
+        """Linhas do banco podem vir sem valor: a célula fica vazia em vez de quebrar"""
+        coluna = Coluna("Valor", 'valor', formato=lambda v: f"{v * 5.5:.2f}")
+        assert _formatar(coluna, None) == ""
+        assert _formatar(coluna, 2.0) == "11.00"
+        assert _formatar(coluna, "n/d") == "n/d"
@@ -0,0 +1,141 @@
+"""
+Testes para o módulo tarefas.py (sem Tk: o widget é simulado)
+"""
+import operator
+import threading
+import time
+
+import pytest
+from tarefas import ExecutorTarefas, TarefaCancelada, TokenCancelamento
+
+
+class WidgetFalso:
+    """Simula ``after()``: guarda os callbacks para o teste disparar na thread principal"""
+
+    def __init__(self):
+        self.agendados = []
+
+    def after(self, _ms, funcao):
+        self.agendados.append(funcao)
+
+    def rodar_ate(self, condicao, timeout=5.0):
+        limite = time.time() + timeout
+        while not condicao():
+            assert time.time() < limite, "tarefa não terminou a tempo"
+            if self.agendados:
+                self.agendados.pop(0)()
+            else:
+                time.sleep(0.01)
+
+
+@pytest.fixture
+def widget():
+    return WidgetFalso()
+
+
+@pytest.fixture
+def executor(widget):
+    ex = ExecutorTarefas(widget, intervalo_ms=1)
+    yield ex
+    ex.encerrar()
+
+
+class TestTokenCancelamento:
+    """Token compartilhado entre interface e worker"""
+
+    def test_verificar(self):
+        token = TokenCancelamento()
+        token.verificar()
+        token.cancelar()
+        assert token.cancelado
+        with pytest.raises(TarefaCancelada):
+            token.verificar()
+
+
+class TestExecutorTarefas:
+    """Entrega de progresso, log, resultado e erros pela fila"""
+
+    def test_resultado_e_progresso_na_thread_principal(self, widget, executor):
+        """Callbacks rodam na thread que drena a fila, não no worker"""
+        eventos, threads = [], []
+        principal = threading.current_thread()
+
+        def trabalho(progresso, n):
+            for i in range(1, n + 1):
+                progresso.log(f"item {i}")
+                progresso(i * 100 / n)
+            return threading.current_thread()
+
+        executor.executar(
+            trabalho, 4,
+            ao_progresso=lambda pct, _msg: eventos.append(pct),
+            ao_log=lambda msg: threads.append(threading.current_thread()),
+            ao_concluir=lambda t: eventos.append(t),
+        )
+        widget.rodar_ate(lambda: not executor.ocupado)
+
+        assert eventos[:4] == [25.0, 50.0, 75.0, 100.0]
+        assert eventos[-1] is not principal
+        assert threads and all(t is principal for t in threads)
+
+    def test_erro_entregue_ao_callback(self, widget, executor):
+        erros = []
+
+        def trabalho(_progresso):
+            raise ValueError("falhou")
+
+        executor.executar(trabalho, ao_erro=erros.append)
+        widget.rodar_ate(lambda: not executor.ocupado)
+        assert isinstance(erros[0], ValueError)
+
+    def test_callback_com_erro_nao_trava_a_fila(self, widget, executor, caplog):
+        """Eventos seguintes ainda são entregues e o erro vai para o log"""
+        logs, concluidas = [], []
+
+        def trabalho(progresso):
+            progresso.log("primeiro")
+            progresso.log("segundo")
+            return 42
+
+        def ao_log(mensagem):
+            logs.append(mensagem)
+            if mensagem == "primeiro":
+                raise RuntimeError("callback quebrado")
+
+        executor.executar(trabalho, ao_log=ao_log, ao_concluir=concluidas.append)
+        widget.rodar_ate(lambda: not executor.ocupado)
+        assert logs == ["primeiro", "segundo"] and concluidas == [42]
+        assert "callback quebrado" in caplog.text
+
+    def test_cancelamento(self, widget, executor):
+        """Cancelar interrompe o worker no próximo progresso"""
+        iniciou, canceladas, concluidas = threading.Event(), [], []
+
+        def trabalho(progresso):
+            iniciou.set()
+            while True:
+                progresso(0)
+                time.sleep(0.005)
+
+        token = executor.executar(trabalho, ao_cancelar=lambda: canceladas.append(1),
+                                  ao_concluir=concluidas.append)
+        assert iniciou.wait(2)
+        token.cancelar()
+        widget.rodar_ate(lambda: not executor.ocupado)
+        assert canceladas == [1] and concluidas == []
+
+    def test_mapear_em_processos_preserva_ordem(self, widget, executor):
+        resultados = []
+        executor.mapear(operator.neg, [3, 1, 2], ao_concluir=resultados.append)
+        widget.rodar_ate(lambda: not executor.ocupado, timeout=30)
+        assert resultados == [[-3, -1, -2]]
+
+    def test_mapear_em_lotes(self, widget, executor):
+        """Lotes pequenos ainda devolvem a lista completa em ordem"""
+        resultados, progresso = [], []
+        executor.mapear(operator.neg, range(7), tamanho_lote=2,
+                        ao_progresso=lambda pct, _m: progresso.append(pct),
+                        ao_concluir=resultados.append)
+        widget.rodar_ate(lambda: not executor.ocupado, timeout=30)
+        assert resultados == [[0, -1, -2, -3, -4, -5, -6]]
+        assert len(progresso) == 4 and progresso[-1] == 100.0
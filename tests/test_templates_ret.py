@@ -0,0 +1,123 @@
+"""
+Testes para o módulo templates_ret.py
+"""
+import os
+import re
+
+import pytest
+from extrator_ret import extrair_campos, extrair_dados_ret, registro_vazio
+from templates_ret import (EMPRESAS_CONHECIDAS, LAYOUT_COMPLETO, REGISTRO, TEMPLATE_COPERGAS,
+                           TEMPLATE_GALP, TEMPLATE_PETROBRAS, AhoCorasick, Classificador,
+                           RegistroTemplates, TemplateRET)
+
+
+def classificar_legado(caminho):
+    """Regras originais do SistemaRET, para comparar prioridades"""
+    cam = caminho.upper()
+    tipo = ('EAT' if 'EAT' in cam else 'Penalidades' if 'PENALIDADE' in cam
+            else 'TOP' if 'TOP' in cam else 'Outros')
+    nome = os.path.basename(caminho).upper()
+    empresa = next((e for e in EMPRESAS_CONHECIDAS if e in nome), 'N/A')
+    if 'ND' in nome or 'DEBITO' in nome or 'DÉBITO' in nome:
+        nota = 'Débito'
+    elif 'NC' in nome or 'CREDITO' in nome or 'CRÉDITO' in nome:
+        nota = 'Crédito'
+    else:
+        nota = 'N/A'
+    return {'tipo_encargo': tipo, 'empresa': empresa, 'nota_tipo': nota}
+
+
+class TestAhoCorasick:
+    """Busca de várias palavras numa passada"""
+
+    def test_ocorrencias_sobrepostas(self):
+        automato = AhoCorasick(['HE', 'SHE', 'HIS', 'HERS'])
+        achados = sorted(automato.buscar('USHERS'))
+        assert achados == [(1, 'SHE'), (2, 'HE'), (2, 'HERS')]
+
+    def test_sem_ocorrencia(self):
+        assert list(AhoCorasick(['EAT']).buscar('TOPO')) == []
+
+
+class TestClassificador:
+    """Mesmas prioridades das regras antigas"""
+
+    @pytest.mark.parametrize("caminho", [
+        "C:/RET/EAT/ND_PETROBRAS_dez.pdf",
+        "C:/RET/TOP/PENALIDADE/NC_GALP.pdf",
+        "C:/RET/TOP/Nota Crédito AMBEV CBA.pdf",
+        "C:/RET/Outros/nota débito M DIAS BRANCO.pdf",
+        "C:/ND_GALP/EAT_2025/arquivo.pdf",          # ND e GALP só na pasta
+        "C:/RET/PENALIDADE/GALP_COPERGAS_NC_ND.pdf",
+        "/home/penalidades/CERVEJARIA AMBEV.pdf",
+        "C:/pasta/DESCONHECIDO/arquivo.pdf",
+    ])
+    def test_equivalente_ao_legado(self, caminho):
+        assert Classificador().classificar(caminho) == classificar_legado(caminho)
+
+
+class TestRegistroTemplates:
+    """Resolução do template mais específico"""
+
+    def test_resolver(self):
+        padrao = TemplateRET('padrao')
+        registro = RegistroTemplates(padrao)
+        por_tipo = TemplateRET('top', tipo_encargo='TOP')
+        por_empresa = TemplateRET('galp', empresa='GALP')
+        exato = TemplateRET('galp-top', empresa='GALP', tipo_encargo='TOP')
+        for t in (por_tipo, por_empresa, exato):
+            registro.registrar(t)
+
+        assert registro.resolver('GALP', 'TOP') is exato
+        assert registro.resolver('GALP', 'EAT') is por_empresa
+        assert registro.resolver('AMBEV', 'TOP') is por_tipo
+        assert registro.resolver('AMBEV', 'EAT') is padrao
+
+    def test_regex_total_do_template(self):
+        """Template com regex de total não usa o maior valor do texto"""
+        template = TemplateRET('total', regex_total=re.compile(r'TOTAL A PAGAR\s*R\$\s*([\d.,]+)'))
+        texto = "ND: 1\nVolume 12.345,00\nTOTAL A PAGAR R$ 1.000,00\n"
+        dados = extrair_campos(texto, registro_vazio("x.pdf"), template)
+        assert dados['valor_total'] == 1000.0
+        assert extrair_campos(texto, registro_vazio("x.pdf"))['valor_total'] == 12345.0
+
+
+class TestTemplatesEmissores:
+    """Templates reais registrados por emissor"""
+
+    @pytest.mark.parametrize("caminho, nome", [
+        ("C:/RET/TOP/ND_PETROBRAS_jan.pdf", 'petrobras'),
+        ("C:/RET/PENALIDADE/NC_GALP.pdf", 'galp'),
+        ("C:/RET/EAT/ND_COPERGAS_AMBEV.pdf", 'copergas'),
+        ("C:/RET/TOP/Nota Débito GERDAU.pdf", 'copergas'),
+        ("C:/RET/TOP/nota_sem_empresa.pdf", 'padrao'),
+    ])
+    def test_template_pelo_emissor(self, caminho, nome):
+        classificacao = Classificador().classificar(caminho)
+        assert REGISTRO.resolver(classificacao['empresa'], classificacao['tipo_encargo']).nome == nome
+
+    def test_layouts_limitam_paginas(self):
+        assert TEMPLATE_COPERGAS.layout.max_paginas == 1
+        assert TEMPLATE_COPERGAS.layout.regioes       # canhoto fora do recorte
+        assert TEMPLATE_PETROBRAS.layout.max_paginas == 2
+        assert TEMPLATE_GALP.layout.parar_quando_completo
+
+    def test_copergas_vencimento_e_total_rotulados(self):
+        texto = ("NOTA DE DÉBITO Nº 4521\nEmissão: 02/01/2026\nVencimento: 20/01/2026\n"
+                 "Volume 150.000,00\nVALOR TOTAL DA NOTA: R$ 98.765,43\n")
+        dados = extrair_campos(texto, registro_vazio("ND_AMBEV.pdf"), TEMPLATE_COPERGAS)
+        assert (dados['numero_nd'], dados['data_vencimento']) == ('4521', '20/01/2026')
+        assert dados['valor_total'] == 98765.43
+
+    def test_galp_em_euro(self):
+        texto = "Nota de Crédito n. 77\n01/02/2026\nSubtotal 1.000,00 EUR\nTOTAL € 1.230,00\n"
+        dados = extrair_campos(texto, registro_vazio("NC_GALP.pdf"), TEMPLATE_GALP)
+        assert dados['numero_nd'] == '77'
+        assert dados['valor_total'] == 1230.0
+
+    def test_total_sem_rotulo_usa_maior_valor(self):
+        """Se o rótulo do total não aparece, vale a regra original"""
+        texto = "ND 12\n10/03/2026\nR$ 500,00\nR$ 1.500,00\n"
+        dados = extrair_campos(texto, registro_vazio("ND_PETROBRAS.pdf"), TEMPLATE_PETROBRAS)
+        assert dados['valor_total'] == 1500.0
+        assert dados['data_vencimento'] == '10/03/2026'